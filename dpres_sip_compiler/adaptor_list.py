@@ -1,15 +1,69 @@
 """
 Dict of adaptor names and corresponding SIP metadata classes
+
+The classes are given as dotted paths, so that an adaptor module is
+imported only when the adaptor is selected in the configuration.
+Additional adaptors can be registered by other packages as entry points
+in the ``dpres_sip_compiler.adaptors`` group, for example in setup.py::
+
+    entry_points={
+        "dpres_sip_compiler.adaptors": [
+            "myadaptor = my_package.my_module:MyAdaptor"
+        ]
+    }
 """
-from dpres_sip_compiler.adaptors.generic_adaptor import \
-    GenericFolderStructure
-from dpres_sip_compiler.adaptors.musicarchive import \
-    SipMetadataMusicArchive
-from dpres_sip_compiler.adaptors.postal_museum import \
-    SipMetadataPostalMuseum
+from __future__ import annotations
+
+import functools
+import importlib
+from importlib import metadata
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from dpres_sip_compiler.base_adaptor import SipMetadata
+
+ENTRY_POINT_GROUP = "dpres_sip_compiler.adaptors"
 
 ADAPTOR_DICT = {
-    "generic": GenericFolderStructure,
-    "musicarchive": SipMetadataMusicArchive,
-    "postalmuseum": SipMetadataPostalMuseum
+    "generic": "dpres_sip_compiler.adaptors.generic_adaptor."
+               "GenericFolderStructure",
+    "musicarchive": "dpres_sip_compiler.adaptors.musicarchive."
+                    "SipMetadataMusicArchive",
+    "postalmuseum": "dpres_sip_compiler.adaptors.postal_museum."
+                    "SipMetadataPostalMuseum"
 }
+
+
+def _adaptor_entry_points() -> tuple[metadata.EntryPoint, ...]:
+    """Return entry points registered in the adaptor group."""
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, "select"):
+        return tuple(entry_points.select(group=ENTRY_POINT_GROUP))
+    # Python 3.9 returns a dict of groups
+    return tuple(entry_points.get(ENTRY_POINT_GROUP, ()))
+
+
+@functools.lru_cache(maxsize=None)
+def import_adaptor(dotted_path: str) -> type[SipMetadata]:
+    """Import adaptor class from a dotted path.
+
+    :param dotted_path: Path of the class, e.g. "package.module.Class"
+    :returns: SIP metadata class
+    """
+    (module_name, class_name) = dotted_path.rsplit(".", 1)
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+@functools.lru_cache(maxsize=None)
+def entry_point_adaptor(name: str) -> type[SipMetadata] | None:
+    """Load adaptor class registered as an entry point.
+
+    Only the module of the named adaptor is imported.
+
+    :param name: Adaptor name
+    :returns: SIP metadata class, or None if no such entry point exists
+    """
+    for entry_point in _adaptor_entry_points():
+        if entry_point.name == name:
+            return entry_point.load()
+    return None
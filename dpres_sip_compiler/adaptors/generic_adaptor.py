@@ -1,8 +1,6 @@
 """Generic adaptor."""
-import os
-import fnmatch
-from uuid import uuid4
 from dpres_sip_compiler.base_adaptor import SipMetadata, PremisObject
+from dpres_sip_compiler.file_collector import collect_files
 
 
 class GenericFolderStructure(SipMetadata):
@@ -10,18 +8,15 @@ class GenericFolderStructure(SipMetadata):
 
     def populate(self, source_path, config):
         """Recursively collect all file paths from given path."""
-        files = []
-        files += [os.path.join(looproot, filename)
-                  for looproot, _, filenames in os.walk(source_path)
-                  for filename in filenames
-                  if fnmatch.fnmatch(filename, "*")]
-
-        for filepath in files:
+        for (filepath, stat_result) in collect_files(
+                source_path, self.exclude_files(config)):
             metadata = {
                 "object_identifier_type": "UUID",
-                "object_identifier_value": str(uuid4())
+                "object_identifier_value": self.new_object_identifier(
+                    source_path, filepath, config)
             }
             p_object = PremisObject(metadata=metadata)
             # Use relative path for the objects
-            p_object.filepath = os.path.relpath(filepath, source_path)
+            p_object.filepath = filepath
+            p_object.stat_result = stat_result
             self.add_object(p_object)
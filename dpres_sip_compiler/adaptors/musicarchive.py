@@ -3,8 +3,10 @@ from __future__ import annotations
 
 import csv
 import datetime
+import functools
 import glob
 import os
+from collections.abc import Mapping
 from subprocess import run
 from typing import TYPE_CHECKING, Literal
 from uuid import uuid4
@@ -38,7 +40,7 @@ from dpres_sip_compiler.constants import (
 )
 
 if TYPE_CHECKING:
-    from collections.abc import Iterator
+    from collections.abc import Iterable, Iterator
     from io import TextIOWrapper
 
     from dpres_sip_compiler.config import Config
@@ -65,35 +67,295 @@ def read_csv_file(filename: str) -> Iterator[dict[str, str]]:
         yield from csvreader
 
 
+# Columns used from the CSV file. The digest status column "tiiviste-status"
+# is optional.
+REQUIRED_COLUMNS = (
+    "objekti-id", "objekti-nimi", "objekti-uuid", "event-id", "event",
+    "event-aika-alku", "event-aika-loppu", "event-selite", "event-tulos",
+    "agent-id", "agent-nimi", "agent-tyyppi", "agent-rooli", "tiiviste",
+    "tiiviste-tyyppi", "tiiviste-aika", "sip-tunniste", "pon-korvattu-nimi",
+    "poo-sip-obj-x-rooli-selite", "poo-vastinpari-obj-uuid",
+    "poo-vastinpari-obj-id", "poo-vastinpari-obj-nimi",
+    "poo-vastinpari-obj-status")
+
+# Format of the timestamps in the CSV file, and the output format
+TIME_PARSE_FORMAT = "%Y-%m-%d %H:%M:%S"
+TIME_OUTPUT_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+# Maximum number of distinct timestamps kept by convert_timestamp
+TIMESTAMP_CACHE_SIZE = 65536
+
+# Event types with a detail description
+EVENT_TYPES = (
+    EVENT_DIGEST, EVENT_CHANGE, EVENT_CREATION, EVENT_MODIFICATION,
+    EVENT_META_MODIFICATION, EVENT_NORMALIZATION, EVENT_MIGRATION,
+    EVENT_CONVERSION)
+
+
+def read_csv_columns(filename: str) -> dict[str, list[str | None]]:
+    """
+    Read all rows from CSV file as columns.
+
+    The rows are read like in :func:`read_csv_file`: empty lines are
+    skipped, and missing values of short rows are None.
+
+    :param filename: Filename to read
+    :returns: List of values by column name
+    :raises: ValueError if required columns are missing
+    """
+    with open(filename, "rt", encoding="utf-8") as infile:
+        csvreader = csv.reader(infile, delimiter=',', quotechar='"')
+        header = next(csvreader, [])
+        missing = [column for column in REQUIRED_COLUMNS
+                   if column not in header]
+        if missing:
+            raise ValueError(
+                f"CSV metadata file {filename} is missing columns: "
+                f"{', '.join(missing)}")
+        width = len(header)
+        rows = [
+            row if len(row) == width else (row + [None] * width)[:width]
+            for row in csvreader if row]
+
+    values = zip(*rows) if rows else ([] for _ in header)
+    return {column: list(value) for (column, value) in zip(header, values)}
+
+
+@functools.lru_cache(maxsize=TIMESTAMP_CACHE_SIZE)
+def convert_timestamp(timestamp: str) -> str:
+    """
+    Convert a timestamp of the CSV file to ISO format.
+
+    The timestamps repeat heavily across the rows, e.g. when many files
+    are hashed in the same second, so the converted timestamps are
+    cached. Timestamps in the exact ``YYYY-MM-DD HH:MM:SS`` form are
+    checked with the datetime constructor and converted by replacing the
+    separator. Other forms accepted by :meth:`datetime.datetime.strptime`,
+    e.g. without zero padding, are parsed with it, as are years before
+    1000, whose padding in :meth:`datetime.datetime.strftime` depends on
+    the platform.
+
+    :param timestamp: Timestamp in ``TIME_PARSE_FORMAT``
+    :returns: Timestamp in ``TIME_OUTPUT_FORMAT``
+    :raises: ValueError if the timestamp is invalid
+    """
+    if len(timestamp) == 19 and timestamp[0] != "0" \
+            and timestamp[10] == " " \
+            and timestamp[4] == timestamp[7] == "-" \
+            and timestamp[13] == timestamp[16] == ":":
+        fields = (timestamp[0:4], timestamp[5:7], timestamp[8:10],
+                  timestamp[11:13], timestamp[14:16], timestamp[17:19])
+        if all(field.isascii() and field.isdigit() for field in fields):
+            datetime.datetime(*map(int, fields))
+            return f"{timestamp[:10]}T{timestamp[11:]}"
+    return datetime.datetime.strptime(
+        timestamp, TIME_PARSE_FORMAT).strftime(TIME_OUTPUT_FORMAT)
+
+
+def _is_status(value: str) -> bool:
+    """Check that status code is an integer or null."""
+    return value == "null" or value.lstrip("-").isdigit()
+
+
+def check_csv_file(
+    filename: str, file_index: dict[str, str], used_checksum: str
+) -> list[str]:
+    """
+    Check CSV file before populating the metadata.
+
+    The rows are streamed in one pass, and all problems are reported:
+    missing columns, rows with a wrong number of values, empty event and
+    agent identifiers, unknown event types, invalid digest statuses and
+    timestamps, representations without the counterpart object, and
+    object files missing from the source path.
+
+    :param filename: CSV file to check
+    :param file_index: Files in source path, see :func:`build_file_index`
+    :param used_checksum: Checksum algorithm of the objects
+    :returns: Problems found, with their line numbers
+    """
+    problems = []
+    missing_files = set()
+
+    with open(filename, "rt", encoding="utf-8") as infile:
+        csvreader = csv.reader(infile, delimiter=',', quotechar='"')
+        header = next(csvreader, [])
+        missing = [column for column in REQUIRED_COLUMNS
+                   if column not in header]
+        if missing:
+            return [f"Missing columns: {', '.join(missing)}"]
+
+        for row in csvreader:
+            if not row:
+                continue
+            prefix = f"Line {csvreader.line_num}:"
+            if len(row) != len(header):
+                problems.append(f"{prefix} {len(row)} values, expected "
+                                f"{len(header)}")
+                continue
+            csv_row = dict(zip(header, row))
+
+            for column in ("event-id", "agent-id"):
+                if not csv_row[column]:
+                    problems.append(f"{prefix} Empty value in column "
+                                    f"{column}")
+            if csv_row["event"] not in EVENT_TYPES:
+                problems.append(
+                    f"{prefix} Unknown event type '{csv_row['event']}'")
+            if not _is_status(csv_row.get("tiiviste-status", "1")):
+                problems.append(
+                    f"{prefix} Invalid digest status "
+                    f"'{csv_row['tiiviste-status']}'")
+
+            timestamp_columns = ["event-aika-alku"]
+            if csv_row["event-aika-loppu"].lower() != "null":
+                timestamp_columns.append("event-aika-loppu")
+            if csv_row["event"] == EVENT_DIGEST \
+                    and csv_row["event-tulos"] == "success":
+                timestamp_columns.append("tiiviste-aika")
+            for column in timestamp_columns:
+                try:
+                    convert_timestamp(csv_row[column])
+                except ValueError:
+                    problems.append(f"{prefix} Invalid timestamp "
+                                    f"'{csv_row[column]}' in column {column}")
+
+            is_object = (
+                csv_row["tiiviste-tyyppi"].lower() == used_checksum.lower()
+                and csv_row.get("tiiviste-status", "1") == "1")
+            is_representation = \
+                csv_row["poo-vastinpari-obj-status"] in ["-1", "-3"]
+            if is_representation \
+                    and csv_row["poo-vastinpari-obj-uuid"] in ["", "null"]:
+                problems.append(f"{prefix} Representation without "
+                                "counterpart object")
+            object_name = csv_row["objekti-nimi"]
+            if (is_object or is_representation) \
+                    and object_name not in file_index \
+                    and object_name not in missing_files:
+                missing_files.add(object_name)
+                problems.append(
+                    f"{prefix} Digital object {object_name} was not found")
+
+    return problems
+
+
+class _CsvRow(Mapping):
+    """One row of CSV columns, without copying the values."""
+
+    __slots__ = ("_columns", "_index")
+
+    def __init__(self, columns: dict[str, list], index: int) -> None:
+        self._columns = columns
+        self._index = index
+
+    def __getitem__(self, key: str) -> str | None:
+        return self._columns[key][self._index]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._columns)
+
+    def __len__(self) -> int:
+        return len(self._columns)
+
+
+def build_file_index(source_path: str) -> dict[str, str]:
+    """
+    Index the files in source path by file name.
+
+    Walks the source path once. If there are several files with the
+    same name, the first one found by :func:`os.walk` is indexed, as in
+    :meth:`PremisObjectMusicArchive.find_path`.
+
+    :param source_path: Source data path
+    :returns: File paths relative to source path by file name
+    """
+    file_index = {}
+    for root, _, files in os.walk(source_path):
+        for filename in files:
+            if filename not in file_index:
+                file_index[filename] = os.path.relpath(
+                    os.path.join(root, filename), source_path)
+    return file_index
+
+
 class SipMetadataMusicArchive(SipMetadata):
     """
     Music Archive specific PREMIS Metadata handler for a SIP to be compiled.
     """
 
-    def populate(self, source_path: str, config: Config) -> None:
+    def __init__(self) -> None:
+        """Initialize SIP PREMIS handler."""
+        super().__init__()
+        # Files in source paths by file name, see build_file_index. Kept
+        # from checking the source until it is populated.
+        self._file_indexes: dict[str, dict[str, str]] = {}
+
+    def _file_index(self, source_path: str) -> dict[str, str]:
+        """Index the files in source path once, see
+        :func:`build_file_index`.
+
+        :param source_path: Source data path
+        :returns: File paths relative to source path by file name
         """
-        Populate a CSV file to PREMIS dicts.
-        The CSV file must be in the root directory of source path as it is
-        not actual digital object in the content.
+        if source_path not in self._file_indexes:
+            self._file_indexes[source_path] = build_file_index(source_path)
+        return self._file_indexes[source_path]
+
+    @staticmethod
+    def _csv_file(source_path: str, config: Config) -> str:
+        """
+        Find the CSV file in the root directory of source path.
 
         :param source_path: Source data path
         :param config: Basic configuration
+        :raises: OSError if CSV file was not found.
         """
         try:
-            filename = glob.glob(
+            return glob.glob(
                 os.path.join(
                     source_path, f"*{config.csv_ending}"))[0]
-        except KeyError:
-            raise OSError("CSV metadata file was not found!") from None
+        except IndexError:
+            raise OSError(
+                f"CSV metadata file was not found in {source_path}!"
+            ) from None
+
+    def check_source(self, source_path: str, config: Config) -> list[str]:
+        """
+        Check the CSV file, see :func:`check_csv_file`.
+
+        :param source_path: Source data path
+        :param config: Basic configuration
+        :returns: Problems found in the CSV file
+        """
+        return check_csv_file(self._csv_file(source_path, config),
+                              self._file_index(source_path),
+                              config.used_checksum)
+
+    def populate(self, source_path: str, config: Config) -> None:
+        """
+        Populate a CSV file to PREMIS dicts.
+        The CSV file must be in the root directory of source path as it is
+        not actual digital object in the content. The file index of the
+        source path is dropped afterwards, so that it is not copied to
+        the parts of a partitioned SIP.
+
+        :param source_path: Source data path
+        :param config: Basic configuration
+        """
+        filename = self._csv_file(source_path, config)
 
         self.objid = os.path.split(filename)[1].replace(config.csv_ending, "")
         self.content_id = self.objid
 
-        for csv_row in read_csv_file(filename):
-            self.add_premis_metadata(csv_row, source_path, config)
+        try:
+            self.add_premis_metadata_columns(
+                read_csv_columns(filename), source_path, config)
+        finally:
+            self._file_indexes.pop(source_path, None)
 
     def add_premis_metadata(
-        self, csv_row: dict[str, str], source_path: str, config: Config
+        self, csv_row: Mapping[str, str], source_path: str, config: Config
     ) -> None:
         """Add premis metadata from single row of CSV metadata / dictionary
 
@@ -143,6 +405,131 @@ class SipMetadataMusicArchive(SipMetadata):
                 value=FILE_USE_FORENSIC_ANALYSIS,
             )
 
+    def add_premis_metadata_columns(
+        self,
+        columns: dict[str, list[str | None]],
+        source_path: str,
+        config: Config,
+    ) -> None:
+        """Add premis metadata from all rows of CSV metadata as columns.
+
+        The result is the same as with :meth:`add_premis_metadata` for
+        each row, but the objects, events, agents and linkings are built
+        in separate passes over the rows. The source path is walked only
+        once, and the events, agents and linkings are created only once
+        for each identifier.
+
+        :param columns: CSV rows as columns, see :func:`read_csv_columns`
+        :param source_path: Source data path
+        :param config: Basic configuration
+        """
+        row_count = len(next(iter(columns.values()), []))
+        rows = [_CsvRow(columns, index) for index in range(row_count)]
+        self._add_csv_objects(rows, source_path, config)
+        self._add_csv_events(rows)
+        for csv_row in rows:
+            if "agent-" + csv_row["agent-id"] not in self.premis_agents:
+                self.add_agent(PremisAgentMusicArchive(csv_row))
+        self._add_csv_linkings(rows)
+
+    def _add_csv_objects(
+        self,
+        rows: list[_CsvRow],
+        source_path: str,
+        config: Config,
+    ) -> None:
+        """Add objects, representations and their attributes of CSV rows.
+
+        :param rows: CSV rows
+        :param source_path: Source data path
+        :param config: Basic configuration
+        """
+        file_index = self._file_index(source_path)
+        used_checksum = config.used_checksum.lower()
+        for csv_row in rows:
+            p_object = PremisObjectMusicArchive(csv_row)
+            if p_object.message_digest_algorithm.lower() == used_checksum \
+                    and p_object.digest_valid:
+                p_object.find_path(source_path, file_index)
+                self.add_object(p_object)
+                if p_object.alt_identifier_type \
+                        and p_object.alt_identifier_value:
+                    self.add_object_alt_id(
+                        obj_identifier=p_object.identifier,
+                        alt_identifier_type=p_object.alt_identifier_type,
+                        alt_identifier=p_object.alt_identifier_value,
+                    )
+            if csv_row["poo-vastinpari-obj-status"] in ["-1", "-3"]:
+                r_object = PremisRepresentationMusicArchive(csv_row)
+                r_object.find_target_path(source_path, file_index)
+                self.add_digiprov_representation_object(r_object)
+                if r_object.alt_identifier_type \
+                        and r_object.alt_identifier_value:
+                    self.add_object_alt_id(
+                        obj_identifier=r_object.identifier,
+                        alt_identifier_type=r_object.alt_identifier_type,
+                        alt_identifier=r_object.alt_identifier_value,
+                    )
+            if (
+                csv_row["event"] == EVENT_CONVERSION
+                and csv_row["poo-sip-obj-x-rooli-selite"]
+                == FILE_OUTCOME_SOURCE
+            ):
+                self.add_object_attribute(
+                    obj_identifier=p_object.identifier,
+                    name="use",
+                    value=FILE_USE_FORENSIC_ANALYSIS,
+                )
+
+    def _add_csv_events(self, rows: list[_CsvRow]) -> None:
+        """Add events of CSV rows with their detail information.
+
+        The event datetimes of all rows are converted at once, so that
+        an invalid timestamp in any row is an error as when adding the
+        rows one by one. Repeated timestamps are converted only once, see
+        :func:`convert_timestamp`.
+
+        :param rows: CSV rows
+        """
+        event_datetimes = PremisEventMusicArchive.event_datetimes(
+            [csv_row["event-aika-alku"] for csv_row in rows],
+            [csv_row["event-aika-loppu"] for csv_row in rows])
+        for (csv_row, event_datetime) in zip(rows, event_datetimes):
+            if csv_row["event-id"] not in self.premis_events:
+                self.add_event(PremisEventMusicArchive(
+                    csv_row, event_datetime=event_datetime))
+            self.premis_events[csv_row["event-id"]].add_detail_info(csv_row)
+
+    def _add_csv_linkings(self, rows: list[_CsvRow]) -> None:
+        """Add linkings of CSV rows.
+
+        The linked objects of each linking are tracked in a set, instead
+        of searching the object links for each row.
+
+        :param rows: CSV rows
+        """
+        linked_objects = {}
+        for csv_row in rows:
+            event_id = csv_row["event-id"]
+            if event_id not in self.premis_linkings:
+                self.premis_linkings[event_id] = \
+                    PremisLinkingMusicArchive(csv_row)
+            p_linking = self.premis_linkings[event_id]
+            if event_id not in linked_objects:
+                linked_objects[event_id] = {
+                    link["linking_object"] for link in p_linking.object_links}
+            linked = linked_objects[event_id]
+            for (identifier, object_role) in p_linking.linked_objects(
+                    csv_row["objekti-uuid"],
+                    csv_row["poo-sip-obj-x-rooli-selite"]):
+                if identifier is not None and identifier not in linked:
+                    linked.add(identifier)
+                    p_linking.object_links.append(
+                        {"linking_object": identifier,
+                         "object_role": object_role})
+            p_linking.add_agent_link("agent-" + csv_row["agent-id"],
+                                     csv_row["agent-rooli"])
+
     def descriptive_metadata_sources(
         self, desc_paths: list[str], config: Config
     ) -> Iterator[tuple[str, str]]:
@@ -175,104 +562,131 @@ class SipMetadataMusicArchive(SipMetadata):
                 f"*{config.csv_ending}",
                 ".[!/]*", "*/.[!/]*")  # Exclude all hidden files/directories
 
-    def scrape_objects(self, source_path: str, validation: bool) -> None:
-        """To scrape objects and store their scraper results.
-
-        :param source_path: Source path for the objects.
+    @staticmethod
+    def scrape_file(
+        filepath: str,
+        mimetype: str | None,
+        version: str | None,
+        validation: bool,
+    ) -> dict:
+        """Scrape one file.
+
+        Broken HTML files are handled as plain text. DV files are
+        analyzed with DVAnalyzer, and its XML output is returned in the
+        result as "dvanalyzer_output" for :meth:`add_scraper_result`.
+
+        :param filepath: Path to the file
+        :param mimetype: Predefined MIME type or None
+        :param version: Predefined file format version or None
         :param validation: Whether to enable well_formed check or not.
+        :returns: Scraper result
         """
-        for obj_identifier, obj in self.premis_objects.items():
-            scraper = Scraper(
-                filename=os.path.join(source_path, obj.filepath),
-                mimetype=obj.format_name,
-                version=obj.format_version,
+        scraper = Scraper(
+            filename=filepath,
+            mimetype=mimetype,
+            version=version,
+        )
+        scraper.scrape(check_wellformed=validation)
+        result_mimetype = scraper.mimetype
+        result_version = scraper.version
+        # Special case for musicarchive
+        if result_mimetype == "text/html":
+            if validation is False:
+                # If validation was disabled, we'll enable for this
+                # special case handling.
+                scraper = Scraper(
+                    filename=filepath,
+                    mimetype=mimetype,
+                    version=version,
+                )
+                scraper.scrape(check_wellformed=True)
+            if scraper.well_formed is False:
+                result_mimetype = "text/plain; alt-format=text/html"
+                result_version = UNAP
+
+        scraper_result = {
+            "streams": scraper.streams,
+            "info": scraper.info,
+            "mimetype": result_mimetype,
+            "version": result_version,
+            "checksum": scraper.checksum().lower(),
+            "grade": scraper.grade(),
+        }
+
+        if result_mimetype == "video/dv":
+            scraper_result["dvanalyzer_output"] = run(
+                [
+                    "dvanalyzer",
+                    filepath,
+                    "--XML",
+                    "--verbosity=5",
+                ],
+                capture_output=True,
+                check=True,
+            ).stdout
+
+        return scraper_result
+
+    def add_scraper_result(
+        self, obj_identifier: str, scraper_result: dict
+    ) -> None:
+        """Store scraper result of an object. For DV files, add a
+        forensic feature analysis event with the DVAnalyzer output.
+
+        :param obj_identifier: Identifier of the scraped object.
+        :param scraper_result: Result from :meth:`scrape_file`.
+        """
+        analyzer_output = scraper_result.pop("dvanalyzer_output", None)
+        if analyzer_output is not None:
+            element = ET.fromstring(analyzer_output)
+
+            event_id = str(uuid4())
+            event = PremisEvent(
+                {
+                    "event_identifier_type": "UUID",
+                    "event_identifier_value": event_id,
+                    "event_type": EVENT_FORENSIC,
+                    "event_outcome": "success",
+                    "event_datetime": datetime.datetime.now(
+                        datetime.timezone.utc
+                    ).isoformat(),
+                    "event_detail": (
+                        "Analyzing DV stream frame-by-frame "
+                        "for structural errors using the DVAnalyzer "
+                        "quality control tool"
+                    ),
+                    "event_outcome_detail": "DVAnalyzer output as XML",
+                    "event_outcome_detail_extension": element,
+                }
             )
-            scraper.scrape(check_wellformed=validation)
-            mimetype = scraper.mimetype
-            version = scraper.version
-            # Special case for musicarchive
-            if mimetype == "text/html":
-                if validation is False:
-                    # If validation was disabled, we'll enable for this
-                    # special case handling.
-                    scraper = Scraper(
-                        filename=os.path.join(source_path, obj.filepath),
-                        mimetype=obj.format_name,
-                        version=obj.format_version,
-                    )
-                    scraper.scrape(check_wellformed=True)
-                if scraper.well_formed is False:
-                    mimetype = "text/plain; alt-format=text/html"
-                    version = UNAP
-
-            if mimetype == "video/dv":
-                analyzer_output = run(
-                    [
-                        "dvanalyzer",
-                        os.path.join(source_path, obj.filepath),
-                        "--XML",
-                        "--verbosity=5",
-                    ],
-                    capture_output=True,
-                    check=True,
-                ).stdout
-                element = ET.fromstring(analyzer_output)
-
-                event_id = str(uuid4())
-                event = PremisEvent(
+
+            if "dvanalyzer" not in self.premis_agents:
+                analyzer_version = element.xpath("//version/text()")[0]
+                agent = PremisAgent(
                     {
-                        "event_identifier_type": "UUID",
-                        "event_identifier_value": event_id,
-                        "event_type": EVENT_FORENSIC,
-                        "event_outcome": "success",
-                        "event_datetime": datetime.datetime.now(
-                            datetime.timezone.utc
-                        ).isoformat(),
-                        "event_detail": (
-                            "Analyzing DV stream frame-by-frame "
-                            "for structural errors using the DVAnalyzer "
-                            "quality control tool"
-                        ),
-                        "event_outcome_detail": "DVAnalyzer output as XML",
-                        "event_outcome_detail_extension": element,
+                        "agent_type": "software",
+                        "agent_name": f"dvanalyzer-{analyzer_version}",
+                        "agent_identifier_type": "local",
+                        "agent_identifier_value": "dvanalyzer",
                     }
                 )
+                self.add_agent(agent)
+            else:
+                agent = self.premis_agents["dvanalyzer"]
+
+            link = PremisLinking()
+            link.identifier = event_id
+
+            self.add_event(event)
+            self.add_linking(
+                p_linking=link,
+                object_id=obj_identifier,
+                object_role="target",
+                agent_id=agent.identifier,
+                agent_role="executing program",
+            )
 
-                if "dvanalyzer" not in self.premis_agents:
-                    analyzer_version = element.xpath("//version/text()")[0]
-                    agent = PremisAgent(
-                        {
-                            "agent_type": "software",
-                            "agent_name": f"dvanalyzer-{analyzer_version}",
-                            "agent_identifier_type": "local",
-                            "agent_identifier_value": "dvanalyzer",
-                        }
-                    )
-                    self.add_agent(agent)
-                else:
-                    agent = self.premis_agents["dvanalyzer"]
-
-                link = PremisLinking()
-                link.identifier = event_id
-
-                self.add_event(event)
-                self.add_linking(
-                    p_linking=link,
-                    object_id=obj_identifier,
-                    object_role="target",
-                    agent_id=agent.identifier,
-                    agent_role="executing program",
-                )
-
-            scraper_result = {
-                "streams": scraper.streams,
-                "info": scraper.info,
-                "mimetype": mimetype,
-                "version": version,
-                "checksum": scraper.checksum().lower(),
-                "grade": scraper.grade(),
-            }
-            self.scraper_results[obj_identifier] = scraper_result
+        super().add_scraper_result(obj_identifier, scraper_result)
 
     def _append_alternative_ids(self, mets: ET._Element) -> ET._Element:
         """
@@ -369,7 +783,7 @@ def set_format_plaintext(format_element: ET._Element, new_value: str) -> None:
 class PremisObjectMusicArchive(PremisObject):
     """Music Archive specific PREMIS Object handler."""
 
-    def __init__(self, csv_row: dict[str, str]) -> None:
+    def __init__(self, csv_row: Mapping[str, str]) -> None:
         """Initialize.
 
         :param csv_row: One row from a CSV file.
@@ -389,13 +803,24 @@ class PremisObjectMusicArchive(PremisObject):
         }
         super().__init__(metadata)
 
-    def find_path(self, source_path: str) -> None:
+    def find_path(
+        self, source_path: str, file_index: dict[str, str] | None = None
+    ) -> None:
         """
         Find file path to object.
 
         :param source_path: Source data path.
+        :param file_index: Files in source path, see
+            :func:`build_file_index`. If not given, source path is walked.
         :raises: IOError if digital object file was not found.
         """
+        if file_index is not None:
+            if self.original_name not in file_index:
+                raise OSError("Digital object %s was not found!"
+                              "" % (self.original_name))
+            self.filepath = file_index[self.original_name]
+            return
+
         found = False
         for root, _, files in os.walk(source_path):
             if self.original_name in files:
@@ -415,29 +840,29 @@ class PremisEventMusicArchive(PremisEvent):
                    "pon-korvattu-nimi", "objekti-nimi", "sip-tunniste",
                    "event-selite"]
 
-    time_parse_format = "%Y-%m-%d %H:%M:%S"
-    time_output_format = "%Y-%m-%dT%H:%M:%S"
+    time_parse_format = TIME_PARSE_FORMAT
+    time_output_format = TIME_OUTPUT_FORMAT
 
-    def __init__(self, csv_row: dict[str, str]) -> None:
+    def __init__(
+        self,
+        csv_row: Mapping[str, str],
+        event_datetime: str | None = None,
+    ) -> None:
         """Initialize.
 
         :param csv_row: One row from a CSV file.
+        :param event_datetime: Event datetime converted with
+            :meth:`event_datetimes`. If not given, it is converted from
+            the row.
         """
         self._detail_info = []
+        # Details as tuples, to find the existing details in constant time
+        self._detail_keys = set()
 
-        start_time = datetime.datetime.strptime(
-            csv_row["event-aika-alku"], self.time_parse_format
-            ).strftime(self.time_output_format)
-        end_time = None
-        if csv_row["event-aika-loppu"].lower() != "null" and \
-                csv_row["event-aika-loppu"] != csv_row["event-aika-alku"]:
-            end_time = datetime.datetime.strptime(
-                csv_row["event-aika-loppu"], self.time_parse_format
-                ).strftime(self.time_output_format)
-
-        event_datetime = start_time
-        if end_time is not None:
-            event_datetime = f"{start_time}/{end_time}"
+        if event_datetime is None:
+            event_datetime = self.event_datetimes(
+                [csv_row["event-aika-alku"]], [csv_row["event-aika-loppu"]]
+            )[0]
 
         metadata = {
             "event_identifier_type": "local",
@@ -450,6 +875,27 @@ class PremisEventMusicArchive(PremisEvent):
         self.remove_metadata("event_detail")
         self.remove_metadata("event_outcome_detail")
 
+    @staticmethod
+    def event_datetimes(
+        start_times: Iterable[str], end_times: Iterable[str]
+    ) -> list[str]:
+        """
+        Convert start and end times of events to event datetimes, see
+        :func:`convert_timestamp`.
+
+        :param start_times: Start times from CSV rows
+        :param end_times: End times from CSV rows, or "null"
+        :returns: Event datetimes, either a start time or a time interval
+        """
+        event_datetimes = []
+        for (start_time, end_time) in zip(start_times, end_times):
+            event_datetime = convert_timestamp(start_time)
+            if end_time.lower() != "null" and end_time != start_time:
+                event_datetime = \
+                    f"{event_datetime}/{convert_timestamp(end_time)}"
+            event_datetimes.append(event_datetime)
+        return event_datetimes
+
     def add_detail_info(self, csv_row):
         """
         Add detailed information.
@@ -459,9 +905,10 @@ class PremisEventMusicArchive(PremisEvent):
 
         :csv_row: One row from a CSV file.
         """
-        detail = {key: csv_row[key] for key in self.DETAIL_KEYS}
-        if detail not in self._detail_info:
-            self._detail_info.append(detail)
+        detail_key = tuple(csv_row[key] for key in self.DETAIL_KEYS)
+        if detail_key not in self._detail_keys:
+            self._detail_keys.add(detail_key)
+            self._detail_info.append(dict(zip(self.DETAIL_KEYS, detail_key)))
 
     @property
     def event_detail(self) -> str:
@@ -522,9 +969,7 @@ class PremisEventMusicArchive(PremisEvent):
                 "".format(out, self._detail_info[0]["tiiviste-tyyppi"])
             )
             for info in self._detail_info:
-                checksum_time = datetime.datetime.strptime(
-                    info["tiiviste-aika"], self.time_parse_format
-                ).strftime(self.time_output_format)
+                checksum_time = convert_timestamp(info["tiiviste-aika"])
                 out = "{}\n{}: {} (timestamp: {})".format(
                     out, info["objekti-nimi"], info["tiiviste"], checksum_time
                 )
@@ -580,7 +1025,7 @@ class PremisEventMusicArchive(PremisEvent):
 class PremisAgentMusicArchive(PremisAgent):
     """Music Archive specific PREMIS Agent handler."""
 
-    def __init__(self, csv_row: dict[str, str]) -> None:
+    def __init__(self, csv_row: Mapping[str, str]) -> None:
         """Initialize.
 
         :param csv_row: One row from a CSV file.
@@ -597,7 +1042,7 @@ class PremisAgentMusicArchive(PremisAgent):
 class PremisLinkingMusicArchive(PremisLinking):
     """Music Archive specific PREMIS Linking handler."""
 
-    def __init__(self, csv_row: dict[str, str]) -> None:
+    def __init__(self, csv_row: Mapping[str, str]) -> None:
         """Initialize.
 
         :param csv_row: One row from a CSV file.
@@ -611,26 +1056,43 @@ class PremisLinkingMusicArchive(PremisLinking):
         self.counterpart_obj_name = csv_row["poo-vastinpari-obj-nimi"]
         self.counterpart_obj_status = csv_row["poo-vastinpari-obj-status"]
 
-    def add_object_link(self, identifier: str, object_role: str) -> None:
+    def linked_objects(
+        self, identifier: str, object_role: str
+    ) -> list[tuple[str, str]]:
         """
-        Add object to linking. Skip object adding if event type is
-        'information package creation'.
+        Objects to link for an object. No objects are linked if event type
+        is 'information package creation'. The counterpart object is linked
+        as a source.
 
         :param identifier: PREMIS Object identifier
         :param object_role: Object role in event.
+        :returns: Identifiers and roles of the objects to link
         """
         if self._event_type == EVENT_CREATION:
-            return
+            return []
+        links = []
         # -1 and -3 are the two legitimate values.
         if self.counterpart_obj_status in ["-1", "-3"]:
-            super().add_object_link(self.counterpart_obj_uuid, "source")
-        super().add_object_link(identifier, object_role)
+            links.append((self.counterpart_obj_uuid, "source"))
+        links.append((identifier, object_role))
+        return links
+
+    def add_object_link(self, identifier: str, object_role: str) -> None:
+        """
+        Add object to linking, see :meth:`linked_objects`.
+
+        :param identifier: PREMIS Object identifier
+        :param object_role: Object role in event.
+        """
+        for (link_identifier, link_role) in self.linked_objects(
+                identifier, object_role):
+            super().add_object_link(link_identifier, link_role)
 
 
 class PremisRepresentationMusicArchive(PremisObject):
     """Music Archive specific PREMIS Representation handler."""
 
-    def __init__(self, csv_row: dict[str, str]) -> None:
+    def __init__(self, csv_row: Mapping[str, str]) -> None:
         """Initialize.
 
         :param csv_row: One row from a CSV file.
@@ -646,12 +1108,23 @@ class PremisRepresentationMusicArchive(PremisObject):
         }
         super().__init__(metadata)
 
-    def find_target_path(self, source_path: str) -> None:
+    def find_target_path(
+        self, source_path: str, file_index: dict[str, str] | None = None
+    ) -> None:
         """
         Find file path to outcome object.
 
         :param source_path: Source data path.
+        :param file_index: Files in source path, see
+            :func:`build_file_index`. If not given, source path is walked.
         """
+        if file_index is not None:
+            if self.outcome_filename not in file_index:
+                raise OSError(
+                    f"Digital object {self.outcome_filename} was not found!")
+            self.filepath = file_index[self.outcome_filename]
+            return
+
         for root, _, files in os.walk(source_path):
             if self.outcome_filename in files:
                 target_path = os.path.relpath(os.path.join(
@@ -1,11 +1,9 @@
 """Adaptor for Postal Museum."""
-import os
-import fnmatch
 from collections.abc import Iterator
-from uuid import uuid4
 import xml_helpers.utils as h
 import lxml.etree as ET
 from dpres_sip_compiler.base_adaptor import SipMetadata, PremisObject
+from dpres_sip_compiler.file_collector import collect_files
 from dpres_sip_compiler.config import Config
 
 
@@ -14,20 +12,17 @@ class SipMetadataPostalMuseum(SipMetadata):
 
     def populate(self, source_path: str, config: Config) -> None:
         """Recursively collect all file paths from given path."""
-        files = []
-        files += [os.path.join(looproot, filename)
-                  for looproot, _, filenames in os.walk(source_path)
-                  for filename in filenames
-                  if fnmatch.fnmatch(filename, "*")]
-
-        for filepath in files:
+        for (filepath, stat_result) in collect_files(
+                source_path, self.exclude_files(config)):
             metadata = {
                 "object_identifier_type": "UUID",
-                "object_identifier_value": str(uuid4())
+                "object_identifier_value": self.new_object_identifier(
+                    source_path, filepath, config)
             }
             p_object = PremisObject(metadata=metadata)
             # Use relative path for the objects
-            p_object.filepath = os.path.relpath(filepath, source_path)
+            p_object.filepath = filepath
+            p_object.stat_result = stat_result
             self.add_object(p_object)
 
     def descriptive_metadata_sources(
@@ -5,10 +5,36 @@ Adaptors can overwrite the required methods and properties as needed.
 """
 from __future__ import annotations
 
+import contextlib
 import os
-from typing import TYPE_CHECKING, Literal, overload
-
-from file_scraper.scraper import Scraper
+from typing import TYPE_CHECKING, BinaryIO, Literal, overload
+from uuid import uuid4
+
+from dpres_sip_compiler.adaptor_list import (
+    entry_point_adaptor,
+    import_adaptor,
+)
+from dpres_sip_compiler.constants import (
+    EVENT_MIGRATION,
+    EVENT_NORMALIZATION,
+    FILE_OUTCOME_SOURCE,
+    FILE_USE_FORENSIC_ANALYSIS,
+    FILE_USE_NO_VALIDATION,
+)
+from dpres_sip_compiler.identifiers import (
+    deterministic_identifier,
+    file_sha256,
+)
+from dpres_sip_compiler.prefetch import Prefetcher
+from dpres_sip_compiler.scraping import (
+    Job,
+    JobFailure,
+    dispatch_order,
+    guess_mimetype,
+    is_heavy,
+    run_jobs,
+    scrape_job,
+)
 
 if TYPE_CHECKING:
     from collections.abc import Iterator
@@ -16,6 +42,10 @@ if TYPE_CHECKING:
     from lxml import etree as ET
 
     from dpres_sip_compiler.config import Config
+    from dpres_sip_compiler.timing import TimingReport
+
+# Maximum number of source metadata problems in the error message
+MAX_REPORTED_PROBLEMS = 100
 
 
 def build_sip_metadata(adaptor_dict: dict,
@@ -30,8 +60,18 @@ def build_sip_metadata(adaptor_dict: dict,
     :param source_path: Source data path
     :param config: Basic configuration
     :returns: SIP metadata object
+    :raises: ValueError if problems are found in the source metadata
     """
     sip_meta = sip_metadata_class(adaptor_dict, config)()
+    problems = sip_meta.check_source(source_path, config)
+    if problems:
+        reported = problems[:MAX_REPORTED_PROBLEMS]
+        if len(problems) > len(reported):
+            reported.append(f"... and {len(problems) - len(reported)} "
+                            "more, see the check command")
+        raise ValueError(
+            f"Found {len(problems)} problems in the source metadata:\n"
+            + "\n".join(reported))
     sip_meta.populate(source_path, config)
 
     if content_id:
@@ -42,21 +82,30 @@ def build_sip_metadata(adaptor_dict: dict,
     return sip_meta
 
 
-def sip_metadata_class(adaptor_dict: dict[str, type[SipMetadata]],
+def sip_metadata_class(adaptor_dict: dict[str, type[SipMetadata] | str],
                        config: Config) -> type[SipMetadata]:
     """Find metadata class for SIP based on configured adaptor.
 
+    Adaptors missing from the given dict are looked up from the
+    ``dpres_sip_compiler.adaptors`` entry point group. The adaptor
+    module is imported here, and the resolved class is cached.
+
     :param adaptor_dict: Dict of adaptor names and corresponding SIP
-        metadata classes.
+        metadata classes or their dotted paths.
     :param config: Basic configuration
     :returns: SIP metadata class
     """
-    if config.adaptor not in adaptor_dict:
+    adaptor = adaptor_dict.get(config.adaptor)
+    if isinstance(adaptor, str):
+        return import_adaptor(adaptor)
+    if adaptor is None:
+        adaptor = entry_point_adaptor(config.adaptor)
+    if adaptor is None:
         raise NotImplementedError(
             "Unsupported configuration! Maybe the adaptor name is incorrect "
             "in configuration file?")
 
-    return adaptor_dict[config.adaptor]
+    return adaptor
 
 
 class PremisObject:
@@ -69,6 +118,10 @@ class PremisObject:
         :param metadata: Metadata dict for object.
         """
         self.filepath = None  # File path to object
+        # Stat result of the file, if collected together with the path
+        self.stat_result: os.stat_result | None = None
+        # SHA-256 digest of the file, if calculated when populating
+        self.content_sha256: str | None = None
         self._metadata = metadata
         for key in [
             "object_identifier_type",
@@ -105,6 +158,10 @@ class PremisObject:
         :param attr: Attribute name
         :returns: Value for given attribute or None
         """
+        # Special attributes are looked up e.g. by pickle and copy before
+        # the metadata exists.
+        if attr.startswith("__"):
+            raise AttributeError(attr)
         return self._metadata.get(attr)
 
     @property
@@ -132,6 +189,17 @@ class PremisObject:
             return ""
         return None
 
+    def file_size(self, source_path: str) -> int:
+        """Size of the object file, from the collected stat result if
+        available.
+
+        :param source_path: Source data path
+        :returns: File size in bytes
+        """
+        if self.stat_result is not None:
+            return self.stat_result.st_size
+        return os.path.getsize(os.path.join(source_path, self.filepath))
+
     def remove_metadata(self, metadata_key: str) -> None:
         """Remove key from metadata."""
         self._metadata.pop(metadata_key, None)
@@ -189,6 +257,8 @@ class PremisEvent:
         :param attr: Attribute name
         :returns: Value for given attribute or None
         """
+        if attr.startswith("__"):
+            raise AttributeError(attr)
         return self._metadata.get(attr)
 
     @property
@@ -228,6 +298,8 @@ class PremisAgent:
         :param attr: Attribute name
         :returns: Value for given attribute or None
         """
+        if attr.startswith("__"):
+            raise AttributeError(attr)
         if attr in self._metadata:
             return self._metadata[attr]
 
@@ -323,14 +395,57 @@ class SipMetadata:
         self.premis_digiprov_representations = {}
         # To store scraper result.
         self.scraper_results = {}
+        # To store objects whose scraping was stopped, e.g. on timeout.
+        self.scrape_failures: dict[str, JobFailure] = {}
         # To enforce specific attributes to the digital object
         # regardless what other tools claim these values are.
         self.digital_object_attributes = {}
+        # SHA-256 digests of the files calculated for new object
+        # identifiers, until the objects are added.
+        self._content_digests: dict[str, str] = {}
+
+    def check_source(self, source_path: str, config: Config) -> list[str]:
+        """Check the source metadata before populating.
+
+        Adaptors reading metadata from the source path can report all
+        problems in it at once, before the metadata is populated and the
+        files are scraped.
+
+        :param source_path: Source data path
+        :param config: Basic configuration
+        :returns: Problems found in the source metadata
+        """
+        # pylint: disable=unused-argument
+        return []
 
     def populate(self, source_path, config):
         """Create metadata objects based on source path."""
         pass
 
+    def new_object_identifier(
+        self, source_path: str, filepath: str, config: Config
+    ) -> str:
+        """Identifier value for a new PREMIS object of a file.
+
+        A random UUID by default. If deterministic identifiers are enabled
+        in the configuration, a UUIDv5 based on the relative path and the
+        SHA-256 digest of the file, so that recompiling unchanged content
+        gives the same identifiers. The digest is then kept for the
+        object of the file when it is added, so that the file is not
+        hashed again e.g. when finding duplicates.
+
+        :param source_path: Source data path
+        :param filepath: File path relative to the source path
+        :param config: Basic configuration
+        :returns: Object identifier value
+        """
+        if not config.deterministic_identifiers:
+            return str(uuid4())
+        digest = file_sha256(os.path.join(source_path, filepath))
+        self._content_digests[filepath] = digest
+        return deterministic_identifier(
+            config.identifier_namespace, filepath, digest)
+
     def descriptive_metadata_sources(
         self,
         desc_paths: list[str],
@@ -360,34 +475,288 @@ class SipMetadata:
         """
         return ()
 
-    def scrape_objects(self, source_path: str, validation: bool) -> None:
+    @staticmethod
+    def scrape_file(
+        filepath: str,
+        mimetype: str | None,
+        version: str | None,
+        validation: bool,
+    ) -> dict:
+        """Scrape one file.
+
+        Run in worker processes when scraping in parallel, so the method
+        must not modify the SIP metadata, and the result must be
+        picklable. Use :meth:`add_scraper_result` for anything to be
+        added to the SIP metadata based on the result.
+
+        :param filepath: Path to the file
+        :param mimetype: Predefined MIME type or None
+        :param version: Predefined file format version or None
+        :param validation: Whether to enable well_formed check or not.
+        :returns: Scraper result
+        """
+        # pylint: disable=import-outside-toplevel
+        from file_scraper.scraper import Scraper
+
+        scraper = Scraper(
+            filename=filepath,
+            mimetype=mimetype,
+            version=version,
+        )
+        scraper.scrape(check_wellformed=validation)
+        return {
+            "streams": scraper.streams,
+            "info": scraper.info,
+            "mimetype": scraper.mimetype,
+            "version": scraper.version,
+            "checksum": scraper.checksum().lower(),
+            "grade": scraper.grade(),
+        }
+
+    def add_scraper_result(
+        self, obj_identifier: str, scraper_result: dict
+    ) -> None:
+        """Store scraper result of an object.
+
+        :param obj_identifier: Identifier of the scraped object.
+        :param scraper_result: Result from :meth:`scrape_file`.
+        """
+        self.scraper_results[obj_identifier] = scraper_result
+
+    def migration_source_objects(self) -> set[str]:
+        """Find source objects of migration and normalization events.
+
+        :returns: Identifiers of the source objects
+        """
+        sources = set()
+        for event in self.events:
+            if event.event_type not in (EVENT_MIGRATION, EVENT_NORMALIZATION):
+                continue
+            linking = self.premis_linkings.get(event.identifier)
+            if linking is None:
+                continue
+            sources.update(
+                object_link["linking_object"]
+                for object_link in linking.object_links
+                if object_link["object_role"] == FILE_OUTCOME_SOURCE)
+        return sources
+
+    def wellformed_check_plan(self, validation: bool) -> dict[str, bool]:
+        """Plan which objects need the well-formedness check in scraping.
+
+        Objects with the USE attribute for bit-level preservation, i.e.
+        no file format validation or a forensically analysed object, are
+        preserved regardless of their well-formedness. For them, only the
+        file format detection and metadata extraction are run. Sources of
+        migration and normalization events are always checked, as the
+        compiler decides their USE attribute from the scraping result.
+
+        :param validation: Whether to check well-formedness at all
+        :returns: Dict mapping object identifiers to whether their
+            well-formedness is checked
+        """
+        if not validation:
+            return dict.fromkeys(self.premis_objects, False)
+        sources = self.migration_source_objects()
+        return {
+            obj_identifier: (
+                obj_identifier in sources
+                or self.digital_object_attributes.get(
+                    obj_identifier, {}).get("use")
+                not in (FILE_USE_NO_VALIDATION, FILE_USE_FORENSIC_ANALYSIS))
+            for obj_identifier in self.premis_objects
+        }
+
+    def iter_scrape_objects(
+        self,
+        source_path: str,
+        validation: bool,
+        workers: int = 1,
+        trim_info: bool = False,
+        diagnostics: BinaryIO | None = None,
+        duplicates: dict[str, str] | None = None,
+        heavy_workers: int | None = None,
+        config: Config | None = None,
+        timing: TimingReport | None = None,
+        prefetch_bytes: int = 0,
+    ) -> Iterator[str]:
+        """Scrape objects and yield their identifiers one by one as soon
+        as the scraper result is stored.
+
+        :param source_path: Source path for the objects.
+        :param validation: Whether to enable well_formed check or not.
+            Objects preserved at bit level are not checked, see
+            :meth:`wellformed_check_plan`.
+        :param workers: Number of worker processes for scraping.
+        :param trim_info: Whether to drop the verbose tool output from
+            the stored scraper info.
+        :param diagnostics: Binary file where the full scraper info of
+            each object is written as gzip compressed JSON lines, or None.
+        :param duplicates: Dict mapping identifiers of duplicate objects
+            to their representative objects, see
+            :func:`dpres_sip_compiler.dedup.find_duplicates`. Only the
+            representative is scraped, and its duplicates get a copy of
+            its scraper result.
+        :param heavy_workers: Maximum number of audio and video files
+            scraped at a time, by default the number of workers.
+        :param config: Basic configuration for the time and memory limits
+            of scraping a file. Files exceeding the limits are stopped,
+            recorded in :attr:`scrape_failures` and not yielded.
+        :param timing: Timing report to record the scraping durations of
+            the scraped files. Duplicates are not included.
+        :param prefetch_bytes: Byte budget for warming the next files to
+            be scraped in the background, or 0 for no prefetching.
+        :returns: Iterator of object identifiers. With one worker, in
+            object order, except that duplicates follow right after their
+            representative. With more workers, the largest files are
+            scraped first and the identifiers are yielded in the order the
+            scraping is finished.
+        """
+        duplicates = duplicates or {}
+        duplicates_of: dict[str, list[str]] = {}
+        for (obj_identifier, representative) in duplicates.items():
+            duplicates_of.setdefault(representative, []).append(
+                obj_identifier)
+        check_wellformed = self.wellformed_check_plan(validation)
+        # The result of a representative is copied to its duplicates
+        for (obj_identifier, representative) in duplicates.items():
+            if check_wellformed[obj_identifier]:
+                check_wellformed[representative] = True
+
+        supervised = config is not None and config.scrape_limits_enabled
+
+        def _job(obj_identifier: str, obj: PremisObject) -> Job:
+            """Scraping job of an object."""
+            (timeout, memory_limit) = (None, None)
+            if supervised:
+                (timeout, memory_limit) = config.scrape_limits(
+                    guess_mimetype(obj.filepath, obj.format_name))
+            return Job(
+                key=obj_identifier,
+                args=(self.scrape_file,
+                      (os.path.join(source_path, obj.filepath),
+                       obj.format_name, obj.format_version,
+                       check_wellformed[obj_identifier]),
+                      obj_identifier, trim_info, diagnostics is not None),
+                size=(obj.file_size(source_path)
+                      if workers > 1 or supervised else 0),
+                heavy=is_heavy(obj.filepath, obj.format_name),
+                timeout=timeout,
+                memory_limit=memory_limit)
+
+        jobs = [
+            _job(obj_identifier, obj)
+            for obj_identifier, obj in self.premis_objects.items()
+            if obj_identifier not in duplicates
+        ]
+        prefetcher = None
+        if prefetch_bytes:
+            # Files are warmed in the order the jobs are started
+            prefetcher = Prefetcher(
+                ((os.path.join(source_path,
+                               self.premis_objects[job.key].filepath),
+                  self.premis_objects[job.key].file_size(source_path))
+                 for job in dispatch_order(
+                     jobs, workers=workers, heavy_workers=heavy_workers,
+                     supervised=supervised)),
+                prefetch_bytes)
+
+        with prefetcher or contextlib.nullcontext():
+            for obj_identifier, job_result in run_jobs(
+                    scrape_job, jobs, workers=workers,
+                    heavy_workers=heavy_workers, supervised=supervised):
+                if prefetcher is not None:
+                    prefetcher.release(os.path.join(
+                        source_path,
+                        self.premis_objects[obj_identifier].filepath))
+                yield from self._store_job_result(
+                    obj_identifier, job_result, source_path,
+                    duplicates_of, diagnostics, timing)
+
+    def _store_job_result(
+        self,
+        obj_identifier: str,
+        job_result: tuple | JobFailure,
+        source_path: str,
+        duplicates_of: dict[str, list[str]],
+        diagnostics: BinaryIO | None,
+        timing: TimingReport | None,
+    ) -> Iterator[str]:
+        """Store the result of a scraping job of an object and copy it to
+        the duplicates of the object.
+
+        :returns: Iterator of the identifiers of the stored objects
+        """
+        if isinstance(job_result, JobFailure):
+            for failed in [obj_identifier] + duplicates_of.get(
+                    obj_identifier, []):
+                self.scrape_failures[failed] = job_result
+            return
+        (scraper_result, diagnostics_member, duration) = job_result
+        if diagnostics_member is not None:
+            diagnostics.write(diagnostics_member)
+        if timing is not None:
+            obj = self.premis_objects[obj_identifier]
+            timing.add(obj.filepath, scraper_result["mimetype"],
+                       obj.file_size(source_path), duration,
+                       scraper_result["info"])
+        # Copy before the result is stored, as adaptors may modify it
+        copies = [(duplicate, dict(scraper_result))
+                  for duplicate in duplicates_of.get(obj_identifier, [])]
+        self.add_scraper_result(obj_identifier, scraper_result)
+        yield obj_identifier
+        for (duplicate, duplicate_result) in copies:
+            self.add_scraper_result(duplicate, duplicate_result)
+            yield duplicate
+
+    def scrape_objects(
+        self,
+        source_path: str,
+        validation: bool,
+        workers: int = 1,
+        trim_info: bool = False,
+        diagnostics: BinaryIO | None = None,
+        duplicates: dict[str, str] | None = None,
+        heavy_workers: int | None = None,
+        config: Config | None = None,
+        timing: TimingReport | None = None,
+        prefetch_bytes: int = 0,
+    ) -> None:
         """To scrape objects and store their scraper results.
 
         :param source_path: Source path for the objects.
         :param validation: Whether to enable well_formed check or not.
-        """
-        for obj_identifier, obj in self.premis_objects.items():
-            scraper = Scraper(
-                filename=os.path.join(source_path, obj.filepath),
-                mimetype=obj.format_name,
-                version=obj.format_version,
-            )
-            scraper.scrape(check_wellformed=validation)
-            scraper_result = {
-                "streams": scraper.streams,
-                "info": scraper.info,
-                "mimetype": scraper.mimetype,
-                "version": scraper.version,
-                "checksum": scraper.checksum().lower(),
-                "grade": scraper.grade(),
-            }
-            self.scraper_results[obj_identifier] = scraper_result
+        :param workers: Number of worker processes for scraping.
+        :param trim_info: Whether to drop the verbose tool output from
+            the stored scraper info.
+        :param diagnostics: Binary file for the full scraper info, or None.
+        :param duplicates: Dict mapping duplicate objects to their
+            representative objects, or None.
+        :param heavy_workers: Maximum number of audio and video files
+            scraped at a time.
+        :param config: Basic configuration for the scraping limits.
+        :param timing: Timing report to record the scraping durations.
+        :param prefetch_bytes: Byte budget for prefetching files.
+        """
+        for _ in self.iter_scrape_objects(source_path, validation,
+                                          workers=workers,
+                                          trim_info=trim_info,
+                                          diagnostics=diagnostics,
+                                          duplicates=duplicates,
+                                          heavy_workers=heavy_workers,
+                                          config=config,
+                                          timing=timing,
+                                          prefetch_bytes=prefetch_bytes):
+            pass
 
     def add_object(self, p_object: PremisObject) -> None:
         """Add PREMIS Object. Do not add if already exists.
 
         :param p_object: PREMIS Object
         """
+        digest = self._content_digests.pop(p_object.filepath, None)
+        if p_object.content_sha256 is None:
+            p_object.content_sha256 = digest
         if p_object.identifier not in self.premis_objects:
             self.premis_objects[p_object.identifier] = p_object
 
@@ -1,15 +1,16 @@
 """
 Command line interface
 """
+import contextlib
 import json
-import os
 
 import click
 from dpres_sip_compiler.config import get_default_config_path
-from dpres_sip_compiler.compiler import compile_sip
-from dpres_sip_compiler.validate import count_files, scrape_files
-from dpres_sip_compiler.config import Config
-from file_scraper.defaults import UNACCEPTABLE
+from dpres_sip_compiler.config import load_config
+
+# The compiler, validation and file-scraper modules are slow to import.
+# They are imported in the commands, so that e.g. --help stays fast.
+# pylint: disable=import-outside-toplevel
 
 
 @click.group()
@@ -40,7 +41,8 @@ def cli():
 @click.option("--tar-file",
               type=click.Path(exists=False),
               metavar="<FILE>",
-              help="Target tar file for the SIP. Defaults to sip.tar",
+              help="Target tar file for the SIP. Use - to write the SIP "
+                   "to standard output. Defaults to sip.tar",
               default="sip.tar")
 @click.option("--config",
               type=click.Path(exists=True, file_okay=True,
@@ -52,8 +54,65 @@ def cli():
 @click.option("--validation/--no-validation", default=True,
               help="Validation / No validation of the files during "
                    "compilation. Defaults to validation with compilation.")
+@click.option("--progress/--no-progress", default=False,
+              help="Report packaging progress and throughput to stderr. "
+                   "Defaults to no progress.")
+@click.option("--max-sip-size", type=click.IntRange(min=1),
+              metavar="<BYTES>",
+              help="Split the content into several SIPs, so that the total "
+                   "size of the files in one SIP does not exceed the given "
+                   "number of bytes.")
+@click.option("--max-sip-objects", type=click.IntRange(min=1),
+              metavar="<COUNT>",
+              help="Split the content into several SIPs, so that one SIP "
+                   "contains at most the given number of files.")
+@click.option("--parallel-parts", type=click.IntRange(min=1), default=1,
+              help="Number of SIPs compiled in parallel when the content "
+                   "is split. Defaults to 1.")
+@click.option("--workers", type=click.IntRange(min=1), default=1,
+              help="Number of worker processes for scraping the files. "
+                   "Defaults to 1.")
+@click.option("--low-memory/--no-low-memory", default=False,
+              help="Store the scraper results on disk instead of memory, "
+                   "to compile very large SIPs. Defaults to memory.")
+@click.option("--diagnostics-file", type=click.Path(exists=False),
+              metavar="<FILE>",
+              help="Write the full file scraper output of each file to a "
+                   "gzip compressed JSON Lines file.")
+@click.option("--dedup/--no-dedup", default=False,
+              help="Scrape byte-identical files only once. Defaults to "
+                   "scraping every file.")
+@click.option("--hardlink-duplicates", is_flag=True, default=False,
+              help="Store byte-identical files only once in the tar file, "
+                   "as hard links. Use only if hard links are allowed in "
+                   "the SIP. Implies --dedup.")
+@click.option("--heavy-workers", type=click.IntRange(min=1),
+              help="Maximum number of audio and video files scraped at a "
+                   "time. Defaults to the number of workers.")
+@click.option("--timing-report", type=click.Path(exists=False),
+              metavar="<FILE>",
+              help="Write the scraping durations of the slowest files, and "
+                   "by MIME type and tool, to a JSON file.")
+@click.option("--profile", type=click.Path(exists=False),
+              metavar="<PREFIX>",
+              help="Profile the command and its worker processes, and "
+                   "write the profiles to <PREFIX>.pstats and "
+                   "<PREFIX>.collapsed.")
+@click.option("--metrics-file", type=click.Path(exists=False),
+              metavar="<FILE>",
+              help="Write Prometheus metrics of the run to a textfile, "
+                   "updated every 15 seconds.")
+@click.option("--prefetch", type=click.IntRange(min=0), default=0,
+              metavar="<MiB>",
+              help="Warm the next files to be scraped in the background, "
+                   "up to the given total size. Useful on network file "
+                   "systems. Defaults to no prefetching.")
 def compile_command(source_path, descriptive_metadata_path, content_id, sip_id,
-                    tar_file, config, validation):
+                    tar_file, config, validation, progress, max_sip_size,
+                    max_sip_objects, parallel_parts, workers, low_memory,
+                    diagnostics_file, dedup, hardlink_duplicates,
+                    heavy_workers, timing_report, profile, metrics_file,
+                    prefetch):
     """
     Compile Submission Information Package.
 
@@ -61,13 +120,65 @@ def compile_command(source_path, descriptive_metadata_path, content_id, sip_id,
 
     DESCRIPTIVE-METADATA-PATH: Zero or more file paths to descriptive metadata.
     """
-    compile_sip(source_path,
-                tar_file,
-                descriptive_metadata_paths=list(descriptive_metadata_path),
-                content_id=content_id,
-                sip_id=sip_id,
-                conf_file=config,
-                validation=validation)
+    from dpres_sip_compiler.compiler import compile_sip
+    from dpres_sip_compiler.profiling import profile_command
+
+    with profile_command(profile):
+        compile_sip(source_path,
+                    tar_file,
+                    descriptive_metadata_paths=list(
+                        descriptive_metadata_path),
+                    content_id=content_id,
+                    sip_id=sip_id,
+                    conf_file=config,
+                    validation=validation,
+                    progress=progress,
+                    max_sip_bytes=max_sip_size,
+                    max_sip_objects=max_sip_objects,
+                    parallel_parts=parallel_parts,
+                    workers=workers,
+                    low_memory=low_memory,
+                    diagnostics_file=diagnostics_file,
+                    dedup=dedup,
+                    hardlink_duplicates=hardlink_duplicates,
+                    heavy_workers=heavy_workers,
+                    timing_report=timing_report,
+                    metrics_file=metrics_file,
+                    prefetch_bytes=prefetch * 1024 * 1024)
+
+
+@cli.command(
+    name="check",
+)
+@click.argument('source-path',
+                type=click.Path(exists=True, file_okay=False,
+                                dir_okay=True))
+@click.option("--config",
+              type=click.Path(exists=True, file_okay=True,
+                              dir_okay=False),
+              metavar="<FILE>",
+              help="Path of the configuration file. Defaults to: "
+                   "%s" % get_default_config_path(),
+              default=get_default_config_path())
+def check_command(source_path, config):
+    """
+    Check source metadata before compiling.
+
+    Reports all problems found in the metadata of the source path, e.g.
+    the CSV file of Music Archive, without scraping the files.
+
+    SOURCE-PATH: Source path of the files to be packaged.
+    """
+    config = load_config(config)
+    try:
+        problems = config.adaptor_class().check_source(source_path, config)
+    except OSError as error:
+        raise click.ClickException(str(error)) from error
+    for problem in problems:
+        click.echo(problem)
+    if problems:
+        raise click.ClickException('%d problems found.' % len(problems))
+    click.echo('No problems found.')
 
 
 @cli.command(
@@ -97,58 +208,160 @@ def compile_command(source_path, descriptive_metadata_path, content_id, sip_id,
     default=get_default_config_path())
 @click.option("--stdout", is_flag=True,
               help="Print result metadata also to stdout")
-def validate(path, valid_output, invalid_output, summary, conf_file, stdout):
+@click.option("--workers", type=click.IntRange(min=1), default=1,
+              help="Number of worker processes scraping files. Defaults "
+                   "to 1.")
+@click.option("--max-files-per-worker", type=click.IntRange(min=1),
+              metavar="<NUMBER>",
+              help="Replace a worker process after it has scraped the given "
+                   "number of files, to release leaked memory.")
+@click.option("--max-worker-memory", type=click.IntRange(min=1),
+              metavar="<MiB>",
+              help="Replace a worker process when its resident memory "
+                   "exceeds the given size after a file.")
+@click.option("--timing-report", type=click.Path(exists=False),
+              metavar="<FILE>",
+              help="Write the scraping durations of the slowest files, and "
+                   "by MIME type and tool, to a JSON file.")
+@click.option("--profile", type=click.Path(exists=False),
+              metavar="<PREFIX>",
+              help="Profile the command and its worker processes, and "
+                   "write the profiles to <PREFIX>.pstats and "
+                   "<PREFIX>.collapsed.")
+@click.option("--metrics-file", type=click.Path(exists=False),
+              metavar="<FILE>",
+              help="Write Prometheus metrics of the run to a textfile, "
+                   "updated every 15 seconds.")
+@click.option("--prefetch", type=click.IntRange(min=0), default=0,
+              metavar="<MiB>",
+              help="Warm the next files to be scraped in the background, "
+                   "up to the given total size. Useful on network file "
+                   "systems. Defaults to no prefetching.")
+def validate(path, valid_output, invalid_output, summary, conf_file, stdout,
+             workers, max_files_per_worker, max_worker_memory,
+             timing_report, profile, metrics_file, prefetch):
     """
     Recursively validate files in given path.
 
     PATH: Root path to be scanned.
     """
-    config = Config(conf_file=conf_file)
-
-    click.echo('Starting file validation...')
-    total_files = count_files(path, config)
-    click.echo('Total number of files: %d.' % total_files)
-
-    invalid_files_count = 0
-    valid_files_count = 0
-
-    with click.progressbar(scrape_files(path, config),
-                           length=total_files,
-                           label='Validating files') as file_iterator:
-        for file_info in file_iterator:
-            if stdout:
-                click.echo(json.dumps(file_info))
-
-            if file_info['well-formed'] and file_info['grade'] != \
-                    UNACCEPTABLE:
-                output = valid_output
-                valid_files_count += 1
-            else:
-                output = invalid_output
-                invalid_files_count += 1
-            with open(output, 'a') as outfile:
-                json.dump(file_info, outfile)
-                outfile.write('\n')
-            if summary:
-                # Create summary information and write to own output
-                summary_info = {
-                    'path': file_info['path'],
-                    'filename': file_info['filename'],
-                    'timestamp': file_info['timestamp'],
-                    'MIME type': file_info['MIME type'],
-                    'version': file_info['version'],
-                    'grade': file_info['grade'],
-                    'well-formed': file_info['well-formed']
-                }
-                sum_output = '{}_summary{}'.format(*os.path.splitext(output))
-                with open(sum_output, 'a') as outfile:
-                    json.dump(summary_info, outfile)
-                    outfile.write('\n')
+    from dpres_sip_compiler.profiling import profile_command
+
+    with profile_command(profile):
+        _validate(path, valid_output, invalid_output, summary, conf_file,
+                  stdout, workers, max_files_per_worker, max_worker_memory,
+                  timing_report, metrics_file, prefetch)
+
+
+def _validate(path, valid_output, invalid_output, summary, conf_file, stdout,
+              workers, max_files_per_worker, max_worker_memory,
+              timing_report, metrics_file, prefetch):
+    """Validate files, see :func:`validate`."""
+    from dpres_sip_compiler.metrics import MetricsWriter
+    from dpres_sip_compiler.timing import TimingReport, combine_recorders
+    from dpres_sip_compiler.validate import (count_files, scrape_files,
+                                             write_result)
+
+    config = load_config(conf_file)
+
+    metrics = None
+    if metrics_file:
+        metrics = MetricsWriter(metrics_file, "validate", workers=workers)
+        metrics.start()
+
+    def _phase(name):
+        """Measure the duration of a validation phase in the metrics."""
+        if metrics is None:
+            return contextlib.nullcontext()
+        return metrics.phase(name)
+
+    try:
+        click.echo('Starting file validation...')
+        with _phase("collecting"):
+            total_files = count_files(path, config)
+        click.echo('Total number of files: %d.' % total_files)
+
+        invalid_files_count = 0
+        valid_files_count = 0
+        failures = []
+
+        max_worker_rss = None
+        if max_worker_memory:
+            max_worker_rss = max_worker_memory * 1024 * 1024
+        timing = TimingReport() if timing_report else None
+        file_infos = scrape_files(
+            path, config, workers=workers,
+            max_files_per_worker=max_files_per_worker,
+            max_worker_rss=max_worker_rss,
+            timing=combine_recorders(timing, metrics),
+            prefetch_bytes=prefetch * 1024 * 1024)
+
+        with _phase("scraping"), \
+                click.progressbar(file_infos,
+                                  length=total_files,
+                                  label='Validating files') as file_iterator:
+            for file_info in file_iterator:
+                if stdout:
+                    click.echo(json.dumps(file_info))
+
+                valid = write_result(file_info, valid_output, invalid_output,
+                                     summary)
+                if valid:
+                    valid_files_count += 1
+                else:
+                    invalid_files_count += 1
+                if 'failure' in file_info:
+                    failures.append(file_info['failure']['reason'])
+                if metrics is not None:
+                    metrics.count_file(file_info['grade'],
+                                       file_info['MIME type'], valid)
+    finally:
+        if metrics is not None:
+            metrics.close()
+
+    if timing is not None:
+        timing.write(timing_report)
 
     click.echo('Validation finished!')
     click.echo(
         '%s files were valid. %s files were invalid or '
         'unsupported.' % (valid_files_count, invalid_files_count))
+    if failures:
+        click.echo(
+            '%s of the invalid files timed out and %s exceeded the memory '
+            'limit or crashed the scraper.' % (
+                failures.count('timeout'),
+                len(failures) - failures.count('timeout')))
+
+
+@cli.command(
+    name="serve",
+)
+@click.option("--socket", "socket_path", type=click.Path(exists=False),
+              metavar="<FILE>",
+              help="Path of the Unix socket to listen.")
+@click.option("--port", type=click.IntRange(min=0, max=65535),
+              help="TCP port to listen on the loopback interface, if no "
+                   "socket is given.")
+@click.option("--workers", type=click.IntRange(min=1), default=2,
+              help="Number of jobs run at the same time. Defaults to 2.")
+@click.option("--queue-size", type=click.IntRange(min=1), default=100,
+              help="Maximum number of jobs waiting for a free worker. "
+                   "Defaults to 100.")
+def serve_command(socket_path, port, workers, queue_size):
+    """
+    Run a local service for compile and validate jobs.
+
+    Jobs are submitted as JSON with HTTP POST to /jobs, and their status
+    is available from /jobs/<id>.
+    """
+    from dpres_sip_compiler.service import serve
+
+    if socket_path is None and port is None:
+        raise click.UsageError("Either --socket or --port must be given.")
+    click.echo('Starting service with %d workers...' % workers)
+    serve(socket_path=socket_path, port=port, workers=workers,
+          queue_size=queue_size)
 
 
 if __name__ == "__main__":
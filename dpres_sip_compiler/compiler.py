@@ -1,7 +1,13 @@
 """Compile SIP using dpres-siptools-ng."""
 
+import contextlib
 import os
+import stat
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from typing import Optional
+from dpres_signature.signature import create_signature
 from mets_builder import METS, MetsProfile
 from mets_builder.metadata import (
     DigitalProvenanceAgentMetadata,
@@ -20,13 +26,23 @@ from file_scraper.defaults import (
 
 from dpres_sip_compiler.base_adaptor import build_sip_metadata, SipMetadata
 from dpres_sip_compiler.adaptor_list import ADAPTOR_DICT
-from dpres_sip_compiler.config import Config, get_default_config_path
+from dpres_sip_compiler.config import (
+    Config,
+    get_default_config_path,
+    load_config,
+)
 from dpres_sip_compiler.constants import (
-    EVENT_MIGRATION,
-    EVENT_NORMALIZATION,
     FILE_USE_IGNORE_VALIDATION,
-    FILE_USE_NO_VALIDATION
+    FILE_USE_NO_VALIDATION,
+    SCRAPER_INFO_TRIMMED
 )
+from dpres_sip_compiler.dedup import find_duplicates
+from dpres_sip_compiler.metrics import MetricsWriter
+from dpres_sip_compiler.partition import partition_sip_metadata
+from dpres_sip_compiler.profiling import profile_worker
+from dpres_sip_compiler.result_store import ScraperResultStore
+from dpres_sip_compiler.tar_stream import TarStreamWriter, ThroughputReporter
+from dpres_sip_compiler.timing import TimingReport, combine_recorders
 
 OUTCOME = "outcome"
 SOURCE = "source"
@@ -45,6 +61,18 @@ def _get_technical_file_object_metadata(
     return list(obj.metadata)[0]
 
 
+def _is_stream_output(tar_file: str) -> bool:
+    """Return True if the tar file is standard output or an existing
+    non-regular file, such as a FIFO.
+    """
+    if tar_file == "-":
+        return True
+    try:
+        return not stat.S_ISREG(os.stat(tar_file).st_mode)
+    except FileNotFoundError:
+        return False
+
+
 # pylint: disable=too-many-instance-attributes, too-few-public-methods
 class SipCompiler:
     """Class to compile SIP."""
@@ -57,7 +85,18 @@ class SipCompiler:
         config: Config,
         tar_file: str,
         sip_meta: SipMetadata,
-        validation: bool
+        validation: bool,
+        progress: bool = False,
+        workers: int = 1,
+        low_memory: bool = False,
+        diagnostics_file: Optional[str] = None,
+        dedup: bool = False,
+        hardlink_duplicates: bool = False,
+        heavy_workers: Optional[int] = None,
+        timing_report: Optional[str] = None,
+        metrics_file: Optional[str] = None,
+        prefetch_bytes: int = 0,
+        metrics_labels: Optional[dict[str, str]] = None
     ) -> None:
         """Initialize SipCompiler instance.
 
@@ -71,6 +110,27 @@ class SipCompiler:
             and agents
         :param validation: Whether to perform file validation during
             compilation
+        :param progress: Whether to report packaging progress and
+            throughput to stderr
+        :param workers: Number of worker processes for scraping
+        :param low_memory: Whether to store scraper results on disk
+            instead of memory
+        :param diagnostics_file: Path of a gzip compressed JSON Lines file
+            for the full scraper info of each file, or None
+        :param dedup: Whether to scrape byte-identical files only once
+        :param hardlink_duplicates: Whether to store byte-identical files
+            only once in the tar file, as hard links. Implies dedup.
+        :param heavy_workers: Maximum number of audio and video files
+            scraped at a time, or None for the number of workers
+        :param timing_report: Path of a JSON file for the scraping
+            durations of the slowest files and by MIME type and tool, or
+            None
+        :param metrics_file: Path of a Prometheus textfile for the
+            metrics of the compilation, updated during the compilation, or
+            None
+        :param prefetch_bytes: Byte budget for warming the next files to
+            be scraped in the background, or 0 for no prefetching
+        :param metrics_labels: Additional labels of the metrics, or None
 
         :returns: None
         """
@@ -80,13 +140,32 @@ class SipCompiler:
             self.descriptive_metadata_paths = descriptive_metadata_paths
         self.config = config
         self.validation = validation
+        self.workers = workers
+        self.heavy_workers = heavy_workers
+        self.low_memory = low_memory
+        self.diagnostics_file = diagnostics_file
+        self.timing_report = timing_report
+        self.metrics_file = metrics_file
+        self.metrics_labels = metrics_labels
+        self.prefetch_bytes = prefetch_bytes
+        self.metrics: Optional[MetricsWriter] = None
+        # Sources of migration and normalization events
+        self._migration_sources: Optional[set[str]] = None
+        self.dedup = dedup or hardlink_duplicates
+        self.hardlink_duplicates = hardlink_duplicates
+        # Duplicate objects mapped to their representative objects
+        self.duplicates: dict[str, str] = {}
         self.tar_file = tar_file
+        self.progress = progress
         self.sip_meta = sip_meta
         self.mets: Optional[METS] = None
         self.digital_objects: dict[str, File] = {}
+        # Technical metadata of the digital objects by object identifier
+        self.technical_metadata: dict[str, TechnicalFileObjectMetadata] = {}
         self.representative_objects: dict[
             str, TechnicalRepresentationObjectMetadata
         ] = {}
+        self.agent_metadata: dict[str, DigitalProvenanceAgentMetadata] = {}
         self.event_metadata: list[DigitalProvenanceEventMetadata] = []
         self.descriptive_metadata: list[ImportedMetadata] = []
 
@@ -151,71 +230,72 @@ class SipCompiler:
             self.representative_objects[object_id] = object_metadata
             return object_metadata
 
-    def _scrape_objects(self) -> None:
-        """Scrape objects."""
-        self.sip_meta.scrape_objects(
-            source_path=self.source_path,
-            validation=self.validation,
-        )
+    def _get_agent_metadata(
+        self, agent_id: str
+    ) -> DigitalProvenanceAgentMetadata:
+        """Returns agent metadata. Create the metadata if it does not
+        exist, so that events of the same agent share one instance.
+        """
+        if agent_id not in self.agent_metadata:
+            agent = self.sip_meta.premis_agents[agent_id]
+            self.agent_metadata[agent_id] = DigitalProvenanceAgentMetadata(
+                name=agent.agent_name,
+                agent_type=agent.agent_type,
+                agent_identifier_type=agent.agent_identifier_type,
+                agent_identifier=agent.agent_identifier_value,
+            )
+        return self.agent_metadata[agent_id]
 
-    def _update_file_use_attributes(self):
-        """Update USE attribute for source files in
-        migration/normalization events.
+    def _update_file_use_attribute(self, obj_identifier: str) -> None:
+        """Update USE attribute of a scraped object, if it is a source
+        file in migration/normalization events.
 
         For source files in migration/normalization events:
         - ACCEPTABLE/RECOMMENDED grades: Marked as FILE_USE_IGNORE_VALIDATION
           (broken files that need content metadata skipped)
         - Other grades (UNACCEPTABLE, etc.): Marked as
           FILE_USE_NO_VALIDATION (bit-level preservation)
+
+        :param obj_identifier: Identifier of the digital object
         """
-        for obj_identifier, obj in self.sip_meta.premis_objects.items():
-            if (
-                obj_identifier in self.sip_meta.digital_object_attributes
-                and self.sip_meta.digital_object_attributes[
-                    obj_identifier
-                ].get("use")
-                == FILE_USE_IGNORE_VALIDATION
-            ):
-                continue
-
-            if self._is_source_file_in_migration_normalization(obj_identifier):
-                grade = self.sip_meta.scraper_results[obj_identifier]["grade"]
-                if grade in (ACCEPTABLE, RECOMMENDED):
-                    self.sip_meta.add_object_attribute(
-                        obj_identifier=obj_identifier,
-                        name="use",
-                        value=FILE_USE_IGNORE_VALIDATION,
-                    )
-                else:
-                    self.sip_meta.add_object_attribute(
-                        obj_identifier=obj_identifier,
-                        name="use",
-                        value=FILE_USE_NO_VALIDATION,
-                    )
+        if (
+            obj_identifier in self.sip_meta.digital_object_attributes
+            and self.sip_meta.digital_object_attributes[
+                obj_identifier
+            ].get("use")
+            == FILE_USE_IGNORE_VALIDATION
+        ):
+            return
+
+        if self._is_source_file_in_migration_normalization(obj_identifier):
+            grade = self.sip_meta.scraper_results[obj_identifier]["grade"]
+            if grade in (ACCEPTABLE, RECOMMENDED):
+                self.sip_meta.add_object_attribute(
+                    obj_identifier=obj_identifier,
+                    name="use",
+                    value=FILE_USE_IGNORE_VALIDATION,
+                )
+            else:
+                self.sip_meta.add_object_attribute(
+                    obj_identifier=obj_identifier,
+                    name="use",
+                    value=FILE_USE_NO_VALIDATION,
+                )
 
     def _is_source_file_in_migration_normalization(
         self, obj_identifier: str
     ) -> bool:
         """Check if file is a source file in migration or normalization events.
 
+        The source files are found once, when the first object is checked.
+
         :param obj_identifier: Identifier of the digital object to check
         :returns: True if the file is a source file in any migration or
                   normalization event, False otherwise
         """
-        for event in self.sip_meta.events:
-            if event.event_type in [EVENT_MIGRATION, EVENT_NORMALIZATION]:
-                try:
-                    for object_link in self.sip_meta.premis_linkings[
-                        event.identifier
-                    ].object_links:
-                        if (
-                            object_link["linking_object"] == obj_identifier
-                            and object_link["object_role"] == SOURCE
-                        ):
-                            return True
-                except KeyError:
-                    continue
-        return False
+        if self._migration_sources is None:
+            self._migration_sources = self.sip_meta.migration_source_objects()
+        return obj_identifier in self._migration_sources
 
     def _initialize_mets(self) -> None:
         """Initialize dpres-mets-builder METS object with your
@@ -231,36 +311,109 @@ class SipCompiler:
         )
 
     def _create_technical_metadata(self) -> None:
-        """Create digital objects and add metadata to them."""
-        for obj_identifier, obj in self.sip_meta.premis_objects.items():
-            digital_object = File(
-                path=os.path.join(self.source_path, obj.filepath),
-                digital_object_path=obj.filepath,
-            )
+        """Scrape objects, and create digital objects with metadata.
 
-            skip_content_metadata = False
-            if (
-                obj_identifier in self.sip_meta.digital_object_attributes
-                and "use" in self.sip_meta.digital_object_attributes[
-                    obj_identifier
-                ]
-                and self.sip_meta.digital_object_attributes[obj_identifier][
-                    "use"
-                ]
-                == FILE_USE_IGNORE_VALIDATION
-            ):
-                skip_content_metadata = True
-
-            digital_object.generate_technical_metadata(
-                checksum=obj.message_digest,
-                checksum_algorithm=obj.message_digest_algorithm,
-                object_identifier=obj.object_identifier_value,
-                object_identifier_type=obj.object_identifier_type,
-                original_name=obj.original_name,
-                scraper_result=self.sip_meta.scraper_results[obj_identifier],
-                skip_content_specific_metadata=skip_content_metadata,
-            )
-            self.digital_objects[obj_identifier] = digital_object
+        Each digital object is created as soon as its object has been
+        scraped, while the rest of the objects are still being scraped
+        in the worker processes. The digital objects are finally sorted
+        in the order of the PREMIS objects, as the objects are not
+        scraped in that order with several workers.
+        """
+        trim_info = self.config.scraper_info_retention == SCRAPER_INFO_TRIMMED
+        if self.dedup:
+            self.duplicates = find_duplicates(self.sip_meta, self.source_path)
+            if self.duplicates:
+                print(f"Found {len(self.duplicates)} duplicate files, "
+                      f"which are scraped only once.",
+                      file=sys.stderr if self.tar_file == "-"
+                      else sys.stdout)
+        timing_report = TimingReport() if self.timing_report else None
+        timing = combine_recorders(timing_report, self.metrics)
+        diagnostics_context = contextlib.nullcontext()
+        if self.diagnostics_file:
+            diagnostics_context = open(self.diagnostics_file, "wb")
+        with diagnostics_context as diagnostics:
+            for obj_identifier in self.sip_meta.iter_scrape_objects(
+                    source_path=self.source_path,
+                    validation=self.validation,
+                    workers=self.workers,
+                    trim_info=trim_info,
+                    diagnostics=diagnostics,
+                    duplicates=self.duplicates,
+                    heavy_workers=self.heavy_workers,
+                    config=self.config,
+                    timing=timing,
+                    prefetch_bytes=self.prefetch_bytes):
+                self._update_file_use_attribute(obj_identifier)
+                self._create_digital_object(obj_identifier)
+        if timing_report is not None:
+            timing_report.write(self.timing_report)
+        self._check_scrape_failures()
+        self.digital_objects = {
+            obj_identifier: self.digital_objects[obj_identifier]
+            for obj_identifier in self.sip_meta.premis_objects}
+
+    def _check_scrape_failures(self) -> None:
+        """Raise an error if scraping of any object was stopped.
+
+        :raises TimeoutError: If scraping of all the failed objects timed
+            out
+        :raises RuntimeError: If scraping of an object exceeded the memory
+            limit or crashed the scraping process
+        """
+        failures = self.sip_meta.scrape_failures
+        if not failures:
+            return
+        lines = "\n".join(
+            f"{self.sip_meta.premis_objects[obj_identifier].filepath}: "
+            f"{failure.message}"
+            for obj_identifier, failure in failures.items())
+        message = f"Scraping failed for {len(failures)} files:\n{lines}"
+        if all(failure.reason == "timeout" for failure in failures.values()):
+            raise TimeoutError(message)
+        raise RuntimeError(message)
+
+    def _create_digital_object(self, obj_identifier: str) -> None:
+        """Create digital object and add technical metadata to it.
+
+        :param obj_identifier: Identifier of a scraped object
+        """
+        obj = self.sip_meta.premis_objects[obj_identifier]
+        scraper_result = self.sip_meta.scraper_results[obj_identifier]
+        if self.metrics is not None:
+            self.metrics.count_file(scraper_result.get("grade"),
+                                    scraper_result.get("mimetype"))
+        digital_object = File(
+            path=os.path.join(self.source_path, obj.filepath),
+            digital_object_path=obj.filepath,
+        )
+
+        skip_content_metadata = False
+        if (
+            obj_identifier in self.sip_meta.digital_object_attributes
+            and "use" in self.sip_meta.digital_object_attributes[
+                obj_identifier
+            ]
+            and self.sip_meta.digital_object_attributes[obj_identifier][
+                "use"
+            ]
+            == FILE_USE_IGNORE_VALIDATION
+        ):
+            skip_content_metadata = True
+
+        digital_object.generate_technical_metadata(
+            checksum=obj.message_digest,
+            checksum_algorithm=obj.message_digest_algorithm,
+            object_identifier=obj.object_identifier_value,
+            object_identifier_type=obj.object_identifier_type,
+            original_name=obj.original_name,
+            scraper_result=scraper_result,
+            skip_content_specific_metadata=skip_content_metadata,
+        )
+        self.digital_objects[obj_identifier] = digital_object
+        self.technical_metadata[obj_identifier] = (
+            _get_technical_file_object_metadata(obj=digital_object)
+        )
 
     def _create_provenance_metadata(self) -> None:
         """Create provenance metadata from representation objects,
@@ -280,17 +433,10 @@ class SipCompiler:
             for agent_link in self.sip_meta.premis_linkings[
                 event.identifier
             ].agent_links:
-                agent = self.sip_meta.premis_agents[
-                    agent_link["linking_agent"]
-                ]
-                agent_metadata = DigitalProvenanceAgentMetadata(
-                    name=agent.agent_name,
-                    agent_type=agent.agent_type,
-                    agent_identifier_type=agent.agent_identifier_type,
-                    agent_identifier=agent.agent_identifier_value,
-                )
                 event_metadata.link_agent_metadata(
-                    agent_metadata=agent_metadata,
+                    agent_metadata=self._get_agent_metadata(
+                        agent_link["linking_agent"]
+                    ),
                     agent_role=agent_link["agent_role"],
                 )
 
@@ -299,11 +445,9 @@ class SipCompiler:
             ].object_links:
                 obj_role = object_link["object_role"]
                 try:
-                    object_metadata = _get_technical_file_object_metadata(
-                        obj=self.digital_objects[
-                            object_link["linking_object"]
-                        ]
-                    )
+                    object_metadata = self.technical_metadata[
+                        object_link["linking_object"]
+                    ]
                     if obj_role not in [SOURCE, OUTCOME]:
                         obj_role = TARGET
 
@@ -322,13 +466,10 @@ class SipCompiler:
     def _setup_alternative_object_ids(self) -> None:
         """Will add alternative IDs to the technical objects that were added.
         """
-        for obj_id, obj in self.digital_objects.items():
+        for obj_id, object_metadata in self.technical_metadata.items():
             try:
                 # Setup alternative IDs if possible.
                 for alt_id in self.sip_meta.premis_object_alt_ids[obj_id]:
-                    object_metadata = _get_technical_file_object_metadata(
-                        obj=obj
-                    )
                     object_metadata.add_alternative_identifier(
                         identifier_type=alt_id["alt_identifier_type"],
                         identifier=alt_id["alt_identifier"],
@@ -399,24 +540,167 @@ class SipCompiler:
         sip.add_metadata(self.event_metadata)
         sip.add_metadata(self.representative_objects.values())
         sip.add_metadata(self.descriptive_metadata)
-        sip.finalize(
-            output_filepath=self.tar_file,
-            sign_key_filepath=self.config.sign_key
-        )
+        if (self.progress or self.hardlink_duplicates
+                or _is_stream_output(self.tar_file)):
+            self._stream_sip()
+        else:
+            sip.finalize(
+                output_filepath=self.tar_file,
+                sign_key_filepath=self.config.sign_key
+            )
+
+    def _stream_sip(self) -> None:
+        """Write the SIP sequentially to the tar file.
+
+        METS and signature are written first, followed by the payload
+        files, so that the tar file may be a pipe, a FIFO or standard
+        output ("-"). Duplicate files are written as hard links to their
+        representative files, if enabled.
+        """
+        self.mets.generate_file_references()
+        members = []
+        total_bytes = 0
+        for obj_identifier in self.digital_objects:
+            p_object = self.sip_meta.premis_objects[obj_identifier]
+            source = os.path.join(self.source_path, p_object.filepath)
+            stat_result = p_object.stat_result or os.stat(source)
+            linkname = None
+            if self.hardlink_duplicates and obj_identifier in self.duplicates:
+                linkname = self.sip_meta.premis_objects[
+                    self.duplicates[obj_identifier]].filepath
+            else:
+                total_bytes += stat_result.st_size
+            members.append((source, p_object.filepath, stat_result, linkname))
+
+        reporter = None
+        if self.progress:
+            reporter = ThroughputReporter(total_bytes=total_bytes)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            mets_path = os.path.join(tmp_dir, "mets.xml")
+            self.mets.write(mets_path)
+            signature = create_signature(
+                tmp_dir, self.config.sign_key, ["mets.xml"])
+
+            if self.tar_file == "-":
+                outfile = sys.stdout.buffer
+            else:
+                outfile = open(self.tar_file, "wb")
+            try:
+                writer = TarStreamWriter(outfile, progress=reporter)
+                writer.add_file(mets_path, "mets.xml")
+                writer.add_bytes("signature.sig", signature)
+                for (source, arcname, stat_result, linkname) in members:
+                    if linkname is not None:
+                        writer.add_hardlink(arcname, linkname, stat_result)
+                    else:
+                        writer.add_file(source, arcname,
+                                        stat_result=stat_result)
+                writer.close()
+            finally:
+                if outfile is not sys.stdout.buffer:
+                    outfile.close()
+        if reporter is not None:
+            reporter.finish()
+
+    def _phase(self, name: str) -> contextlib.AbstractContextManager:
+        """Measure the duration of a compilation phase in the metrics."""
+        if self.metrics is None:
+            return contextlib.nullcontext()
+        return self.metrics.phase(name)
 
     def create_sip(self) -> None:
         """Create SIP."""
-        self._scrape_objects()
-        self._initialize_mets()
-        self._update_file_use_attributes()
-        self._create_technical_metadata()
-        self._create_provenance_metadata()
-        self._setup_alternative_object_ids()
-        self._override_object_attributes()
-        self._import_descriptive_metadata()
-        self._finalize_sip()
+        store = None
+        if self.low_memory:
+            store = ScraperResultStore()
+            self.sip_meta.scraper_results = store
+        if self.metrics_file:
+            self.metrics = MetricsWriter(self.metrics_file, "compile",
+                                         workers=self.workers,
+                                         labels=self.metrics_labels)
+            self.metrics.start()
+        try:
+            with self._phase("scraping"):
+                self._initialize_mets()
+                self._create_technical_metadata()
+            with self._phase("metadata"):
+                self._create_provenance_metadata()
+                self._setup_alternative_object_ids()
+                self._override_object_attributes()
+                self._import_descriptive_metadata()
+            with self._phase("packaging"):
+                self._finalize_sip()
+        finally:
+            if store is not None:
+                store.close()
+            if self.metrics is not None:
+                self.metrics.close()
+        # Keep standard output clean when the SIP is written there
         print(f"Compilation finished. The SIP is signed and packaged to: "
-              f"{self.tar_file}.")
+              f"{self.tar_file}.",
+              file=sys.stderr if self.tar_file == "-" else sys.stdout)
+
+
+def _part_path(path: str, index: int) -> str:
+    """Path of a file for a part of a partitioned SIP.
+
+    :param path: Path of the file for the whole content
+    :param index: Part number starting from 1
+    :returns: Path with the part number before the file extension
+    """
+    (root, ext) = os.path.splitext(path)
+    return f"{root}_{index:03d}{ext}"
+
+
+def _compile_part(
+    sip_meta: SipMetadata,
+    source_path: str,
+    tar_file: str,
+    descriptive_metadata_paths: Optional[list[str]],
+    conf_file: str,
+    validation: bool,
+    progress: bool,
+    workers: int,
+    low_memory: bool,
+    diagnostics_file: Optional[str],
+    dedup: bool,
+    hardlink_duplicates: bool,
+    heavy_workers: Optional[int],
+    timing_report: Optional[str],
+    metrics_file: Optional[str],
+    prefetch_bytes: int,
+) -> str:
+    """Compile one part of a partitioned SIP.
+
+    Run in a worker process when the parts are compiled in parallel, and
+    then profiled if profiling is enabled. The metrics of the part are
+    labeled with its OBJID, so that the series of the parts differ.
+
+    :returns: Path of the created tar file
+    """
+    compiler = SipCompiler(
+        source_path=source_path,
+        descriptive_metadata_paths=descriptive_metadata_paths,
+        config=load_config(conf_file),
+        tar_file=tar_file,
+        sip_meta=sip_meta,
+        validation=validation,
+        progress=progress,
+        workers=workers,
+        low_memory=low_memory,
+        diagnostics_file=diagnostics_file,
+        dedup=dedup,
+        hardlink_duplicates=hardlink_duplicates,
+        heavy_workers=heavy_workers,
+        timing_report=timing_report,
+        metrics_file=metrics_file,
+        prefetch_bytes=prefetch_bytes,
+        metrics_labels={"sip_id": sip_meta.objid},
+    )
+    with profile_worker():
+        compiler.create_sip()
+    return tar_file
 
 
 def compile_sip(
@@ -427,23 +711,63 @@ def compile_sip(
     sip_id: Optional[str] = None,
     conf_file: Optional[str] = None,
     validation: bool = True,
+    progress: bool = False,
+    max_sip_bytes: Optional[int] = None,
+    max_sip_objects: Optional[int] = None,
+    parallel_parts: int = 1,
+    workers: int = 1,
+    low_memory: bool = False,
+    diagnostics_file: Optional[str] = None,
+    dedup: bool = False,
+    hardlink_duplicates: bool = False,
+    heavy_workers: Optional[int] = None,
+    timing_report: Optional[str] = None,
+    metrics_file: Optional[str] = None,
+    prefetch_bytes: int = 0,
 ) -> None:
     """Compile SIP.
 
+    If a maximum size or object count is given, the content may be split
+    into several SIPs. The tar files of the parts are named
+    ``<tar_file name>_<part number>.tar``, and the diagnostics files,
+    timing reports and metrics files in the same way. The metrics of the
+    parts are labeled with the OBJIDs of the parts.
+
     :param source_path: Path to the source directory containing files to
         package
-    :param tar_file: Path where the final SIP tar file will be created
+    :param tar_file: Path where the final SIP tar file will be created,
+        or "-" for standard output
     :param descriptive_metadata_paths: List of paths to descriptive metadata
         files, or None if no external descriptive metadata
     :param conf_file: Path to configuration file, or None to use default
     :param validation: Whether to perform file validation during compilation
+    :param progress: Whether to report packaging progress and throughput
+    :param max_sip_bytes: Maximum total size of the files in one SIP
+    :param max_sip_objects: Maximum number of files in one SIP
+    :param parallel_parts: Number of SIP parts compiled in parallel
+    :param workers: Number of worker processes for scraping, per SIP part
+    :param low_memory: Whether to store scraper results on disk instead
+        of memory
+    :param diagnostics_file: Path of a gzip compressed JSON Lines file for
+        the full scraper info of each file, or None
+    :param dedup: Whether to scrape byte-identical files only once
+    :param hardlink_duplicates: Whether to store byte-identical files only
+        once in the tar file, as hard links. Implies dedup.
+    :param heavy_workers: Maximum number of audio and video files scraped
+        at a time, per SIP part, or None for the number of workers
+    :param timing_report: Path of a JSON file for the scraping durations,
+        or None
+    :param metrics_file: Path of a Prometheus textfile for the metrics of
+        the compilation, or None
+    :param prefetch_bytes: Byte budget for prefetching files to be scraped,
+        per SIP part, or 0 for no prefetching
 
     :returns: None
     """
     if conf_file is None:
         conf_file = get_default_config_path()
 
-    config = Config(conf_file=conf_file)
+    config = load_config(conf_file)
 
     sip_meta = build_sip_metadata(
         ADAPTOR_DICT,
@@ -451,12 +775,57 @@ def compile_sip(
         config,
         content_id,
         sip_id)
-    compiler = SipCompiler(
-        source_path=source_path,
-        descriptive_metadata_paths=descriptive_metadata_paths,
-        config=config,
-        tar_file=tar_file,
-        sip_meta=sip_meta,
-        validation=validation,
-    )
-    compiler.create_sip()
+
+    parts = [sip_meta]
+    if max_sip_bytes or max_sip_objects:
+        parts = partition_sip_metadata(
+            sip_meta, source_path,
+            max_bytes=max_sip_bytes, max_objects=max_sip_objects)
+
+    if len(parts) == 1:
+        compiler = SipCompiler(
+            source_path=source_path,
+            descriptive_metadata_paths=descriptive_metadata_paths,
+            config=config,
+            tar_file=tar_file,
+            sip_meta=sip_meta,
+            validation=validation,
+            progress=progress,
+            workers=workers,
+            low_memory=low_memory,
+            diagnostics_file=diagnostics_file,
+            dedup=dedup,
+            hardlink_duplicates=hardlink_duplicates,
+            heavy_workers=heavy_workers,
+            timing_report=timing_report,
+            metrics_file=metrics_file,
+            prefetch_bytes=prefetch_bytes,
+        )
+        compiler.create_sip()
+        return
+
+    if tar_file == "-":
+        raise ValueError(
+            f"The content is split into {len(parts)} SIPs, which can not "
+            "be written to standard output.")
+    part_args = [
+        (part, source_path, _part_path(tar_file, index),
+         descriptive_metadata_paths, conf_file, validation, progress,
+         workers, low_memory,
+         _part_path(diagnostics_file, index) if diagnostics_file else None,
+         dedup, hardlink_duplicates, heavy_workers,
+         _part_path(timing_report, index) if timing_report else None,
+         _part_path(metrics_file, index) if metrics_file else None,
+         prefetch_bytes)
+        for (index, part) in enumerate(parts, start=1)]
+
+    print(f"The content is split into {len(parts)} SIPs.")
+    if parallel_parts <= 1:
+        for args in part_args:
+            _compile_part(*args)
+        return
+    with ProcessPoolExecutor(max_workers=parallel_parts) as executor:
+        futures = [executor.submit(_compile_part, *args)
+                   for args in part_args]
+        for future in futures:
+            future.result()
@@ -1,14 +1,43 @@
 """Reader for configuration info
 """
+from __future__ import annotations
+
 import datetime
+import fnmatch
+import functools
 import os
 import configparser
+import threading
+import uuid
+from typing import TYPE_CHECKING
+
 import click
 
+from dpres_sip_compiler.constants import (
+    SCRAPER_INFO_FULL,
+    SCRAPER_INFO_RETENTION,
+)
+from dpres_sip_compiler.identifiers import DEFAULT_IDENTIFIER_NAMESPACE
+
+if TYPE_CHECKING:
+    from dpres_sip_compiler.base_adaptor import SipMetadata
+
 _DEFAULT_DESC_METADATA_FORMAT = "DC"
 _DEFAULT_DESC_METADATA_VERSION = "2008"
 _DEFAULT_DESC_METADATA_SOURCE_FORMAT = "file"
 _DEFAULT_IGNORE_DV_CONCEALING_BITSTREAM_ERRORS = False
+_DEFAULT_SCRAPER_INFO_RETENTION = SCRAPER_INFO_FULL
+
+# Sections and keys that must exist in every configuration file
+REQUIRED_KEYS = (
+    ("organization", "name"),
+    ("organization", "contract"),
+    ("organization", "sign_key"),
+    ("script", "adaptor"),
+)
+
+_CONFIG_CACHE: dict[str, tuple[tuple[int, int], Config]] = {}
+_CONFIG_CACHE_LOCK = threading.Lock()
 
 
 def get_default_config_path():
@@ -33,75 +62,185 @@ def get_default_temp_path():
 # pylint: disable=too-few-public-methods, too-many-instance-attributes
 class Config:
     """Basic configuration.
+
+    The configuration is validated when it is created and it can not be
+    modified afterwards, so the same instance can be shared between
+    packages and worker processes. Use :func:`load_config` to reuse
+    already parsed configuration files.
     """
 
     def __init__(self, conf_file: str) -> None:
         """Initializes configuration.
 
         :param conf_file: Configuration file path
+        :raises ValueError: If required keys are missing
         """
         conf = configparser.ConfigParser()
         conf.read(conf_file)
-        self._conf = conf
+        missing = [f"{section}/{key}" for (section, key) in REQUIRED_KEYS
+                   if not conf.has_option(section, key)]
+        if missing:
+            raise ValueError(
+                f"Missing configuration in {conf_file}: "
+                f"{', '.join(missing)}")
+        # Plain dicts of the sections, e.g. for adaptor specific keys
+        self._conf = {section: dict(conf[section])
+                      for section in conf.sections()}
+        script = self._conf["script"]
 
         # Organization name that will appear in METS.
-        self.name = self._conf["organization"]["name"]
+        self.name: str = self._conf["organization"]["name"]
         # Contract ID that will appear in METS.
-        self.contract = self._conf["organization"]["contract"]
+        self.contract: str = self._conf["organization"]["contract"]
         # Key that will be used to sign SIP.
-        self.sign_key = self._conf["organization"]["sign_key"]
+        self.sign_key: str = self._conf["organization"]["sign_key"]
 
         # Which adaptor script is used.
-        self.adaptor = self._conf["script"]["adaptor"]
+        self.adaptor: str = script["adaptor"]
 
         # Descriptive metadata's format
-        try:
-            _desc_metadata_format = self._conf["script"][
-                "desc_metadata_format"
-            ]
-        except KeyError:
-            _desc_metadata_format = _DEFAULT_DESC_METADATA_FORMAT
-        self.desc_metadata_format = _desc_metadata_format
-
+        self.desc_metadata_format: str = script.get(
+            "desc_metadata_format", _DEFAULT_DESC_METADATA_FORMAT)
         # Descriptive metadata's version
-        try:
-            _desc_metadata_version = self._conf["script"][
-                "desc_metadata_version"
-            ]
-        except KeyError:
-            _desc_metadata_version = _DEFAULT_DESC_METADATA_VERSION
-        self.desc_metadata_version = _desc_metadata_version
-
+        self.desc_metadata_version: str = script.get(
+            "desc_metadata_version", _DEFAULT_DESC_METADATA_VERSION)
         # Descriptive metadata source format (i.e. "file" or "string")
+        self.desc_metadata_source_format: str = script.get(
+            "desc_metadata_source_format",
+            _DEFAULT_DESC_METADATA_SOURCE_FORMAT)
+
+        # How much of the scraper info is kept for METS generation
+        self.scraper_info_retention: str = script.get(
+            "scraper_info", _DEFAULT_SCRAPER_INFO_RETENTION)
+        if self.scraper_info_retention not in SCRAPER_INFO_RETENTION:
+            raise ValueError(
+                f"Invalid value for script/scraper_info in {conf_file}: "
+                f"{self.scraper_info_retention}")
+
+        # Whether object identifiers are derived from file path and content
+        self.deterministic_identifiers: bool = script.get(
+            "deterministic_identifiers", "false") == "true"
+        # Namespace of the deterministic object identifiers
         try:
-            _desc_metadata_source_format = self._conf["script"][
-                "desc_metadata_source_format"
-            ]
-        except KeyError:
-            _desc_metadata_source_format = _DEFAULT_DESC_METADATA_SOURCE_FORMAT
-        self.desc_metadata_source_format = _desc_metadata_source_format
+            self.identifier_namespace: uuid.UUID = uuid.UUID(script.get(
+                "identifier_namespace", str(DEFAULT_IDENTIFIER_NAMESPACE)))
+        except ValueError as error:
+            raise ValueError(
+                f"Invalid value for script/identifier_namespace in "
+                f"{conf_file}: {script['identifier_namespace']}") from error
 
         # The selected checksum in PREMIS Objects
-        try:
-            self.used_checksum = self._conf["script"]["used_checksum"]
-        except KeyError:
-            self.used_checksum = None
+        self.used_checksum: str | None = script.get("used_checksum")
 
         # Musicarchive specific attributes.
         # Postfix part of metadata filenames
-        try:
-            self.meta_ending = self._conf["script"]["meta_ending"]
-        except KeyError:
-            self.meta_ending = None
+        self.meta_ending: str | None = script.get("meta_ending")
         # Postfix part of CSV filenames.
-        try:
-            self.csv_ending = self._conf["script"]["csv_ending"]
-        except KeyError:
-            self.csv_ending = None
+        self.csv_ending: str | None = script.get("csv_ending")
 
         try:
-            self.ignore_concealing_bitstream_errors = (self._conf["validate"][
-                "ignore_concealing_bitstream_errors"] == "true")
+            self.ignore_concealing_bitstream_errors: bool = (
+                self._conf["validate"][
+                    "ignore_concealing_bitstream_errors"] == "true")
         except KeyError:
             self.ignore_concealing_bitstream_errors = (
                 _DEFAULT_IGNORE_DV_CONCEALING_BITSTREAM_ERRORS)
+
+        # Limits for scraping a file by MIME type pattern, with the key
+        # "default" for the other files
+        self.scrape_timeouts: dict[str, float] = self._limits(
+            conf_file, "timeouts", float)
+        self.scrape_memory_limits: dict[str, int] = {
+            pattern: limit * 1024 * 1024
+            for (pattern, limit) in self._limits(
+                conf_file, "memory_limits", int).items()}
+
+        self._frozen = True
+
+    def _limits(self, conf_file: str, section: str,
+                value_type: type) -> dict:
+        """Parse positive limits by MIME type pattern from a section.
+
+        :raises ValueError: If a limit is not a positive number
+        """
+        limits = {}
+        for (pattern, value) in self._conf.get(section, {}).items():
+            try:
+                limit = value_type(value)
+            except ValueError:
+                limit = None
+            if limit is None or limit <= 0:
+                raise ValueError(
+                    f"Invalid value for {section}/{pattern} in {conf_file}: "
+                    f"{value}")
+            limits[pattern] = limit
+        return limits
+
+    @property
+    def scrape_limits_enabled(self) -> bool:
+        """Whether time or memory limits are set for scraping."""
+        return bool(self.scrape_timeouts or self.scrape_memory_limits)
+
+    def scrape_limits(
+        self, mimetype: str | None
+    ) -> tuple[float | None, int | None]:
+        """Time and memory limits for scraping a file.
+
+        The limits of the first matching MIME type pattern are used, e.g.
+        ``video/*``, or the default limits if none of the patterns match.
+
+        :param mimetype: MIME type of the file, or None if not known
+        :returns: Tuple of timeout in seconds and memory limit in bytes,
+            None for no limit
+        """
+        return (_match_limit(self.scrape_timeouts, mimetype),
+                _match_limit(self.scrape_memory_limits, mimetype))
+
+    def __setattr__(self, name: str, value: object) -> None:
+        """Prevent modifications after initialization."""
+        if getattr(self, "_frozen", False):
+            raise AttributeError(
+                f"Configuration is immutable, can not set '{name}'")
+        super().__setattr__(name, value)
+
+    @functools.cached_property
+    def adaptor_class(self) -> type[SipMetadata]:
+        """SIP metadata class of the configured adaptor.
+
+        The adaptor is resolved, and its module imported, on first use.
+        """
+        # pylint: disable=import-outside-toplevel
+        from dpres_sip_compiler.adaptor_list import ADAPTOR_DICT
+        from dpres_sip_compiler.base_adaptor import sip_metadata_class
+
+        return sip_metadata_class(ADAPTOR_DICT, self)
+
+
+def _match_limit(limits: dict, mimetype: str | None) -> float | int | None:
+    """Find limit for the MIME type from limits by MIME type pattern."""
+    if mimetype:
+        for (pattern, limit) in limits.items():
+            if pattern != "default" and fnmatch.fnmatch(mimetype, pattern):
+                return limit
+    return limits.get("default")
+
+
+def load_config(conf_file: str) -> Config:
+    """Return configuration for the given file.
+
+    Parsed configurations are cached by path, and a file is parsed again
+    only if its modification time or size has changed.
+
+    :param conf_file: Configuration file path
+    :returns: Configuration
+    """
+    path = os.path.realpath(conf_file)
+    stat_result = os.stat(path)
+    version = (stat_result.st_mtime_ns, stat_result.st_size)
+    with _CONFIG_CACHE_LOCK:
+        cached = _CONFIG_CACHE.get(path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        config = Config(conf_file=path)
+        _CONFIG_CACHE[path] = (version, config)
+        return config
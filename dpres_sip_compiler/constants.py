@@ -15,3 +15,11 @@ FILE_OUTCOME_SOURCE = "source"
 FILE_USE_IGNORE_VALIDATION = "fi-dpres-ignore-validation-errors"
 FILE_USE_NO_VALIDATION = "fi-dpres-no-file-format-validation"
 FILE_USE_FORENSIC_ANALYSIS = "fi-dpres-preserve-forensically-analysed-object"
+
+# Retention policies of the scraper info in the scraper results
+SCRAPER_INFO_FULL = "full"
+SCRAPER_INFO_TRIMMED = "trimmed"
+SCRAPER_INFO_RETENTION = (SCRAPER_INFO_FULL, SCRAPER_INFO_TRIMMED)
+
+# MIME types of the files scraped with heavy tools
+HEAVY_MIMETYPE_PREFIXES = ("video/", "audio/", "application/mxf")
@@ -0,0 +1,80 @@
+"""Find PREMIS objects with byte-identical files."""
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING
+
+from dpres_sip_compiler.identifiers import file_sha256
+
+if TYPE_CHECKING:
+    from dpres_sip_compiler.base_adaptor import PremisObject, SipMetadata
+
+
+def _content_key(p_object: PremisObject, source_path: str) -> str:
+    """SHA-256 digest of the object file, the key of its content.
+
+    A digest already calculated when populating is reused.
+    """
+    if p_object.content_sha256 is not None:
+        return p_object.content_sha256
+    return file_sha256(os.path.join(source_path, p_object.filepath))
+
+
+def _consistent(p_object: PremisObject, other: PremisObject) -> bool:
+    """Whether the declared message digests of two objects agree.
+
+    Digests declared with different algorithms can not be compared and
+    are considered consistent.
+    """
+    if not (p_object.message_digest and p_object.message_digest_algorithm
+            and other.message_digest and other.message_digest_algorithm):
+        return True
+    if p_object.message_digest_algorithm.upper() \
+            != other.message_digest_algorithm.upper():
+        return True
+    return p_object.message_digest.lower() == other.message_digest.lower()
+
+
+def find_duplicates(
+    sip_meta: SipMetadata, source_path: str
+) -> dict[str, str]:
+    """Find objects whose file is a duplicate of an earlier object.
+
+    The objects are first grouped by file size and predefined file
+    format, and only the files in groups of more than one object are
+    hashed. The first object of each group of identical files is the
+    representative of the group. The declared message digests are not
+    trusted for this, but an identical file declaring a digest that
+    conflicts with the representative is not a duplicate, so that it is
+    scraped and the conflict is detected.
+
+    :param sip_meta: SIP metadata
+    :param source_path: Source path of the objects
+    :returns: Dict mapping identifiers of the duplicate objects to the
+        identifiers of their representative objects, in object order
+    """
+    by_size: dict[tuple, list[str]] = {}
+    for (obj_identifier, p_object) in sip_meta.premis_objects.items():
+        key = (p_object.file_size(source_path), p_object.format_name,
+               p_object.format_version)
+        by_size.setdefault(key, []).append(obj_identifier)
+
+    duplicates = {}
+    for obj_identifiers in by_size.values():
+        if len(obj_identifiers) < 2:
+            continue
+        representatives: dict[str, list[str]] = {}
+        for obj_identifier in obj_identifiers:
+            p_object = sip_meta.premis_objects[obj_identifier]
+            candidates = representatives.setdefault(
+                _content_key(p_object, source_path), [])
+            for candidate in candidates:
+                if _consistent(p_object, sip_meta.premis_objects[candidate]):
+                    duplicates[obj_identifier] = candidate
+                    break
+            else:
+                candidates.append(obj_identifier)
+
+    return {obj_identifier: duplicates[obj_identifier]
+            for obj_identifier in sip_meta.premis_objects
+            if obj_identifier in duplicates}
@@ -0,0 +1,56 @@
+"""Collect files of a source directory with os.scandir."""
+from __future__ import annotations
+
+import fnmatch
+import os
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+
+def collect_files(
+    source_path: str,
+    exclude_patterns: Iterable[str] = (),
+) -> Iterator[tuple[str, os.stat_result]]:
+    """Recursively collect files in the source directory.
+
+    The files are yielded in the same order as with ``os.walk``: files of
+    a directory first and then the files of its subdirectories. Symbolic
+    links to directories are not followed. The stat result is the one of
+    the file the path refers to, and it is collected during the walk, so
+    it can be reused instead of calling ``os.stat`` again. Entries that
+    can not be stat'ed, such as broken symbolic links, are skipped.
+
+    :param source_path: Source directory
+    :param exclude_patterns: fnmatch patterns of the files to be skipped.
+        The patterns are matched against the path joined with the source
+        directory, e.g. ``*/.[!/]*`` excludes all hidden files and
+        directories.
+    :returns: Iterator of file paths relative to the source directory and
+        their stat results
+    """
+    exclude_patterns = tuple(exclude_patterns)
+    # Stack of directories to walk, with their paths relative to the
+    # source directory
+    directories = [(source_path, "")]
+    while directories:
+        (directory, relative_directory) = directories.pop()
+        subdirectories = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                relative_path = os.path.join(relative_directory, entry.name)
+                if entry.is_dir():
+                    if not entry.is_symlink():
+                        subdirectories.append((entry.path, relative_path))
+                    continue
+                if any(fnmatch.fnmatch(entry.path, pattern)
+                       for pattern in exclude_patterns):
+                    continue
+                try:
+                    stat_result = entry.stat()
+                except OSError:
+                    continue
+                yield (relative_path, stat_result)
+        # Walk the subdirectories in the order they were listed
+        directories.extend(reversed(subdirectories))
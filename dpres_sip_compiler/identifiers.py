@@ -0,0 +1,42 @@
+"""Deterministic identifiers for PREMIS objects."""
+from __future__ import annotations
+
+import hashlib
+import uuid
+
+# Default namespace of the deterministic object identifiers
+DEFAULT_IDENTIFIER_NAMESPACE = uuid.uuid5(
+    uuid.NAMESPACE_URL,
+    "https://github.com/Digital-Preservation-Finland/dpres-sip-compiler")
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path: str) -> str:
+    """Calculate SHA-256 digest of a file.
+
+    :param path: Path to the file
+    :returns: Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as infile:
+        for chunk in iter(lambda: infile.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def deterministic_identifier(
+    namespace: uuid.UUID, filepath: str, digest: str
+) -> str:
+    """Create UUIDv5 identifier from the path and content of a file.
+
+    The same file in the same relative path gets the same identifier in
+    every compilation, and any change to the path or content of the file
+    changes the identifier.
+
+    :param namespace: Namespace UUID
+    :param filepath: File path relative to the source path
+    :param digest: SHA-256 hex digest of the file content
+    :returns: Identifier as a string
+    """
+    return str(uuid.uuid5(namespace, f"{filepath}\0{digest}"))
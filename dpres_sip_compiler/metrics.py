@@ -0,0 +1,231 @@
+"""Prometheus metrics of compile and validate runs in a textfile.
+
+The metrics are written periodically in the Prometheus text format, to be
+collected by the textfile collector of the node exporter. The file is
+replaced atomically, so the collector never reads a partially written
+file.
+"""
+from __future__ import annotations
+
+import contextlib
+import os
+import tempfile
+import threading
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+# Default interval of writing the metrics file in seconds
+DEFAULT_METRICS_INTERVAL = 15.0
+
+_PREFIX = "sip_compiler"
+
+
+def _escape(value: str) -> str:
+    """Escape a label value."""
+    return (value.replace("\\", "\\\\").replace("\"", "\\\"")
+            .replace("\n", "\\n"))
+
+
+def _labels(labels: dict) -> str:
+    """Format labels of a sample."""
+    return ",".join(f"{name}=\"{_escape(str(value))}\""
+                    for (name, value) in labels.items())
+
+
+class MetricsWriter:
+    """Collect metrics of a run and write them to a textfile.
+
+    The metrics are written by a background thread at regular intervals,
+    so that a stalled run shows as a drop in the throughput, and when a
+    phase of the run ends. Can be used as a recorder of the scraping
+    durations, like :class:`~dpres_sip_compiler.timing.TimingReport`.
+    """
+
+    def __init__(self, path: str, command: str, workers: int = 1,
+                 interval: float = DEFAULT_METRICS_INTERVAL,
+                 labels: dict[str, str] | None = None) -> None:
+        """Initialize writer.
+
+        :param path: Path of the metrics file, e.g.
+            ``/var/lib/node_exporter/textfile/sip_compiler.prom``
+        :param command: Name of the command, used as a label
+        :param workers: Number of worker processes scraping files
+        :param interval: Interval of writing the file in seconds
+        :param labels: Additional labels of all samples, e.g. to tell
+            apart the files of the parts of a partitioned SIP
+        """
+        self.path = path
+        self.command = command
+        self.labels = labels or {}
+        self.workers = max(1, workers)
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._start_time = time.time()
+        self._start = time.monotonic()
+        # Number of files by labels of grade, MIME type and validity
+        self._results: dict[tuple, int] = {}
+        self._scraped_files = 0
+        self._scraped_bytes = 0
+        self._scrape_seconds = 0.0
+        # Durations of the finished phases, and the current phase
+        self._phases: dict[str, float] = {}
+        self._phase: tuple[str, float] | None = None
+        # Totals at the previous write, for the current rates
+        self._previous = (self._start, 0, 0.0)
+        self._rates = (0.0, 0.0)
+        self._running = True
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        """Write the metrics file at intervals until stopped."""
+        while not self._stopped.wait(self.interval):
+            self.write()
+
+    def start(self) -> None:
+        """Write the first metrics and start the periodic writing."""
+        self.write()
+        self._thread.start()
+
+    def close(self) -> None:
+        """Stop the periodic writing and write the final metrics."""
+        self._stopped.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self._running = False
+        self.write()
+
+    def __enter__(self) -> MetricsWriter:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def add(self, path: str, mimetype: str | None, size: int,
+            duration: float, info: dict | None = None) -> None:
+        """Record scraping of a file.
+
+        :param path: Path of the file
+        :param mimetype: MIME type of the file
+        :param size: Size of the file in bytes
+        :param duration: Scraping duration in seconds
+        :param info: Scraper info of the file, not used
+        """
+        # pylint: disable=unused-argument
+        with self._lock:
+            self._scraped_files += 1
+            self._scraped_bytes += size
+            self._scrape_seconds += duration
+
+    def count_file(self, grade: str | None, mimetype: str | None,
+                   valid: bool | None = None) -> None:
+        """Count a processed file.
+
+        :param grade: Grade of the file
+        :param mimetype: MIME type of the file
+        :param valid: Whether the file was valid, or None if not known
+        """
+        key = (grade or "(:unav)", mimetype or "(:unav)",
+               None if valid is None else str(valid).lower())
+        with self._lock:
+            self._results[key] = self._results.get(key, 0) + 1
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Measure the duration of a phase of the run.
+
+        :param name: Name of the phase
+        """
+        with self._lock:
+            self._phase = (name, time.monotonic())
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._phases[name] = (self._phases.get(name, 0.0)
+                                      + time.monotonic() - self._phase[1])
+                self._phase = None
+            self.write()
+
+    def _render(self, now: float) -> str:
+        """Render the metrics in the Prometheus text format."""
+        command = {"command": self.command, **self.labels}
+        lines = []
+
+        def _metric(name, metric_type, help_text, samples):
+            lines.append(f"# HELP {_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {_PREFIX}_{name} {metric_type}")
+            for (labels, value) in samples:
+                lines.append(f"{_PREFIX}_{name}{{"
+                             f"{_labels({**command, **labels})}}} {value}")
+
+        _metric("running", "gauge", "Whether the run is in progress.",
+                [({}, int(self._running))])
+        _metric("start_time_seconds", "gauge",
+                "Start time of the run since the epoch.",
+                [({}, round(self._start_time, 3))])
+        _metric("files_total", "counter",
+                "Processed files by grade and MIME type.",
+                [({"grade": grade, "mimetype": mimetype,
+                   **({} if valid is None else {"valid": valid})}, count)
+                 for ((grade, mimetype, valid), count)
+                 in sorted(self._results.items(), key=str)])
+        _metric("scraped_files_total", "counter", "Scraped files.",
+                [({}, self._scraped_files)])
+        _metric("scraped_bytes_total", "counter", "Bytes of scraped files.",
+                [({}, self._scraped_bytes)])
+        _metric("scrape_seconds_total", "counter",
+                "Time spent in scraping files, summed over the workers.",
+                [({}, round(self._scrape_seconds, 3))])
+        _metric("throughput_bytes_per_second", "gauge",
+                "Scraped bytes per second since the previous update.",
+                [({}, round(self._rates[0], 3))])
+        _metric("workers", "gauge", "Worker processes scraping files.",
+                [({}, self.workers)])
+        _metric("worker_utilization_ratio", "gauge",
+                "Share of the worker time spent in scraping since the "
+                "previous update.",
+                [({}, round(self._rates[1], 3))])
+        phases = dict(self._phases)
+        if self._phase is not None:
+            phases[self._phase[0]] = (phases.get(self._phase[0], 0.0)
+                                      + now - self._phase[1])
+        _metric("phase_seconds", "gauge", "Duration of the phases.",
+                [({"phase": name}, round(seconds, 3))
+                 for (name, seconds) in phases.items()])
+        _metric("current_phase", "gauge", "Phase in progress.",
+                [({"phase": self._phase[0]}, 1)]
+                if self._phase is not None else [])
+        return "\n".join(lines) + "\n"
+
+    def write(self) -> None:
+        """Write the metrics file, replacing the previous file atomically.
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        with self._lock:
+            now = time.monotonic()
+            (previous, previous_bytes, previous_seconds) = self._previous
+            elapsed = now - previous
+            if elapsed > 0:
+                self._rates = (
+                    (self._scraped_bytes - previous_bytes) / elapsed,
+                    min(1.0, (self._scrape_seconds - previous_seconds)
+                        / (elapsed * self.workers)))
+                self._previous = (now, self._scraped_bytes,
+                                  self._scrape_seconds)
+
+            (handle, tmp_path) = tempfile.mkstemp(
+                dir=directory, prefix=f".{os.path.basename(self.path)}.",
+                suffix=".tmp")
+            try:
+                with os.fdopen(handle, "w", encoding="utf-8") as outfile:
+                    outfile.write(self._render(now))
+                os.chmod(tmp_path, 0o644)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
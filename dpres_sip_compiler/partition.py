@@ -0,0 +1,158 @@
+"""Split SIP metadata into several SIPs by size or object count."""
+from __future__ import annotations
+
+import copy
+from typing import TYPE_CHECKING
+from uuid import uuid4
+
+from dpres_sip_compiler.constants import (
+    EVENT_CONVERSION,
+    EVENT_MIGRATION,
+    EVENT_NORMALIZATION,
+)
+
+if TYPE_CHECKING:
+    from dpres_sip_compiler.base_adaptor import SipMetadata
+
+# Objects linked by these events are always kept in the same SIP
+LINKING_EVENT_TYPES = (EVENT_MIGRATION, EVENT_NORMALIZATION, EVENT_CONVERSION)
+
+
+def object_groups(sip_meta: SipMetadata) -> list[list[str]]:
+    """Group PREMIS objects that must be kept in the same SIP.
+
+    Objects linked by the same migration, normalization or conversion
+    event belong to the same group. The groups and the objects within
+    them are in the order of ``premis_objects``.
+
+    :param sip_meta: SIP metadata
+    :returns: List of object identifier groups
+    """
+    parents = {obj_id: obj_id for obj_id in sip_meta.premis_objects}
+
+    def _root(obj_id):
+        """Find the representative of the group of an object."""
+        while parents[obj_id] != obj_id:
+            parents[obj_id] = parents[parents[obj_id]]
+            obj_id = parents[obj_id]
+        return obj_id
+
+    for event in sip_meta.events:
+        if event.event_type not in LINKING_EVENT_TYPES:
+            continue
+        linking = sip_meta.premis_linkings.get(event.identifier)
+        if linking is None:
+            continue
+        linked = [link["linking_object"] for link in linking.object_links
+                  if link["linking_object"] in parents]
+        for obj_id in linked[1:]:
+            parents[_root(obj_id)] = _root(linked[0])
+
+    groups: dict[str, list[str]] = {}
+    for obj_id in sip_meta.premis_objects:
+        groups.setdefault(_root(obj_id), []).append(obj_id)
+    return list(groups.values())
+
+
+def _sip_metadata_part(
+    sip_meta: SipMetadata, object_ids: list[str], objid: str
+) -> SipMetadata:
+    """Create SIP metadata for a part of the objects.
+
+    Events are included if they link to an object of the part or if
+    they do not link to any file object of the whole SIP. Links to file
+    objects of other parts are removed from the linkings.
+
+    :param sip_meta: SIP metadata of the whole content
+    :param object_ids: Identifiers of the objects in the part
+    :param objid: METS OBJID of the part
+    :returns: SIP metadata for the part
+    """
+    part_ids = set(object_ids)
+    part = copy.copy(sip_meta)
+    part.objid = objid
+    part.premis_objects = {
+        obj_id: sip_meta.premis_objects[obj_id] for obj_id in object_ids}
+    part.premis_events = {}
+    part.premis_linkings = {}
+    for (event_id, event) in sip_meta.premis_events.items():
+        linking = sip_meta.premis_linkings.get(event_id)
+        if linking is None:
+            part.premis_events[event_id] = event
+            continue
+        file_links = [link for link in linking.object_links
+                      if link["linking_object"] in sip_meta.premis_objects]
+        if file_links and not any(link["linking_object"] in part_ids
+                                  for link in file_links):
+            continue
+        part_linking = copy.copy(linking)
+        part_linking.object_links = [
+            link for link in linking.object_links
+            if link["linking_object"] in part_ids
+            or link["linking_object"] not in sip_meta.premis_objects]
+        part.premis_events[event_id] = event
+        part.premis_linkings[event_id] = part_linking
+
+    linked_ids = part_ids | {
+        link["linking_object"] for linking in part.premis_linkings.values()
+        for link in linking.object_links}
+    part.premis_object_alt_ids = {
+        obj_id: alt_ids
+        for (obj_id, alt_ids) in sip_meta.premis_object_alt_ids.items()
+        if obj_id in linked_ids}
+    part.digital_object_attributes = {
+        obj_id: attributes
+        for (obj_id, attributes) in sip_meta.digital_object_attributes.items()
+        if obj_id in part_ids}
+    part.scraper_results = {
+        obj_id: result
+        for (obj_id, result) in sip_meta.scraper_results.items()
+        if obj_id in part_ids}
+    return part
+
+
+def partition_sip_metadata(
+    sip_meta: SipMetadata,
+    source_path: str,
+    max_bytes: int | None = None,
+    max_objects: int | None = None,
+) -> list[SipMetadata]:
+    """Split SIP metadata into parts within the given limits.
+
+    Object groups (see :func:`object_groups`) are never split. A group
+    exceeding the limits alone forms a part of its own. Each part gets
+    an OBJID of the form ``<objid>_<part number>``, where a random UUID
+    is used as ``<objid>`` if the SIP metadata does not define one.
+
+    :param sip_meta: SIP metadata of the whole content
+    :param source_path: Source path of the objects
+    :param max_bytes: Maximum total size of the objects in a part
+    :param max_objects: Maximum number of objects in a part
+    :returns: List of SIP metadata parts. The given SIP metadata is
+        returned as such if it does not need to be split.
+    """
+    parts: list[list[str]] = []
+    part_bytes = 0
+    for group in object_groups(sip_meta):
+        group_bytes = 0
+        if max_bytes:
+            group_bytes = sum(
+                sip_meta.premis_objects[obj_id].file_size(source_path)
+                for obj_id in group)
+        if parts and not (
+                (max_bytes and part_bytes + group_bytes > max_bytes) or
+                (max_objects and len(parts[-1]) + len(group) > max_objects)):
+            parts[-1].extend(group)
+            part_bytes += group_bytes
+        else:
+            parts.append(list(group))
+            part_bytes = group_bytes
+
+    if len(parts) <= 1:
+        return [sip_meta]
+
+    base_objid = sip_meta.objid or str(uuid4())
+    return [
+        _sip_metadata_part(sip_meta, object_ids,
+                           f"{base_objid}_{index:03d}")
+        for (index, object_ids) in enumerate(parts, start=1)]
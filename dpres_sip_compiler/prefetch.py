@@ -0,0 +1,121 @@
+"""Prefetch files ahead of scraping.
+
+Scraping files on a network file system, such as NFS or CephFS, is
+bound by the latency of reading each file cold. The prefetcher warms the
+page cache for the next files in a background thread, while the current
+files are being scraped, so that the network I/O overlaps with the
+CPU-bound scraping.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+def warm_file(path: str) -> None:
+    """Ask the kernel to read a file into the page cache.
+
+    The file is advised with ``POSIX_FADV_WILLNEED``, which starts the
+    readahead of the whole file. Where it is not available, the file is
+    read through.
+
+    :param path: Path of the file
+    """
+    with open(path, "rb") as infile:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(infile.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+            return
+        while infile.read(_CHUNK_SIZE):
+            pass
+
+
+class Prefetcher:
+    """Warm files in the order they are going to be scraped.
+
+    The files warmed but not yet released by the consumer are limited by
+    a byte budget, so that the prefetched files are not evicted from the
+    page cache before they are scraped. Files larger than the budget are
+    not prefetched. A file released before it has been warmed is skipped.
+    """
+
+    def __init__(
+        self,
+        files: Iterable[tuple[str, int]],
+        budget: int,
+        warm: Callable[[str], None] = warm_file,
+    ) -> None:
+        """Initialize prefetcher.
+
+        :param files: Paths and sizes of the files in the scraping order
+        :param budget: Maximum bytes of files warmed and not yet released
+        :param warm: Function to warm a file
+        """
+        self.files = list(files)
+        self.budget = budget
+        self.warm = warm
+        self._condition = threading.Condition()
+        # Sizes of the files warmed and not released
+        self._warmed: dict[str, int] = {}
+        self._warmed_bytes = 0
+        self._released: set[str] = set()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        """Warm the files within the budget until stopped."""
+        for (path, size) in self.files:
+            if size > self.budget:
+                continue
+            with self._condition:
+                self._condition.wait_for(
+                    lambda size=size: self._stopped
+                    or self._warmed_bytes + size <= self.budget)
+                if self._stopped:
+                    return
+                if path in self._released:
+                    continue
+                self._warmed[path] = size
+                self._warmed_bytes += size
+            try:
+                self.warm(path)
+            except OSError:
+                # The file is read again by the scraper, which reports
+                # the error
+                pass
+
+    def start(self) -> None:
+        """Start prefetching."""
+        self._thread.start()
+
+    def release(self, path: str) -> None:
+        """Release a file after it has been scraped.
+
+        :param path: Path of the file
+        """
+        with self._condition:
+            if path in self._warmed:
+                self._warmed_bytes -= self._warmed.pop(path)
+            else:
+                self._released.add(path)
+            self._condition.notify()
+
+    def close(self) -> None:
+        """Stop prefetching."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def __enter__(self) -> Prefetcher:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,155 @@
+"""Profiling of the compile and validate commands.
+
+A profiled process writes two files: ``<prefix>.pstats`` with the
+deterministic profile of cProfile, to be read with :mod:`pstats` or e.g.
+snakeviz, and ``<prefix>.collapsed`` with the call stacks sampled at
+regular intervals, in the collapsed format of flamegraph.pl and
+speedscope.
+
+Worker processes are profiled if the environment variable
+``SIP_COMPILER_PROFILE`` is set to a path prefix. The profiles of each
+worker are written with the process ID and a sequence number added to the
+prefix. The variable is set by the ``--profile`` option, so that the
+worker processes started by the command are profiled too, and it can be
+set for the ``serve`` command to profile its jobs.
+"""
+from __future__ import annotations
+
+import contextlib
+import cProfile
+import itertools
+import multiprocessing
+import os
+import sys
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+# Environment variable for the path prefix of the worker profiles
+PROFILE_ENV = "SIP_COMPILER_PROFILE"
+
+# Interval of sampling the call stacks in seconds
+SAMPLE_INTERVAL = 0.005
+
+_sequence = itertools.count(1)
+
+# ID of the process being profiled. Worker processes started with fork
+# inherit the value of their parent.
+_profiled_pid: int | None = None
+
+
+def _frame_name(frame) -> str:
+    """Name of a stack frame in the collapsed stacks."""
+    code = frame.f_code
+    filename = code.co_filename.replace(";", ":")
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Sample the call stack of a thread in a background thread."""
+
+    def __init__(self, thread_id: int,
+                 interval: float = SAMPLE_INTERVAL) -> None:
+        """Initialize sampler.
+
+        :param thread_id: Identifier of the sampled thread
+        :param interval: Sampling interval in seconds
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        # Number of samples by collapsed stack
+        self.stacks: dict[str, int] = {}
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        """Sample until stopped."""
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(  # pylint: disable=W0212
+                self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                names.append(_frame_name(frame))
+                frame = frame.f_back
+            stack = ";".join(reversed(names))
+            self.stacks[stack] = self.stacks.get(stack, 0) + 1
+
+    def start(self) -> None:
+        """Start sampling."""
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling."""
+        self._stopped.set()
+        self._thread.join()
+
+    def write(self, path: str) -> None:
+        """Write the collapsed stacks with their sample counts.
+
+        :param path: Path of the output file
+        """
+        with open(path, "w", encoding="utf-8") as outfile:
+            for (stack, count) in sorted(self.stacks.items()):
+                outfile.write(f"{stack} {count}\n")
+
+
+@contextlib.contextmanager
+def profile(prefix: str) -> Iterator[None]:
+    """Profile the current thread within the context.
+
+    :param prefix: Path prefix of the ``.pstats`` and ``.collapsed``
+        files written when the context exits
+    """
+    global _profiled_pid  # pylint: disable=global-statement
+    profiler = cProfile.Profile()
+    sampler = StackSampler(threading.get_ident())
+    sampler.start()
+    profiler.enable()
+    _profiled_pid = os.getpid()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        _profiled_pid = None
+        sampler.stop()
+        profiler.dump_stats(f"{prefix}.pstats")
+        sampler.write(f"{prefix}.collapsed")
+
+
+@contextlib.contextmanager
+def profile_command(prefix: str | None) -> Iterator[None]:
+    """Profile a command and the worker processes it starts.
+
+    :param prefix: Path prefix of the profiles, or None to not profile
+    """
+    if not prefix:
+        yield
+        return
+    os.environ[PROFILE_ENV] = prefix
+    try:
+        with profile(prefix):
+            yield
+    finally:
+        del os.environ[PROFILE_ENV]
+
+
+def profile_worker() -> contextlib.AbstractContextManager:
+    """Profile a worker process if enabled by the environment variable.
+
+    Nothing is profiled in the main process, or if the process is already
+    being profiled, so that the function can be used in code run both in
+    the main process and in worker processes.
+
+    :returns: Context manager profiling the context, or doing nothing if
+        profiling is not enabled
+    """
+    prefix = os.environ.get(PROFILE_ENV)
+    if (not prefix or multiprocessing.parent_process() is None
+            or _profiled_pid == os.getpid()):
+        # The main process is profiled by profile_command
+        return contextlib.nullcontext()
+    return profile(f"{prefix}.{os.getpid()}.{next(_sequence)}")
@@ -0,0 +1,80 @@
+"""On-disk store for scraper results of large SIPs."""
+from __future__ import annotations
+
+import pickle
+import sqlite3
+from collections.abc import MutableMapping
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+
+class ScraperResultStore(MutableMapping):
+    """Scraper results by object identifier, stored in SQLite.
+
+    Can be used in place of the ``scraper_results`` dict of SIP metadata.
+    The scraper results are not kept in memory, each result is read from
+    the disk when it is accessed. Modifying a result returned by the store
+    does not change the stored result, it must be stored again.
+    """
+
+    def __init__(self, path: str | None = None) -> None:
+        """Initialize store.
+
+        :param path: Path of the database file. By default, a temporary
+            database is created and it is removed when the store is closed.
+        """
+        self._connection = sqlite3.connect(path or "")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS scraper_results "
+            "(obj_identifier TEXT PRIMARY KEY, result BLOB NOT NULL)")
+
+    def __getitem__(self, obj_identifier: str) -> dict:
+        row = self._connection.execute(
+            "SELECT result FROM scraper_results WHERE obj_identifier = ?",
+            (obj_identifier,)).fetchone()
+        if row is None:
+            raise KeyError(obj_identifier)
+        return pickle.loads(row[0])
+
+    def __setitem__(self, obj_identifier: str, result: dict) -> None:
+        self._connection.execute(
+            "INSERT OR REPLACE INTO scraper_results VALUES (?, ?)",
+            (obj_identifier,
+             pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)))
+
+    def __delitem__(self, obj_identifier: str) -> None:
+        cursor = self._connection.execute(
+            "DELETE FROM scraper_results WHERE obj_identifier = ?",
+            (obj_identifier,))
+        if cursor.rowcount == 0:
+            raise KeyError(obj_identifier)
+
+    def __iter__(self) -> Iterator[str]:
+        # Fetch the identifiers first, so that the store can be modified
+        # while iterating
+        rows = self._connection.execute(
+            "SELECT obj_identifier FROM scraper_results ORDER BY rowid"
+        ).fetchall()
+        return (row[0] for row in rows)
+
+    def __len__(self) -> int:
+        return self._connection.execute(
+            "SELECT COUNT(*) FROM scraper_results").fetchone()[0]
+
+    def __contains__(self, obj_identifier: object) -> bool:
+        return self._connection.execute(
+            "SELECT 1 FROM scraper_results WHERE obj_identifier = ?",
+            (obj_identifier,)).fetchone() is not None
+
+    def __enter__(self) -> ScraperResultStore:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Write the pending changes and close the database."""
+        self._connection.commit()
+        self._connection.close()
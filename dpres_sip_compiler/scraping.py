@@ -0,0 +1,462 @@
+"""Run file scraping jobs in worker processes."""
+from __future__ import annotations
+
+import gzip
+import heapq
+import json
+import mimetypes
+import multiprocessing
+import multiprocessing.connection
+import os
+import resource
+import signal
+import time
+import traceback
+from collections import deque
+from typing import TYPE_CHECKING, NamedTuple
+
+from dpres_sip_compiler.constants import HEAVY_MIMETYPE_PREFIXES
+from dpres_sip_compiler.profiling import profile_worker
+from dpres_sip_compiler.timing import timed_call
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Hashable, Iterable, Iterator
+    from multiprocessing.connection import Connection
+    from multiprocessing.context import BaseContext
+
+
+class Job(NamedTuple):
+    """Job for :func:`run_jobs`."""
+
+    # Key identifying the job in the results
+    key: Hashable
+    # Arguments for the function
+    args: tuple
+    # Size of the job, e.g. file size. Larger jobs are started first.
+    size: int = 0
+    # Whether the job runs heavy tools, e.g. video analysis
+    heavy: bool = False
+    # Wall-clock time limit in seconds, or None
+    timeout: float | None = None
+    # Address space limit in bytes, or None
+    memory_limit: int | None = None
+
+
+class JobFailure(NamedTuple):
+    """Result of a job that was stopped by the supervisor."""
+
+    # Reason of the failure, e.g. "timeout"
+    reason: str
+    # Description of the failure
+    message: str
+
+
+def is_heavy(filepath: str, mimetype: str | None = None) -> bool:
+    """Whether scraping the file runs heavy tools.
+
+    Audio and video files are analyzed with tools such as FFmpeg and
+    DVAnalyzer, which take much longer and need more memory than the
+    tools for other files.
+
+    :param filepath: Path to the file
+    :param mimetype: Predefined MIME type, guessed from the file name if
+        not given
+    :returns: True for audio and video files
+    """
+    return guess_mimetype(filepath, mimetype).startswith(
+        HEAVY_MIMETYPE_PREFIXES)
+
+
+def guess_mimetype(filepath: str, mimetype: str | None = None) -> str:
+    """MIME type of a file before it is scraped.
+
+    :param filepath: Path to the file
+    :param mimetype: Predefined MIME type, guessed from the file name if
+        not given
+    :returns: MIME type, or an empty string if it can not be guessed
+    """
+    return mimetype or mimetypes.guess_type(filepath)[0] or ""
+
+
+def _next_job(queues: dict[bool, deque[Job]], running: Iterable[Job],
+              heavy_workers: int) -> Job | None:
+    """Take the largest queued job that may be started.
+
+    :param queues: Queues of heavy (True) and other (False) jobs, in
+        descending order of size
+    :param running: Running jobs
+    :param heavy_workers: Maximum number of heavy jobs running at a time
+    :returns: Job to start, or None if no job may be started
+    """
+    candidates = [queues[False]]
+    if sum(job.heavy for job in running) < heavy_workers:
+        candidates.append(queues[True])
+    candidates = [queue for queue in candidates if queue]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda queue: queue[0].size).popleft()
+
+
+def _job_queues(jobs: Iterable[Job | tuple]) -> dict[bool, deque[Job]]:
+    """Queues of heavy (True) and other (False) jobs, in descending order
+    of size, see :func:`_next_job`.
+    """
+    queues: dict[bool, deque[Job]] = {False: deque(), True: deque()}
+    for job in sorted((Job(*job) for job in jobs),
+                      key=lambda job: job.size, reverse=True):
+        queues[job.heavy].append(job)
+    return queues
+
+
+def dispatch_order(
+    jobs: Iterable[Job | tuple],
+    workers: int = 1,
+    heavy_workers: int | None = None,
+    supervised: bool = False,
+) -> list[Job]:
+    """Estimated order in which :func:`run_jobs` starts the jobs.
+
+    With one worker and without supervision, the jobs are run in the
+    given order. Otherwise, the dispatching of the supervisor is
+    simulated with the limit of heavy jobs, assuming that the duration of
+    a job is proportional to its size. This is the order in which the
+    files of the jobs are needed, e.g. for prefetching.
+
+    :param jobs: Iterable of jobs, or of tuples of job key and arguments
+    :param workers: Number of worker processes
+    :param heavy_workers: Maximum number of heavy jobs running at a time,
+        by default the number of workers
+    :param supervised: Whether the jobs are run in worker processes even
+        with one worker
+    :returns: Jobs in the estimated order of starting
+    """
+    if workers <= 1 and not supervised:
+        return [Job(*job) for job in jobs]
+    workers = max(1, workers)
+    heavy_workers = max(1, workers if heavy_workers is None
+                        else heavy_workers)
+    queues = _job_queues(jobs)
+    # Running jobs by estimated finishing time
+    running: list[tuple[float, int, Job]] = []
+    order: list[Job] = []
+    now = 0.0
+    while queues[False] or queues[True]:
+        while len(running) < workers:
+            job = _next_job(queues, [item[2] for item in running],
+                            heavy_workers)
+            if job is None:
+                break
+            order.append(job)
+            heapq.heappush(running, (now + job.size, len(order), job))
+        (now, _, _) = heapq.heappop(running)
+    return order
+
+
+def _current_rss() -> int:
+    """Resident set size of the current process in bytes.
+
+    The peak resident set size is used if the current size is not
+    available, i.e. outside Linux.
+    """
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _worker_main(conn: Connection, func: Callable) -> None:
+    """Run jobs received from the supervisor until None is received.
+
+    The worker starts a new session, so that the tools started by the
+    jobs are in its process group and can be killed together with it.
+    The worker is profiled if profiling is enabled.
+    """
+    os.setsid()
+    with profile_worker():
+        _worker_loop(conn, func)
+
+
+def _worker_loop(conn: Connection, func: Callable) -> None:
+    """Run jobs received from the supervisor until None is received.
+
+    Each job is run with the address space limit of the job, which also
+    applies to the tools started by the function. The resident set size
+    of the worker is sent together with each result.
+    """
+    limits = resource.getrlimit(resource.RLIMIT_AS)
+    while True:
+        message = conn.recv()
+        if message is None:
+            return
+        (args, memory_limit) = message
+        if memory_limit:
+            if limits[1] != resource.RLIM_INFINITY:
+                memory_limit = min(memory_limit, limits[1])
+            resource.setrlimit(resource.RLIMIT_AS, (memory_limit, limits[1]))
+        try:
+            result = ("ok", func(*args))
+        except MemoryError:
+            result = ("failed", JobFailure(
+                "memory", f"Memory limit of {memory_limit} bytes exceeded"))
+        except Exception as error:  # pylint: disable=broad-except
+            result = ("error", error)
+        finally:
+            if memory_limit:
+                resource.setrlimit(resource.RLIMIT_AS, limits)
+        try:
+            conn.send(result + (_current_rss(),))
+        except Exception:  # pylint: disable=broad-except
+            # E.g. an exception that can not be pickled
+            conn.send(("error", RuntimeError(traceback.format_exc()),
+                       _current_rss()))
+
+
+class _Worker:
+    """Worker process run by the supervisor."""
+
+    def __init__(self, context: BaseContext, func: Callable) -> None:
+        """Start worker process.
+
+        :param context: Multiprocessing context
+        :param func: Function to call for the jobs
+        """
+        (self.conn, child_conn) = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_conn, func), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.job: Job | None = None
+        self.deadline: float | None = None
+        # Number of jobs finished by the worker
+        self.finished = 0
+
+    def submit(self, job: Job) -> None:
+        """Send job to the worker."""
+        self.job = job
+        self.deadline = None
+        if job.timeout:
+            self.deadline = time.monotonic() + job.timeout
+        self.conn.send((job.args, job.memory_limit))
+
+    def stop(self) -> None:
+        """Stop the worker.
+
+        An idle worker is asked to exit. A worker still running a job, or
+        crashed in a job, is killed together with its process group, so
+        that the tools started by the job do not keep running. A worker
+        that has not yet started its own process group is killed alone.
+        """
+        if self.job is None and self.process.is_alive():
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass
+            self.process.join(timeout=5)
+        if self.job is not None or self.process.is_alive():
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                self.process.kill()
+            self.process.join(timeout=5)
+            if self.process.is_alive():
+                self.process.kill()
+                self.process.join(timeout=5)
+        self.conn.close()
+
+
+def _run_supervised(
+    func: Callable,
+    queues: dict[bool, deque[Job]],
+    workers: int,
+    heavy_workers: int,
+    max_jobs_per_worker: int | None = None,
+    max_worker_rss: int | None = None,
+    crash_retries: int = 1,
+) -> Iterator[tuple[Hashable, object]]:
+    """Run queued jobs in supervised worker processes.
+
+    A worker running a job longer than its timeout is killed and
+    replaced, and the job gets a :class:`JobFailure` as its result. A
+    job crashing its worker is retried in a new worker before it fails.
+    A worker is recycled after ``max_jobs_per_worker`` jobs, or when its
+    resident set size exceeds ``max_worker_rss`` bytes after a job.
+    """
+    context = multiprocessing.get_context()
+    idle = [_Worker(context, func) for _ in range(workers)]
+    busy: dict[Connection, _Worker] = {}
+    crashes: dict[Hashable, int] = {}
+    try:
+        while queues[False] or queues[True] or busy:
+            while idle:
+                job = _next_job(queues, [worker.job for worker in
+                                         busy.values()], heavy_workers)
+                if job is None:
+                    break
+                worker = idle.pop()
+                worker.submit(job)
+                busy[worker.conn] = worker
+
+            deadlines = [worker.deadline for worker in busy.values()
+                         if worker.deadline is not None]
+            timeout = None
+            if deadlines:
+                timeout = max(0.0, min(deadlines) - time.monotonic())
+            for conn in multiprocessing.connection.wait(list(busy), timeout):
+                worker = busy.pop(conn)
+                job = worker.job
+                try:
+                    (status, result, rss) = conn.recv()
+                except EOFError:
+                    worker.stop()
+                    idle.append(_Worker(context, func))
+                    crashes[job.key] = crashes.get(job.key, 0) + 1
+                    if crashes[job.key] <= crash_retries:
+                        # Only the crashed job is run again
+                        queues[job.heavy].appendleft(job)
+                        continue
+                    yield (job.key, JobFailure(
+                        "crash", f"Worker process exited with code "
+                                 f"{worker.process.exitcode}"))
+                    continue
+                worker.job = None
+                worker.finished += 1
+                if ((max_jobs_per_worker
+                     and worker.finished >= max_jobs_per_worker)
+                        or (max_worker_rss and rss > max_worker_rss)):
+                    worker.stop()
+                    worker = _Worker(context, func)
+                idle.append(worker)
+                if status == "error":
+                    raise result
+                yield (job.key, result)
+
+            now = time.monotonic()
+            for (conn, worker) in list(busy.items()):
+                if worker.deadline is not None and worker.deadline <= now:
+                    del busy[conn]
+                    job = worker.job
+                    worker.stop()
+                    idle.append(_Worker(context, func))
+                    yield (job.key, JobFailure(
+                        "timeout", f"Time limit of {job.timeout} s "
+                                   f"exceeded"))
+    finally:
+        for worker in idle + list(busy.values()):
+            worker.stop()
+
+
+def run_jobs(
+    func: Callable,
+    jobs: Iterable[Job | tuple],
+    workers: int = 1,
+    heavy_workers: int | None = None,
+    supervised: bool = False,
+    max_jobs_per_worker: int | None = None,
+    max_worker_rss: int | None = None,
+    crash_retries: int = 1,
+) -> Iterator[tuple[Hashable, object]]:
+    """Call function for each job and yield the results.
+
+    With one worker, the jobs are run in the main process in the given
+    order, and the results are yielded in the same order, unless the
+    jobs are supervised.
+
+    With more than one worker, or when supervised, the jobs are run in
+    worker processes. The function, its arguments and its result must
+    then be picklable. The largest jobs are started first, so that a few
+    large jobs do not keep one worker busy long after the others are
+    done. Heavy jobs are limited separately. The results are yielded in
+    the order they are finished. A job exceeding its time or memory
+    limit gets a :class:`JobFailure` as its result, and the other jobs
+    are continued. A job crashing its worker is retried in a new worker,
+    and it fails only if it crashes again.
+
+    Memory leaked by the function, or by native libraries it uses, is
+    released by recycling the worker processes: a worker is replaced
+    after a number of jobs, or when it has grown too large.
+
+    :param func: Function to call, e.g. a static scraping method
+    :param jobs: Iterable of jobs, or of tuples of job key and arguments
+    :param workers: Number of worker processes
+    :param heavy_workers: Maximum number of heavy jobs running at a time,
+        by default the number of workers
+    :param supervised: Whether to run the jobs in worker processes even
+        with one worker, as needed for the time and memory limits
+    :param max_jobs_per_worker: Number of jobs after which a worker
+        process is replaced, by default never
+    :param max_worker_rss: Resident set size in bytes after which a worker
+        process is replaced, by default unlimited
+    :param crash_retries: Number of times a job crashing its worker is
+        retried
+    :returns: Iterator of job keys and function results
+    """
+    if workers <= 1 and not supervised:
+        for job in jobs:
+            job = Job(*job)
+            yield (job.key, func(*job.args))
+        return
+
+    workers = max(1, workers)
+    if heavy_workers is None:
+        heavy_workers = workers
+    heavy_workers = max(1, heavy_workers)
+    yield from _run_supervised(func, _job_queues(jobs), workers, heavy_workers,
+                               max_jobs_per_worker=max_jobs_per_worker,
+                               max_worker_rss=max_worker_rss,
+                               crash_retries=crash_retries)
+
+
+def trim_scraper_info(info: dict) -> dict:
+    """Drop the verbose output of the tools from scraper info.
+
+    The scraper class and the used tools are kept. The messages are
+    dropped, and only the first line of each error is kept, so that the
+    failed scrapers can still be detected.
+
+    :param info: Scraper info by scraper index
+    :returns: Trimmed scraper info
+    """
+    return {
+        index: {
+            "class": scraper_info.get("class"),
+            "tools": scraper_info.get("tools", []),
+            "messages": [],
+            "errors": [str(error).split("\n", 1)[0]
+                       for error in scraper_info.get("errors", [])]
+        }
+        for (index, scraper_info) in info.items()
+    }
+
+
+def scrape_job(
+    scrape_func: Callable,
+    args: tuple,
+    obj_identifier: str,
+    trim_info: bool = False,
+    diagnostics: bool = False,
+) -> tuple[dict, bytes | None, float]:
+    """Scrape a file and apply the retention policy to the result.
+
+    Run in the worker processes, so that only the retained part of the
+    result is sent to the main process.
+
+    :param scrape_func: Scraping function, e.g. ``SipMetadata.scrape_file``
+    :param args: Arguments for the scraping function
+    :param obj_identifier: Identifier of the scraped object
+    :param trim_info: Whether to trim the scraper info
+    :param diagnostics: Whether to return the full scraper info as
+        diagnostics
+    :returns: Tuple of the scraper result, the diagnostics as a gzip
+        member of one JSON line, or None without diagnostics, and the
+        scraping duration in seconds
+    """
+    (result, duration) = timed_call(scrape_func, *args)
+    diagnostics_member = None
+    if diagnostics:
+        line = json.dumps({"object_identifier": obj_identifier,
+                           "info": result["info"]}, default=str)
+        diagnostics_member = gzip.compress(f"{line}\n".encode("utf-8"))
+    if trim_info:
+        result["info"] = trim_scraper_info(result["info"])
+    return (result, diagnostics_member, duration)
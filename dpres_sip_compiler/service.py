@@ -0,0 +1,443 @@
+"""Local compile and validate service with a pool of warm workers.
+
+The service accepts jobs as JSON over HTTP, either on a Unix socket or
+on a TCP port bound to the loopback interface:
+
+* ``POST /jobs`` submits a job and returns its status with the job ID
+* ``GET /jobs/<id>`` returns the status of a job
+* ``GET /jobs`` returns the status of all jobs
+
+A job is a JSON object with the keys ``type`` ("compile" or
+"validate"), ``source_path``, ``config`` and optionally ``options``.
+"""
+from __future__ import annotations
+
+import datetime
+import http.client
+import json
+import multiprocessing
+import os
+import queue
+import socket
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler
+from typing import TYPE_CHECKING
+from uuid import uuid4
+
+from dpres_sip_compiler.adaptor_list import ADAPTOR_DICT, import_adaptor
+from dpres_sip_compiler.profiling import profile_worker
+
+if TYPE_CHECKING:
+    from multiprocessing.connection import Connection
+
+COMPILE_OPTIONS = ("tar_file", "descriptive_metadata_paths", "content_id",
+                   "sip_id", "validation", "workers", "low_memory",
+                   "diagnostics_file", "dedup", "hardlink_duplicates",
+                   "heavy_workers", "timing_report", "metrics_file",
+                   "prefetch_bytes", "max_sip_bytes", "max_sip_objects",
+                   "parallel_parts")
+VALIDATE_OPTIONS = ("valid_output", "invalid_output", "summary")
+JOB_OPTIONS = {
+    "compile": COMPILE_OPTIONS,
+    "validate": VALIDATE_OPTIONS
+}
+
+
+def _warm_up() -> None:
+    """Import the compiler, file-scraper and the adaptors in a worker
+    process before it receives any jobs.
+    """
+    # pylint: disable=import-outside-toplevel, unused-import
+    import dpres_sip_compiler.compiler
+    import dpres_sip_compiler.validate
+
+    for dotted_path in ADAPTOR_DICT.values():
+        import_adaptor(dotted_path)
+
+
+def _run_job(job_type: str, source_path: str, conf_file: str,
+             options: dict) -> dict:
+    """Run a job in a worker process.
+
+    The job is profiled if the environment variable of
+    :mod:`dpres_sip_compiler.profiling` is set.
+
+    :param job_type: "compile" or "validate"
+    :param source_path: Source path of the files
+    :param conf_file: Path of the configuration file
+    :param options: Job type specific options
+    :returns: Result of the job
+    """
+    with profile_worker():
+        return _execute_job(job_type, source_path, conf_file, options)
+
+
+def _execute_job(job_type: str, source_path: str, conf_file: str,
+                 options: dict) -> dict:
+    """Run a compile or validate job.
+
+    :returns: Result of the job
+    """
+    # pylint: disable=import-outside-toplevel
+    from dpres_sip_compiler.config import load_config
+
+    if job_type == "compile":
+        from dpres_sip_compiler.compiler import compile_sip
+
+        compile_sip(source_path, conf_file=conf_file, **options)
+        return {"tar_file": options["tar_file"]}
+
+    from dpres_sip_compiler.validate import scrape_files, write_result
+
+    config = load_config(conf_file)
+    valid_output = options.get("valid_output",
+                               "./validate_files_valid.jsonl")
+    invalid_output = options.get("invalid_output",
+                                 "./validate_files_invalid.jsonl")
+    valid_files_count = 0
+    invalid_files_count = 0
+    timeout_files_count = 0
+    for file_info in scrape_files(source_path, config):
+        if write_result(file_info, valid_output, invalid_output,
+                        options.get("summary", False)):
+            valid_files_count += 1
+        else:
+            invalid_files_count += 1
+        if file_info.get("failure", {}).get("reason") == "timeout":
+            timeout_files_count += 1
+    return {"valid": valid_files_count, "invalid": invalid_files_count,
+            "timeout": timeout_files_count}
+
+
+def _worker_main(conn: Connection) -> None:
+    """Run jobs received from the service until None is received.
+
+    The worker is warmed up first. Warming up only saves time in the
+    jobs, so its errors are ignored: a job needing a module that can not
+    be imported fails with the import error.
+    """
+    try:
+        _warm_up()
+    except Exception:  # pylint: disable=broad-except
+        pass
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        try:
+            reply = ("finished", _run_job(*message), None)
+        except Exception as error:  # pylint: disable=broad-except
+            reply = ("failed", None, f"{type(error).__name__}: {error}")
+        conn.send(reply)
+
+
+class _JobWorker:
+    """Warm worker process running one job at a time.
+
+    The process is not daemonic, so that the jobs can start worker
+    processes of their own, e.g. for scraping files or for the SIP
+    parts.
+    """
+
+    def __init__(self) -> None:
+        """Start worker process."""
+        (self.conn, child_conn) = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=_worker_main, args=(child_conn,), daemon=False)
+        self.process.start()
+        child_conn.close()
+
+    def run(self, args: tuple) -> tuple[str, dict | None, str | None]:
+        """Run job in the worker and wait for it to finish.
+
+        :param args: Arguments of :func:`_run_job`
+        :returns: Status, result and error of the job. The job fails if
+            the worker process exits, e.g. when it is killed for running
+            out of memory.
+        """
+        try:
+            self.conn.send(args)
+            return self.conn.recv()
+        except (EOFError, OSError):
+            self.process.join()
+            return ("failed", None, f"Worker process exited with code "
+                                    f"{self.process.exitcode}")
+
+    def stop(self) -> None:
+        """Stop the worker after its current job."""
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join()
+        self.conn.close()
+
+
+def _now() -> str:
+    """Current time as ISO 8601 string."""
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+class JobService:
+    """Queue of compile and validate jobs run in a pool of workers.
+
+    At most ``workers`` jobs are run at the same time, and at most
+    ``queue_size`` jobs may wait for a free worker. A worker process
+    exiting in the middle of a job is replaced, and the job fails.
+    """
+
+    def __init__(self, workers: int = 2, queue_size: int = 100) -> None:
+        """Initialize service.
+
+        :param workers: Number of worker processes
+        :param queue_size: Maximum number of jobs waiting for a worker
+        """
+        self.workers = workers
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        # Workers not running a job
+        self._idle: queue.Queue[_JobWorker] = queue.Queue()
+        self._jobs: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._dispatcher = None
+
+    def start(self) -> None:
+        """Start the worker processes and the job dispatcher."""
+        for _ in range(self.workers):
+            self._idle.put(_JobWorker())
+        self._dispatcher = threading.Thread(target=self._dispatch,
+                                            daemon=True)
+        self._dispatcher.start()
+
+    def close(self) -> None:
+        """Stop dispatching and wait for the running jobs to finish."""
+        if self._dispatcher is None:
+            return
+        self._queue.put(None)
+        self._dispatcher.join()
+        # Each worker is returned to the idle queue after its job
+        for _ in range(self.workers):
+            self._idle.get().stop()
+
+    def submit(self, request: dict) -> dict:
+        """Add job to the queue.
+
+        :param request: Job as a dict, see module documentation
+        :returns: Status of the job
+        :raises ValueError: If the job is invalid
+        :raises queue.Full: If the queue is full
+        """
+        job_type = request.get("type")
+        if job_type not in JOB_OPTIONS:
+            raise ValueError(f"Unsupported job type: {job_type}")
+        for key in ("source_path", "config"):
+            if not isinstance(request.get(key), str):
+                raise ValueError(f"Missing or invalid value for {key}")
+        options = request.get("options", {})
+        if not isinstance(options, dict):
+            raise ValueError("Options must be given as an object")
+        unknown = set(options) - set(JOB_OPTIONS[job_type])
+        if unknown:
+            raise ValueError(
+                f"Unsupported options: {', '.join(sorted(unknown))}")
+        if job_type == "compile" and "tar_file" not in options:
+            raise ValueError("Missing option tar_file")
+
+        job = {
+            "id": str(uuid4()),
+            "type": job_type,
+            "source_path": request["source_path"],
+            "config": request["config"],
+            "options": options,
+            "status": "queued",
+            "submitted": _now(),
+            "started": None,
+            "finished": None,
+            "result": None,
+            "error": None
+        }
+        with self._lock:
+            self._queue.put_nowait(job["id"])
+            self._jobs[job["id"]] = job
+            return dict(job)
+
+    def status(self, job_id: str) -> dict | None:
+        """Return status of a job, or None if the job does not exist."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def jobs(self) -> list[dict]:
+        """Return status of all jobs in submission order."""
+        with self._lock:
+            return [dict(job) for job in self._jobs.values()]
+
+    def _dispatch(self) -> None:
+        """Pass queued jobs to the workers whenever a worker is free."""
+        while True:
+            job_id = self._queue.get()
+            if job_id is None:
+                return
+            worker = self._idle.get()
+            with self._lock:
+                job = self._jobs[job_id]
+                job["status"] = "running"
+                job["started"] = _now()
+                args = (job["type"], job["source_path"], job["config"],
+                        job["options"])
+            threading.Thread(target=self._run, args=(job_id, worker, args),
+                             daemon=True).start()
+
+    def _run(self, job_id: str, worker: _JobWorker, args: tuple) -> None:
+        """Run a job in a worker, and replace the worker if it exited."""
+        (status, result, error) = worker.run(args)
+        if not worker.process.is_alive():
+            worker.stop()
+            worker = _JobWorker()
+        self._finish(job_id, status, result=result, error=error)
+        self._idle.put(worker)
+
+    def _finish(self, job_id: str, status: str, result: dict | None = None,
+                error: str | None = None) -> None:
+        """Record the outcome of a job."""
+        with self._lock:
+            job = self._jobs[job_id]
+            job["status"] = status
+            job["finished"] = _now()
+            job["result"] = result
+            job["error"] = error
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """HTTP interface of the job service."""
+
+    server: UnixHTTPServer | LocalHTTPServer
+
+    def address_string(self) -> str:
+        """Client address for the log, Unix sockets have no address."""
+        if isinstance(self.client_address, tuple):
+            return super().address_string()
+        return "local"
+
+    def _send_json(self, code: int, data: dict | list) -> None:
+        """Send JSON response."""
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # pylint: disable=invalid-name
+    def do_GET(self) -> None:
+        """Return status of one or all jobs."""
+        service = self.server.service
+        if self.path.rstrip("/") == "/jobs":
+            self._send_json(200, service.jobs())
+            return
+        if self.path.startswith("/jobs/"):
+            job = service.status(self.path[len("/jobs/"):])
+            if job is not None:
+                self._send_json(200, job)
+                return
+        self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self) -> None:
+        """Submit a job."""
+        if self.path.rstrip("/") != "/jobs":
+            self._send_json(404, {"error": "Not found"})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length))
+            if not isinstance(request, dict):
+                raise ValueError("Job must be given as an object")
+            job = self.server.service.submit(request)
+        except ValueError as error:
+            self._send_json(400, {"error": str(error)})
+            return
+        except queue.Full:
+            self._send_json(503, {"error": "Job queue is full"})
+            return
+        self._send_json(202, job)
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn,
+                     socketserver.UnixStreamServer):
+    """HTTP server on a Unix socket."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, service: JobService) -> None:
+        """Initialize server.
+
+        :param socket_path: Path of the Unix socket
+        :param service: Job service
+        """
+        self.service = service
+        super().__init__(socket_path, JobRequestHandler)
+
+
+class LocalHTTPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    """HTTP server on the loopback interface."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port: int, service: JobService) -> None:
+        """Initialize server.
+
+        :param port: TCP port, 0 for any free port
+        :param service: Job service
+        """
+        self.service = service
+        super().__init__(("127.0.0.1", port), JobRequestHandler)
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP client connection to a Unix socket."""
+
+    def __init__(self, socket_path: str, timeout: float = 60) -> None:
+        """Initialize connection.
+
+        :param socket_path: Path of the Unix socket
+        :param timeout: Socket timeout in seconds
+        """
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        """Connect to the Unix socket."""
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def serve(socket_path: str | None = None, port: int | None = None,
+          workers: int = 2, queue_size: int = 100) -> None:
+    """Run the service until interrupted.
+
+    :param socket_path: Path of the Unix socket to listen
+    :param port: TCP port on the loopback interface to listen, used if
+        no socket path is given
+    :param workers: Number of worker processes
+    :param queue_size: Maximum number of jobs waiting for a worker
+    """
+    service = JobService(workers=workers, queue_size=queue_size)
+    service.start()
+    if socket_path is not None:
+        server = UnixHTTPServer(socket_path, service)
+    else:
+        server = LocalHTTPServer(port, service)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path is not None:
+            os.remove(socket_path)
+        service.close()
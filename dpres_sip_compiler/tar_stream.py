@@ -0,0 +1,253 @@
+"""Sequential tar writer for streaming SIPs to files, pipes and FIFOs."""
+from __future__ import annotations
+
+import os
+import stat
+import sys
+import tarfile
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import BinaryIO, TextIO
+
+COPY_BUFFER_SIZE = 8 * 1024 * 1024
+PROGRESS_INTERVAL = 5.0
+
+
+def format_bytes(size: float) -> str:
+    """Format byte count as a human readable string.
+
+    :param size: Number of bytes
+    :returns: Formatted size, e.g. "1.5 GiB"
+    """
+    for unit in ("B", "KiB", "MiB", "GiB", "TiB"):
+        if abs(size) < 1024 or unit == "TiB":
+            break
+        size /= 1024
+    return f"{size:.1f} {unit}"
+
+
+class ThroughputReporter:
+    """Report the amount of written bytes and throughput periodically."""
+
+    def __init__(
+        self,
+        total_bytes: int | None = None,
+        interval: float = PROGRESS_INTERVAL,
+        output: TextIO | None = None,
+    ) -> None:
+        """Initialize reporter.
+
+        :param total_bytes: Expected number of bytes, or None if unknown
+        :param interval: Minimum number of seconds between reports
+        :param output: Text stream for the reports, defaults to stderr
+        """
+        self.total_bytes = total_bytes
+        self.interval = interval
+        self.output = output
+        self.bytes_done = 0
+        self._start = time.monotonic()
+        self._last_report = self._start
+
+    @property
+    def throughput(self) -> float:
+        """Average throughput in bytes per second."""
+        elapsed = time.monotonic() - self._start
+        if elapsed <= 0:
+            return 0.0
+        return self.bytes_done / elapsed
+
+    def update(self, nbytes: int) -> None:
+        """Add written bytes and report if the interval has passed.
+
+        :param nbytes: Number of bytes written since the previous update
+        """
+        self.bytes_done += nbytes
+        now = time.monotonic()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            self.report()
+
+    def report(self) -> None:
+        """Write a progress line."""
+        line = f"Packaged {format_bytes(self.bytes_done)}"
+        if self.total_bytes:
+            percent = 100 * self.bytes_done / self.total_bytes
+            line += f" of {format_bytes(self.total_bytes)} ({percent:.0f}%)"
+        line += f" at {format_bytes(self.throughput)}/s"
+        print(line, file=self.output or sys.stderr, flush=True)
+
+    def finish(self) -> None:
+        """Write the final progress line."""
+        self.report()
+
+
+class TarStreamWriter:
+    """Write a tar archive sequentially.
+
+    The archive is written strictly front to back, so the output can be
+    a pipe or a FIFO. File contents are copied with ``copy_file_range``
+    or ``sendfile`` when the output has a file descriptor, and with
+    large buffered copies otherwise.
+    """
+
+    def __init__(
+        self,
+        fileobj: BinaryIO,
+        progress: ThroughputReporter | None = None,
+        buffer_size: int = COPY_BUFFER_SIZE,
+    ) -> None:
+        """Initialize writer.
+
+        :param fileobj: Writable binary file object for the archive
+        :param progress: Optional reporter to be updated with copied bytes
+        :param buffer_size: Buffer size for buffered copies
+        """
+        self.fileobj = fileobj
+        self.progress = progress
+        self.buffer_size = buffer_size
+        self.offset = 0
+        self._out_fd: int | None = None
+        self._out_is_file = False
+        try:
+            self._out_fd = fileobj.fileno()
+            self._out_is_file = stat.S_ISREG(os.fstat(self._out_fd).st_mode)
+        except (AttributeError, OSError, ValueError):
+            self._out_fd = None
+
+    def _write(self, data: bytes) -> None:
+        """Write data to the archive through the file object."""
+        self.fileobj.write(data)
+        self.offset += len(data)
+
+    def _pad(self, size: int) -> None:
+        """Pad member data to the tar block size."""
+        remainder = size % tarfile.BLOCKSIZE
+        if remainder:
+            self._write(tarfile.NUL * (tarfile.BLOCKSIZE - remainder))
+
+    def _write_header(self, tarinfo: tarfile.TarInfo) -> None:
+        """Write the header of a member."""
+        self._write(tarinfo.tobuf(
+            tarfile.PAX_FORMAT, tarfile.ENCODING, "surrogateescape"))
+
+    def add_bytes(self, arcname: str, data: bytes) -> None:
+        """Add a member from in-memory data.
+
+        :param arcname: Name of the member in the archive
+        :param data: Content of the member
+        """
+        tarinfo = tarfile.TarInfo(arcname)
+        tarinfo.size = len(data)
+        tarinfo.mtime = int(time.time())
+        tarinfo.mode = 0o644
+        self._write_header(tarinfo)
+        self._write(data)
+        self._pad(len(data))
+
+    def add_file(
+        self,
+        path: str,
+        arcname: str,
+        stat_result: os.stat_result | None = None,
+    ) -> None:
+        """Add a regular file to the archive.
+
+        :param path: Path of the file to add
+        :param arcname: Name of the member in the archive
+        :param stat_result: Stat result of the file, if already known
+        """
+        if stat_result is None:
+            stat_result = os.stat(path)
+        tarinfo = tarfile.TarInfo(arcname)
+        tarinfo.size = stat_result.st_size
+        tarinfo.mtime = int(stat_result.st_mtime)
+        tarinfo.mode = stat.S_IMODE(stat_result.st_mode)
+        tarinfo.uid = stat_result.st_uid
+        tarinfo.gid = stat_result.st_gid
+        with open(path, "rb") as infile:
+            self._write_header(tarinfo)
+            self._copy(infile, tarinfo.size)
+        self._pad(tarinfo.size)
+
+    def add_hardlink(
+        self,
+        arcname: str,
+        linkname: str,
+        stat_result: os.stat_result,
+    ) -> None:
+        """Add a hard link to a member already in the archive.
+
+        The member has no data of its own, so identical files are stored
+        in the archive only once.
+
+        :param arcname: Name of the member in the archive
+        :param linkname: Name of the earlier member with the same content
+        :param stat_result: Stat result of the file of the member
+        """
+        tarinfo = tarfile.TarInfo(arcname)
+        tarinfo.type = tarfile.LNKTYPE
+        tarinfo.linkname = linkname
+        tarinfo.mtime = int(stat_result.st_mtime)
+        tarinfo.mode = stat.S_IMODE(stat_result.st_mode)
+        tarinfo.uid = stat_result.st_uid
+        tarinfo.gid = stat_result.st_gid
+        self._write_header(tarinfo)
+
+    def _copy(self, infile: BinaryIO, size: int) -> None:
+        """Copy exactly size bytes from the input file to the archive."""
+        copied = 0
+        if self._out_fd is not None:
+            self.fileobj.flush()
+            copied = self._copy_fd(infile.fileno(), size)
+            infile.seek(copied)
+        buf = bytearray(self.buffer_size)
+        view = memoryview(buf)
+        while copied < size:
+            nbytes = infile.readinto(view[:min(self.buffer_size,
+                                               size - copied)])
+            if not nbytes:
+                break
+            self._write(view[:nbytes])
+            copied += nbytes
+            if self.progress is not None:
+                self.progress.update(nbytes)
+        if copied != size:
+            raise OSError(
+                f"File {infile.name} changed size during packaging.")
+
+    def _copy_fd(self, in_fd: int, size: int) -> int:
+        """Copy data between file descriptors within the kernel.
+
+        :returns: Number of bytes copied, may be less than requested if
+            the kernel copy is not supported for these files
+        """
+        copied = 0
+        while copied < size:
+            count = min(self.buffer_size, size - copied)
+            try:
+                if self._out_is_file and hasattr(os, "copy_file_range"):
+                    nbytes = os.copy_file_range(in_fd, self._out_fd, count,
+                                                copied)
+                else:
+                    nbytes = os.sendfile(self._out_fd, in_fd, copied, count)
+            except OSError:
+                if copied:
+                    raise
+                return 0
+            if not nbytes:
+                break
+            copied += nbytes
+            self.offset += nbytes
+            if self.progress is not None:
+                self.progress.update(nbytes)
+        return copied
+
+    def close(self) -> None:
+        """Write the end-of-archive marker and pad to the record size."""
+        self._write(tarfile.NUL * (2 * tarfile.BLOCKSIZE))
+        remainder = self.offset % tarfile.RECORDSIZE
+        if remainder:
+            self._write(tarfile.NUL * (tarfile.RECORDSIZE - remainder))
+        self.fileobj.flush()
@@ -0,0 +1,146 @@
+"""Timing report of scraping files."""
+from __future__ import annotations
+
+import heapq
+import json
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+# Default number of the slowest files in the report
+DEFAULT_TOP_FILES = 20
+
+
+def timed_call(func: Callable, *args) -> tuple[object, float]:
+    """Call function and measure its duration.
+
+    :param func: Function to call
+    :param args: Arguments for the function
+    :returns: Tuple of the result and the duration in seconds
+    """
+    start = time.perf_counter()
+    result = func(*args)
+    return (result, time.perf_counter() - start)
+
+
+def _totals(files: int, size: int, duration: float) -> dict:
+    """Totals of a group of files with their throughput."""
+    return {
+        "files": files,
+        "bytes": size,
+        "seconds": round(duration, 6),
+        "bytes_per_second": round(size / duration) if duration else None
+    }
+
+
+class TimingReport:
+    """Scraping durations of files, aggregated by MIME type and tool.
+
+    Only the slowest files are kept with their paths, so the report can
+    be used for any number of files.
+
+    The scraper info does not include durations of the individual tools.
+    The time of a tool is therefore the total scraping time of the files
+    the tool was run on, and the times of the tools overlap.
+    """
+
+    def __init__(self, top: int = DEFAULT_TOP_FILES) -> None:
+        """Initialize report.
+
+        :param top: Number of the slowest files to report
+        """
+        self.top = top
+        self._slowest: list[tuple[float, int, dict]] = []
+        self._count = 0
+        self._totals = [0, 0, 0.0]
+        self._by_mimetype: dict[str, list] = {}
+        self._by_tool: dict[str, list] = {}
+
+    def add(self, path: str, mimetype: str | None, size: int,
+            duration: float, info: dict | None = None) -> None:
+        """Record scraping of a file.
+
+        :param path: Path of the file
+        :param mimetype: MIME type of the file
+        :param size: Size of the file in bytes
+        :param duration: Scraping duration in seconds
+        :param info: Scraper info of the file, used to find the tools
+        """
+        mimetype = mimetype or "(:unav)"
+        tools = {scraper_info.get("class") or "(:unav)"
+                 for scraper_info in (info or {}).values()}
+        groups = [self._totals,
+                  self._by_mimetype.setdefault(mimetype, [0, 0, 0.0])]
+        groups += [self._by_tool.setdefault(tool, [0, 0, 0.0])
+                   for tool in tools]
+        for group in groups:
+            group[0] += 1
+            group[1] += size
+            group[2] += duration
+
+        record = {"path": path, "mimetype": mimetype,
+                  **_totals(1, size, duration)}
+        del record["files"]
+        # The counter keeps the heap from comparing records of files with
+        # the same duration
+        item = (duration, self._count, record)
+        self._count += 1
+        if len(self._slowest) < self.top:
+            heapq.heappush(self._slowest, item)
+        elif self.top:
+            heapq.heappushpop(self._slowest, item)
+
+    def as_dict(self) -> dict:
+        """Report as a dict, with the slowest files and groups first."""
+        def _groups(groups):
+            return {key: _totals(*group) for (key, group) in sorted(
+                groups.items(), key=lambda item: item[1][2], reverse=True)}
+
+        return {
+            "total": _totals(*self._totals),
+            "slowest_files": [
+                record for (_, _, record)
+                in sorted(self._slowest, reverse=True)],
+            "by_mimetype": _groups(self._by_mimetype),
+            "by_tool": _groups(self._by_tool)
+        }
+
+    def write(self, path: str) -> None:
+        """Write report to a JSON file.
+
+        :param path: Path of the report file
+        """
+        with open(path, "w", encoding="utf-8") as outfile:
+            json.dump(self.as_dict(), outfile, indent=2)
+            outfile.write("\n")
+
+
+class _Recorders:
+    """Forward scraping durations to several recorders."""
+
+    def __init__(self, recorders: list) -> None:
+        self.recorders = recorders
+
+    def add(self, *args, **kwargs) -> None:
+        """Record scraping of a file, see :meth:`TimingReport.add`."""
+        for recorder in self.recorders:
+            recorder.add(*args, **kwargs)
+
+
+def combine_recorders(*recorders):
+    """Combine recorders of scraping durations.
+
+    A recorder is e.g. a :class:`TimingReport`, or any object with the
+    same ``add`` method.
+
+    :param recorders: Recorders, or None for the recorders not in use
+    :returns: Combined recorder, or None if there are no recorders
+    """
+    recorders = [recorder for recorder in recorders if recorder is not None]
+    if not recorders:
+        return None
+    if len(recorders) == 1:
+        return recorders[0]
+    return _Recorders(recorders)
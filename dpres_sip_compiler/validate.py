@@ -1,11 +1,17 @@
 """Recursively scrape files in given path."""
+import contextlib
 import datetime
+import json
 import os
-import fnmatch
+from file_scraper.defaults import UNACCEPTABLE
 from file_scraper.scraper import Scraper
 from file_scraper.utils import ensure_text
-from dpres_sip_compiler.base_adaptor import sip_metadata_class
-from dpres_sip_compiler.adaptor_list import ADAPTOR_DICT
+
+from dpres_sip_compiler.file_collector import collect_files
+from dpres_sip_compiler.prefetch import Prefetcher
+from dpres_sip_compiler.scraping import (Job, JobFailure, dispatch_order,
+                                         guess_mimetype, run_jobs)
+from dpres_sip_compiler.timing import timed_call
 
 
 def ignore_concealing_bitstream_errors(scraper_result: dict) -> dict:
@@ -48,22 +54,12 @@ def iterate_files(source_path, config):
     :config: Basic configuration
     :returns: An iterator of list of files
     """
-    excl_patterns = sip_metadata_class(
-        ADAPTOR_DICT, config).exclude_files(config)
+    excl_patterns = config.adaptor_class.exclude_files(config)
     if os.path.isfile(source_path):
         yield source_path
-    for root, _, files in os.walk(source_path):
-        for filename in files:
-            exclude = False
-            path = os.path.join(root, filename)
-            for pattern in excl_patterns:
-                if fnmatch.fnmatch(path, pattern):
-                    exclude = True
-
-            if exclude:
-                continue
-
-            yield path
+        return
+    for (filepath, _) in collect_files(source_path, excl_patterns):
+        yield os.path.join(source_path, filepath)
 
 
 def count_files(path, config):
@@ -80,39 +76,185 @@ def count_files(path, config):
     return total
 
 
-def scrape_files(path, config):
+def scrape_file_info(filepath, ignore_concealing=False):
+    """Scrape the metadata of a file and check the well-formedness and
+    grading.
+
+    :filepath: Path of the file
+    :ignore_concealing: Ignore concealing bitstream errors in DV files
+    :returns: Scraped metadata together with info about the scraper tools
+    """
+    scraper = Scraper(filepath)
+    scraper.scrape(check_wellformed=True)
+
+    results = {
+        "path": str(scraper.filename),
+        "filename": os.path.basename(str(scraper.filename)),
+        "timestamp": datetime.datetime.now(
+            datetime.timezone.utc).isoformat(),
+        "MIME type": ensure_text(scraper.mimetype),
+        "version": ensure_text(scraper.version),
+        "metadata": scraper.streams,
+        "grade": scraper.grade(),
+        "well-formed": scraper.well_formed,
+        "tool_info": scraper.info
+    }
+
+    # If set, ignore concealing bitstream errors in DV files
+    if ignore_concealing:
+        # Only need to check invalid DV files
+        if all((results["well-formed"] is False,
+                results["MIME type"] == "video/dv")):
+            results["well-formed"] = ignore_concealing_bitstream_errors(
+                results)
+
+    return results
+
+
+def failure_info(filepath, failure):
+    """Metadata of a file whose scraping was stopped by the supervisor.
+
+    The file is reported as invalid and unsupported.
+
+    :filepath: Path of the file
+    :failure: JobFailure of the scraping
+    :returns: Metadata in the same form as from scrape_file_info
+    """
+    return {
+        "path": filepath,
+        "filename": os.path.basename(filepath),
+        "timestamp": datetime.datetime.now(
+            datetime.timezone.utc).isoformat(),
+        "MIME type": guess_mimetype(filepath),
+        "version": None,
+        "metadata": {},
+        "grade": UNACCEPTABLE,
+        "well-formed": False,
+        "tool_info": {},
+        "failure": {"reason": failure.reason, "message": failure.message}
+    }
+
+
+def scrape_files(path, config, workers=1, max_files_per_worker=None,
+                 max_worker_rss=None, timing=None, prefetch_bytes=0):
     """Loops all files recursively in given path, scrapes the metadata
     and checks the well-formedness and grading. The function yields the
     scraped metadata together with info about the scraper tools.
 
+    The files are scraped in worker processes if several workers, worker
+    recycling, or time or memory limits are given. A file exceeding its
+    limits, or crashing the worker process also when it is retried, is
+    reported as invalid, with the reason in the "failure" key. The
+    results are then yielded in the order the files are finished.
+
     :path: The path which is recursively processed
     :config: Basic configuration
+    :workers: Number of worker processes
+    :max_files_per_worker: Number of files after which a worker process
+        is replaced, to release memory leaked by the tools
+    :max_worker_rss: Resident set size in bytes after which a worker
+        process is replaced
+    :timing: TimingReport to record the scraping duration of each file.
+        Timed out files are recorded with their time limit.
+    :prefetch_bytes: Byte budget for warming the next files to be scraped
+        in the background, or 0 for no prefetching
     :returns: An iterator of scraped metadata
     """
+    ignore_concealing = config.ignore_concealing_bitstream_errors
+    supervised = any((workers > 1, max_files_per_worker, max_worker_rss,
+                      config.scrape_limits_enabled))
+    if not supervised:
+        filepaths = iterate_files(path, config)
+        prefetcher = None
+        if prefetch_bytes:
+            filepaths = list(filepaths)
+            prefetcher = Prefetcher(
+                ((filepath, os.path.getsize(filepath))
+                 for filepath in filepaths), prefetch_bytes)
+        with prefetcher or contextlib.nullcontext():
+            for filepath in filepaths:
+                (file_info, duration) = timed_call(
+                    scrape_file_info, filepath, ignore_concealing)
+                if prefetcher is not None:
+                    prefetcher.release(filepath)
+                if timing is not None:
+                    _add_timing(timing, file_info, duration)
+                yield file_info
+        return
+
+    jobs = {}
     for filepath in iterate_files(path, config):
+        (timeout, memory_limit) = config.scrape_limits(
+            guess_mimetype(filepath))
+        jobs[filepath] = Job(key=filepath,
+                             args=(scrape_file_info, filepath,
+                                   ignore_concealing),
+                             size=os.path.getsize(filepath),
+                             timeout=timeout,
+                             memory_limit=memory_limit)
+    prefetcher = None
+    if prefetch_bytes:
+        prefetcher = Prefetcher(
+            ((job.key, job.size) for job in dispatch_order(
+                jobs.values(), workers=workers, supervised=True)),
+            prefetch_bytes)
+    with prefetcher or contextlib.nullcontext():
+        for (filepath, result) in run_jobs(
+                timed_call, jobs.values(), workers=workers, supervised=True,
+                max_jobs_per_worker=max_files_per_worker,
+                max_worker_rss=max_worker_rss):
+            if prefetcher is not None:
+                prefetcher.release(filepath)
+            if isinstance(result, JobFailure):
+                file_info = failure_info(filepath, result)
+                duration = None
+                if result.reason == "timeout":
+                    duration = jobs[filepath].timeout
+            else:
+                (file_info, duration) = result
+            if timing is not None and duration is not None:
+                _add_timing(timing, file_info, duration)
+            yield file_info
+
+
+def _add_timing(timing, file_info, duration):
+    """Record the scraping duration of a file to a timing report."""
+    timing.add(file_info["path"], file_info["MIME type"],
+               os.path.getsize(file_info["path"]), duration,
+               file_info["tool_info"])
 
-        scraper = Scraper(filepath)
-        scraper.scrape(check_wellformed=True)
-
-        results = {
-            "path": str(scraper.filename),
-            "filename": os.path.basename(str(scraper.filename)),
-            "timestamp": datetime.datetime.now(
-                datetime.timezone.utc).isoformat(),
-            "MIME type": ensure_text(scraper.mimetype),
-            "version": ensure_text(scraper.version),
-            "metadata": scraper.streams,
-            "grade": scraper.grade(),
-            "well-formed": scraper.well_formed,
-            "tool_info": scraper.info
-        }
 
-        # If set, ignore concealing bitstream errors in DV files
-        if config.ignore_concealing_bitstream_errors:
-            # Only need to check invalid DV files
-            if all((results["well-formed"] is False,
-                    results["MIME type"] == "video/dv")):
-                results["well-formed"] = ignore_concealing_bitstream_errors(
-                    results)
+def write_result(file_info, valid_output, invalid_output, summary=False):
+    """Append scraped metadata of a file to the valid or invalid output.
 
-        yield results
+    :file_info: Scraped metadata from scrape_files
+    :valid_output: Target file for valid and supported files
+    :invalid_output: Target file for invalid or unsupported files
+    :summary: Also write summary information to a separate file named
+        <output>_summary.jsonl
+    :returns: True if the file was valid and supported, False otherwise
+    """
+    valid = file_info['well-formed'] and \
+        file_info['grade'] != UNACCEPTABLE
+    output = valid_output if valid else invalid_output
+    with open(output, 'a') as outfile:
+        json.dump(file_info, outfile)
+        outfile.write('\n')
+    if summary:
+        # Create summary information and write to own output
+        summary_info = {
+            'path': file_info['path'],
+            'filename': file_info['filename'],
+            'timestamp': file_info['timestamp'],
+            'MIME type': file_info['MIME type'],
+            'version': file_info['version'],
+            'grade': file_info['grade'],
+            'well-formed': file_info['well-formed']
+        }
+        if 'failure' in file_info:
+            summary_info['failure'] = file_info['failure']
+        sum_output = '{}_summary{}'.format(*os.path.splitext(output))
+        with open(sum_output, 'a') as outfile:
+            json.dump(summary_info, outfile)
+            outfile.write('\n')
+    return valid
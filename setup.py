@@ -17,6 +17,14 @@ def main():
         entry_points={
             "console_scripts": [
                 "sip-compiler = dpres_sip_compiler.cmd:cli"
+            ],
+            "dpres_sip_compiler.adaptors": [
+                "generic = dpres_sip_compiler.adaptors.generic_adaptor:"
+                "GenericFolderStructure",
+                "musicarchive = dpres_sip_compiler.adaptors.musicarchive:"
+                "SipMetadataMusicArchive",
+                "postalmuseum = dpres_sip_compiler.adaptors.postal_museum:"
+                "SipMetadataPostalMuseum"
             ]
         },
     )
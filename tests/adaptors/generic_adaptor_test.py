@@ -1,4 +1,5 @@
 """Test the generic adaptor."""
+from dpres_sip_compiler import base_adaptor, dedup, identifiers
 from dpres_sip_compiler.adaptors.generic_adaptor import GenericFolderStructure
 from dpres_sip_compiler.config import Config
 
@@ -18,6 +19,73 @@ def test_populate():
     assert 'test_file_02.txt' in filepaths
 
 
+def test_deterministic_identifiers(tmp_path):
+    """Test that the object identifiers are derived from the path and
+    content of the files if enabled in the configuration.
+    """
+    conf_file = tmp_path / "config.conf"
+    with open("tests/data/generic/generic.conf", encoding="utf-8") as infile:
+        conf_file.write_text(
+            infile.read() + "deterministic_identifiers=true\n")
+    source_path = tmp_path / "files"
+    source_path.mkdir()
+    (source_path / "file_01.txt").write_text("content")
+    (source_path / "file_02.txt").write_text("content")
+
+    def _identifiers(config):
+        """Object identifiers of the source path by file path."""
+        sip_meta = GenericFolderStructure()
+        sip_meta.populate(str(source_path), config)
+        return {obj.filepath: obj.object_identifier_value
+                for obj in sip_meta.premis_objects.values()}
+
+    config = Config(str(conf_file))
+    identifiers = _identifiers(config)
+    assert identifiers == _identifiers(config)
+    assert identifiers["file_01.txt"] != identifiers["file_02.txt"]
+
+    (source_path / "file_02.txt").write_text("changed")
+    changed = _identifiers(config)
+    assert changed["file_01.txt"] == identifiers["file_01.txt"]
+    assert changed["file_02.txt"] != identifiers["file_02.txt"]
+
+    random_identifiers = _identifiers(
+        Config("tests/data/generic/generic.conf"))
+    assert random_identifiers != _identifiers(
+        Config("tests/data/generic/generic.conf"))
+
+
+def test_deterministic_identifiers_dedup(tmp_path, monkeypatch):
+    """Test that the digests calculated for deterministic identifiers are
+    reused when finding duplicates, so that each file is hashed once.
+    """
+    conf_file = tmp_path / "config.conf"
+    with open("tests/data/generic/generic.conf", encoding="utf-8") as infile:
+        conf_file.write_text(
+            infile.read() + "deterministic_identifiers=true\n")
+    source_path = tmp_path / "files"
+    source_path.mkdir()
+    (source_path / "file_01.txt").write_text("content")
+    (source_path / "file_02.txt").write_text("content")
+
+    hashed = []
+
+    def _file_sha256(path):
+        """Record the hashed file."""
+        hashed.append(path)
+        return identifiers.file_sha256(path)
+
+    monkeypatch.setattr(base_adaptor, "file_sha256", _file_sha256)
+    monkeypatch.setattr(dedup, "file_sha256", _file_sha256)
+    sip_meta = GenericFolderStructure()
+    sip_meta.populate(str(source_path), Config(str(conf_file)))
+    duplicates = dedup.find_duplicates(sip_meta, str(source_path))
+
+    assert len(duplicates) == 1
+    assert sorted(hashed) == [str(source_path / "file_01.txt"),
+                              str(source_path / "file_02.txt")]
+
+
 def _get_premis_objects_filepaths(premis_objects):
     """Helper method to collect the filepaths from a dictionary of objects.
     """
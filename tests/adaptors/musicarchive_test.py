@@ -1,5 +1,7 @@
 """Test Music Archive adaptor.
 """
+import csv
+import datetime
 import os
 import shutil
 
@@ -12,7 +14,12 @@ from dpres_sip_compiler.adaptors.musicarchive import (
     PremisObjectMusicArchive,
     PremisRepresentationMusicArchive,
     SipMetadataMusicArchive,
+    build_file_index,
+    check_csv_file,
+    convert_timestamp,
     handle_html_files,
+    read_csv_columns,
+    read_csv_file,
 )
 from dpres_sip_compiler.compiler import compile_sip
 from dpres_sip_compiler.config import Config
@@ -24,11 +31,14 @@ def test_populate():
     """
     sip_meta = SipMetadataMusicArchive()
     config = Config(conf_file="tests/data/musicarchive/config.conf")
+    sip_meta.check_source("tests/data/musicarchive/source1", config)
     sip_meta.populate("tests/data/musicarchive/source1", config)
     assert len(sip_meta.premis_objects) == 4
     assert len(sip_meta.premis_events) == 7
     assert len(sip_meta.premis_agents) == 3
     assert len(sip_meta.premis_linkings) == 7
+    # The file index is not kept after populating
+    assert not sip_meta._file_indexes  # pylint: disable=protected-access
 
 
 def test_populate_deprecatedsum():
@@ -50,6 +60,177 @@ def test_populate_deprecatedsum():
     assert len(sip_meta.premis_linkings) == 3
 
 
+def _metadata_dump(sip_meta):
+    """Comparable dump of populated metadata."""
+    # pylint: disable=protected-access
+    return {
+        "objects": [(key, obj._metadata, obj.filepath)
+                    for (key, obj) in sip_meta.premis_objects.items()],
+        "alt_ids": list(sip_meta.premis_object_alt_ids.items()),
+        "events": [(key, event._metadata, event._detail_info)
+                   for (key, event) in sip_meta.premis_events.items()],
+        "agents": [(key, agent._metadata)
+                   for (key, agent) in sip_meta.premis_agents.items()],
+        "linkings": [(key, linking.object_links, linking.agent_links)
+                     for (key, linking) in sip_meta.premis_linkings.items()],
+        "representations": [
+            (key, [(obj._metadata, obj.filepath) for obj in objs])
+            for (key, objs)
+            in sip_meta.premis_digiprov_representations.items()],
+        "attributes": list(sip_meta.digital_object_attributes.items())
+    }
+
+
+@pytest.mark.parametrize("source_path", [
+    "tests/data/musicarchive/source1",
+    "tests/data/musicarchive/source2",
+    "tests/data/musicarchive/migration_test_files",
+    "tests/data/musicarchive/conversion_dv_test_case",
+])
+def test_populate_columns(source_path):
+    """Test that populating from CSV columns gives the same metadata as
+    adding the CSV rows one by one.
+    """
+    config = Config(conf_file="tests/data/musicarchive/config.conf")
+    sip_meta = SipMetadataMusicArchive()
+    sip_meta.populate(source_path, config)
+
+    csv_file = [name for name in os.listdir(source_path)
+                if name.endswith(config.csv_ending)][0]
+    row_meta = SipMetadataMusicArchive()
+    for csv_row in read_csv_file(os.path.join(source_path, csv_file)):
+        row_meta.add_premis_metadata(csv_row, source_path, config)
+
+    assert _metadata_dump(sip_meta) == _metadata_dump(row_meta)
+
+
+def test_populate_invalid_timestamp(tmpdir):
+    """Test that an invalid timestamp is an error also in a later row of
+    an event.
+    """
+    source_path = str(tmpdir.join("source"))
+    shutil.copytree("tests/data/musicarchive/source1", source_path)
+    csv_file = os.path.join(source_path, "test___metadata.csv")
+    with open(csv_file, encoding="utf-8", newline="") as infile:
+        rows = list(csv.reader(infile))
+    header = rows[0]
+    assert rows[1][header.index("event-id")] \
+        == rows[2][header.index("event-id")]
+    rows[2][header.index("event-aika-alku")] = "2022-02-30 00:00:00"
+    with open(csv_file, "w", encoding="utf-8", newline="") as outfile:
+        csv.writer(outfile, quoting=csv.QUOTE_ALL).writerows(rows)
+
+    config = Config(conf_file="tests/data/musicarchive/config.conf")
+    with pytest.raises(ValueError):
+        SipMetadataMusicArchive().populate(source_path, config)
+
+
+def test_read_csv_columns(tmpdir):
+    """Test that CSV is read as columns, and missing columns are reported.
+    """
+    columns = read_csv_columns(
+        "tests/data/musicarchive/source2/"
+        "Package_2022-02-07_123___metadata.csv")
+    rows = list(read_csv_file(
+        "tests/data/musicarchive/source2/"
+        "Package_2022-02-07_123___metadata.csv"))
+    assert columns["event-id"] == [row["event-id"] for row in rows]
+
+    csv_file = tmpdir.join("test___metadata.csv")
+    csv_file.write('"objekti-id","objekti-nimi"\n"1","file.wav"\n')
+    with pytest.raises(ValueError) as error:
+        read_csv_columns(str(csv_file))
+    assert "objekti-uuid, event-id" in str(error.value)
+
+
+def test_build_file_index():
+    """Test that files are indexed by name, and the index is used to find
+    the path.
+    """
+    file_index = build_file_index("tests/data/musicarchive/source1")
+    assert file_index["testfile1.wav"] == "audio/testfile1.wav"
+
+    obj = PremisObjectMusicArchive({
+        "objekti-uuid": "object-id-123",
+        "objekti-nimi": "missing.wav",
+        "tiiviste-tyyppi": "MD5",
+        "tiiviste": "abc",
+        "objekti-id": "alt-123",
+    })
+    with pytest.raises(OSError):
+        obj.find_path("tests/data/musicarchive/source1", file_index)
+
+
+@pytest.mark.parametrize("source_path", [
+    "tests/data/musicarchive/source1",
+    "tests/data/musicarchive/source2",
+    "tests/data/musicarchive/migration_test_files",
+    "tests/data/musicarchive/conversion_dv_test_case",
+])
+def test_check_source(source_path):
+    """Test that no problems are found in valid CSV files."""
+    config = Config(conf_file="tests/data/musicarchive/config.conf")
+    assert SipMetadataMusicArchive().check_source(source_path, config) == []
+
+
+def test_check_csv_file(tmpdir):
+    """Test that all problems in CSV file are reported with line numbers.
+    """
+    with open("tests/data/musicarchive/source1/test___metadata.csv",
+              encoding="utf-8", newline="") as infile:
+        rows = list(csv.reader(infile))
+    header = rows[0]
+    rows[1][header.index("event")] = "unknown event"
+    rows[2][header.index("objekti-nimi")] = "missing.wav"
+    rows[3][header.index("event-aika-alku")] = ""
+    rows[4] = rows[4][:-1]
+    csv_file = tmpdir.join("test___metadata.csv")
+    with open(str(csv_file), "w", encoding="utf-8", newline="") as outfile:
+        csv.writer(outfile, quoting=csv.QUOTE_ALL).writerows(rows)
+
+    problems = check_csv_file(
+        str(csv_file), build_file_index("tests/data/musicarchive/source1"),
+        "MD5")
+    assert problems == [
+        "Line 2: Unknown event type 'unknown event'",
+        "Line 3: Digital object missing.wav was not found",
+        "Line 4: Invalid timestamp '' in column event-aika-alku",
+        f"Line 5: {len(header) - 1} values, expected {len(header)}",
+    ]
+
+    csv_file.write('"objekti-id","objekti-nimi"\n"1","file.wav"\n')
+    assert check_csv_file(str(csv_file), {}, "MD5") == [
+        "Missing columns: objekti-uuid, event-id, event, event-aika-alku, "
+        "event-aika-loppu, event-selite, event-tulos, agent-id, "
+        "agent-nimi, agent-tyyppi, agent-rooli, tiiviste, tiiviste-tyyppi, "
+        "tiiviste-aika, sip-tunniste, pon-korvattu-nimi, "
+        "poo-sip-obj-x-rooli-selite, poo-vastinpari-obj-uuid, "
+        "poo-vastinpari-obj-id, poo-vastinpari-obj-nimi, "
+        "poo-vastinpari-obj-status"]
+
+
+@pytest.mark.parametrize(("timestamp", "expected"), [
+    ("2022-02-01 14:00:05", "2022-02-01T14:00:05"),
+    ("2024-02-29 23:59:59", "2024-02-29T23:59:59"),
+    ("2022-2-1 4:0:5", "2022-02-01T04:00:05"),
+    ("2022-02-29 00:00:00", None),
+    ("2022-02-01 24:00:00", None),
+    ("2022-02-01T14:00:05", None),
+    ("2022-02-01 14:00:0x", None),
+    ("null", None),
+])
+def test_convert_timestamp(timestamp, expected):
+    """Test that timestamps are converted like with strptime and strftime.
+    """
+    if expected is None:
+        with pytest.raises(ValueError):
+            convert_timestamp(timestamp)
+        return
+    assert convert_timestamp(timestamp) == expected
+    assert convert_timestamp(timestamp) == datetime.datetime.strptime(
+        timestamp, "%Y-%m-%d %H:%M:%S").strftime("%Y-%m-%dT%H:%M:%S")
+
+
 def test_descriptive_files():
     """Check that descriptive metadata files are found.
     """
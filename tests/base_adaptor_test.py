@@ -1,8 +1,12 @@
 """Test Base adaptor.
 """
+from importlib import metadata
+
+import pytest
+from dpres_sip_compiler import adaptor_list
 from dpres_sip_compiler.base_adaptor import (
     SipMetadata, PremisObject, PremisEvent, PremisAgent, PremisLinking,
-    build_sip_metadata
+    build_sip_metadata, sip_metadata_class
 )
 from dpres_sip_compiler.adaptor_list import ADAPTOR_DICT
 from dpres_sip_compiler.config import Config
@@ -17,6 +21,97 @@ def test_build_sip_meta():
     assert sip_meta.__class__.__name__ == "SipMetadataMusicArchive"
 
 
+class InHouseAdaptor(SipMetadata):
+    """Adaptor registered as an entry point in tests.
+    """
+
+
+@pytest.fixture(scope="function")
+def adaptor_entry_points(monkeypatch):
+    """Register InHouseAdaptor as an entry point and clear the caches.
+    """
+    entry_point = metadata.EntryPoint(
+        name="inhouse", value="tests.base_adaptor_test:InHouseAdaptor",
+        group=adaptor_list.ENTRY_POINT_GROUP)
+    monkeypatch.setattr(adaptor_list, "_adaptor_entry_points",
+                        lambda: (entry_point,))
+    adaptor_list.entry_point_adaptor.cache_clear()
+    yield
+    adaptor_list.entry_point_adaptor.cache_clear()
+
+
+def _adaptor_config(tmp_path, adaptor):
+    """Create configuration for the given adaptor.
+    """
+    conf_file = tmp_path / "config.conf"
+    with open("tests/data/generic/generic.conf", encoding="utf-8") as infile:
+        conf_file.write_text(
+            infile.read().replace("adaptor=generic", f"adaptor={adaptor}"))
+    return Config(conf_file=str(conf_file))
+
+
+# pylint: disable=redefined-outer-name, unused-argument
+def test_entry_point_adaptor(adaptor_entry_points, tmp_path):
+    """Test that adaptors are found from entry points and cached.
+    """
+    config = _adaptor_config(tmp_path, "inhouse")
+    assert sip_metadata_class(ADAPTOR_DICT, config) is InHouseAdaptor
+    assert adaptor_list.entry_point_adaptor.cache_info().misses == 1
+
+    assert sip_metadata_class(ADAPTOR_DICT, config) is InHouseAdaptor
+    assert adaptor_list.entry_point_adaptor.cache_info().hits == 1
+
+
+def test_unknown_adaptor(adaptor_entry_points, tmp_path):
+    """Test that unknown adaptor names are not supported.
+    """
+    config = _adaptor_config(tmp_path, "unknown")
+    with pytest.raises(NotImplementedError):
+        sip_metadata_class(ADAPTOR_DICT, config)
+
+
+def test_adaptor_dict_class():
+    """Test that classes can also be given directly in the dict.
+    """
+    config = Config(conf_file="tests/data/generic/generic.conf")
+    assert sip_metadata_class(
+        {"generic": InHouseAdaptor}, config) is InHouseAdaptor
+
+
+class CheckedAdaptor(SipMetadata):
+    """Adaptor finding problems in the source metadata.
+    """
+    problems = [f"Line {line}: Unknown event type" for line in range(150)]
+
+    def check_source(self, source_path, config):
+        """Return the problems.
+        """
+        return self.problems
+
+    def populate(self, source_path, config):
+        """Fail, as the metadata is populated only if there are no
+        problems.
+        """
+        raise AssertionError("Populated with problems")
+
+
+def test_build_sip_meta_problems():
+    """Test that all problems in the source metadata are reported before
+    populating, up to the maximum number.
+    """
+    config = Config(conf_file="tests/data/generic/generic.conf")
+    with pytest.raises(ValueError) as error:
+        build_sip_metadata({"generic": CheckedAdaptor},
+                           "tests/data/generic", config)
+    message = str(error.value).splitlines()
+    assert message[0] == \
+        "Found 150 problems in the source metadata:"
+    assert message[1:3] == ["Line 0: Unknown event type",
+                            "Line 1: Unknown event type"]
+    assert message[-1] == "... and 50 more, see the check command"
+    assert len(message) == 102
+
+
 class PremisObjectTest(PremisObject):
     """Test class for objects.
     """
@@ -151,6 +246,38 @@ def test_linkings():
     assert count == 2
 
 
+@pytest.mark.parametrize("validation", [True, False])
+def test_wellformed_check_plan(validation):
+    """Test that objects preserved at bit level are not checked, unless
+    they are sources of migration.
+    """
+    sip_meta = SipMetadata()
+    for identifier in ["source", "bit-level", "forensic", "normal",
+                       "outcome"]:
+        sip_meta.add_object(PremisObjectTest(identifier))
+    for (identifier, event_type) in [("ev-1", "migration"),
+                                     ("ev-2", "creation")]:
+        event = PremisEventTest(identifier)
+        event._metadata["event_type"] = event_type  # pylint: disable=W0212
+        sip_meta.add_event(event)
+    sip_meta.add_linking(PremisLinkingTest("ev-1"), "source", "source",
+                         "agent", "tester")
+    sip_meta.add_linking(PremisLinkingTest("ev-1"), "outcome", "outcome",
+                         "agent", "tester")
+    sip_meta.add_linking(PremisLinkingTest("ev-2"), "bit-level", "source",
+                         "agent", "tester")
+    for identifier in ["source", "bit-level", "outcome"]:
+        sip_meta.add_object_attribute(identifier, "use",
+                                      "fi-dpres-no-file-format-validation")
+    sip_meta.add_object_attribute(
+        "forensic", "use", "fi-dpres-preserve-forensically-analysed-object")
+
+    assert sip_meta.migration_source_objects() == {"source"}
+    assert sip_meta.wellformed_check_plan(validation) == {
+        "source": validation, "bit-level": False, "forensic": False,
+        "normal": validation, "outcome": False}
+
+
 def test_add_object_link():
     """Test that object links can be added without duplicates.
     """
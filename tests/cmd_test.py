@@ -2,9 +2,13 @@
 """
 # pylint: disable=protected-access
 
+import io
 import json
 import os
 import shutil
+import subprocess
+import sys
+import tarfile
 import pytest
 from dpres_sip_compiler.config import get_default_config_path
 
@@ -61,6 +65,56 @@ def test_compile_options(tmpdir, run_cli, prepare_workspace, pick_files_tar):
     assert "signature.sig" in tar_list
 
 
+def test_compile_stdout(tmpdir, run_cli, prepare_workspace):
+    """Test that the SIP is streamed to stdout with --tar-file -.
+    """
+    (source_path, _, _, _) = prepare_workspace(tmpdir)
+    result = run_cli(
+        ["compile", "--config", "tests/data/musicarchive/config.conf",
+         "--tar-file", "-", source_path])
+    assert result.exit_code == 0
+
+    with tarfile.open(fileobj=io.BytesIO(result.stdout_bytes)) as tar:
+        tar_list = tar.getnames()
+    assert tar_list[:2] == ["mets.xml", "signature.sig"]
+    assert "audio/testfile1.wav" in tar_list
+
+
+def test_check(run_cli, tmpdir):
+    """Test that check command reports all problems in the source metadata.
+    """
+    result = run_cli(
+        ["check", "--config", "tests/data/musicarchive/config.conf",
+         "tests/data/musicarchive/source1"])
+    assert result.exit_code == 0
+    assert "No problems found." in result.output
+
+    source_path = str(tmpdir.join("source"))
+    shutil.copytree("tests/data/musicarchive/source1", source_path)
+    csv_file = os.path.join(source_path, "test___metadata.csv")
+    with open(csv_file, encoding="utf-8") as infile:
+        content = infile.read()
+    with open(csv_file, "w", encoding="utf-8") as outfile:
+        outfile.write(content.replace("testfile4.wav", "missing.wav")
+                      .replace("filename change", "unknown event"))
+    result = run_cli(
+        ["check", "--config", "tests/data/musicarchive/config.conf",
+         source_path])
+    assert result.exit_code == 1
+    assert "Digital object missing.wav was not found" in result.output
+    assert "Line 20: Unknown event type 'unknown event'" in result.output
+    assert "Line 21: Unknown event type 'unknown event'" in result.output
+
+    os.remove(csv_file)
+    result = run_cli(
+        ["check", "--config", "tests/data/musicarchive/config.conf",
+         source_path])
+    assert result.exit_code == 1
+    assert f"CSV metadata file was not found in {source_path}!" \
+        in result.output
+    assert "Traceback" not in result.output
+
+
 @pytest.mark.parametrize(('summary'), [
     (False),
     (True)
@@ -104,3 +158,31 @@ def test_validate(run_cli, tmpdir, summary):
         os.path.join(str(tmpdir), 'valid_summary.jsonl')) == summary
     assert os.path.isfile(
         os.path.join(str(tmpdir), 'invalid_summary.jsonl')) == summary
+
+
+def test_help_import_time():
+    """Test that the command line interface does not import the compiler,
+    adaptors or heavy libraries before a command needs them.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c",
+         "from dpres_sip_compiler.cmd import cli; cli(['--help'])"],
+        capture_output=True, check=False, text=True)
+    assert result.returncode == 0
+    assert "Usage:" in result.stdout
+
+    # Lines of the import time report end with the module name
+    imported = {line.split("|")[-1].strip()
+                for line in result.stderr.splitlines()
+                if line.startswith("import time:")}
+    assert "dpres_sip_compiler.cmd" in imported
+    for module in ["dpres_sip_compiler.compiler",
+                   "dpres_sip_compiler.validate",
+                   "dpres_sip_compiler.adaptors.musicarchive",
+                   "dpres_sip_compiler.adaptors.generic_adaptor",
+                   "dpres_sip_compiler.adaptors.postal_museum",
+                   "file_scraper",
+                   "mets_builder",
+                   "siptools_ng",
+                   "lxml"]:
+        assert module not in imported
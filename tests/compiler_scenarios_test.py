@@ -6,7 +6,12 @@ import os
 from typing import Any, Callable
 import pytest
 from lxml import etree
-from dpres_sip_compiler.compiler import compile_sip
+from mets_builder.metadata import TechnicalFileObjectMetadata
+from dpres_sip_compiler.adaptors.generic_adaptor import GenericFolderStructure
+from dpres_sip_compiler.base_adaptor import (
+    PremisAgent, PremisEvent, PremisLinking, SipMetadata)
+from dpres_sip_compiler.compiler import SipCompiler, compile_sip
+from dpres_sip_compiler.config import Config
 from dpres_sip_compiler.constants import (
     FILE_USE_IGNORE_VALIDATION,
     FILE_USE_FORENSIC_ANALYSIS,
@@ -187,9 +192,11 @@ def _assert_postalmuseum_mets_content(
             assert child_elem.tag == '{http://www.lido-schema.org}lidoWrap'
 
 
+@pytest.mark.parametrize("low_memory", [False, True])
 def test_compile_sip(tmpdir: Any,
-                     pick_files_tar: Callable[[str], list[str]]) -> None:
-    """Test sip compilation."""
+                     pick_files_tar: Callable[[str], list[str]],
+                     low_memory: bool) -> None:
+    """Test sip compilation, also with scraper results stored on disk."""
     tar_file = os.path.join(str(tmpdir), "test_sip.tar")
     compile_sip(
         source_path="tests/data/generic/files",
@@ -198,7 +205,8 @@ def test_compile_sip(tmpdir: Any,
         ],
         tar_file=tar_file,
         conf_file="tests/data/generic/generic.conf",
-        validation=False
+        validation=False,
+        low_memory=low_memory
     )
     assert os.path.isfile(tar_file)
     tar_list = pick_files_tar(tar_file)
@@ -208,6 +216,31 @@ def test_compile_sip(tmpdir: Any,
     assert "test_file_02.txt" in tar_list
 
 
+def test_compile_parts_metrics(tmpdir: Any) -> None:
+    """Test that the metrics files of the parts of a partitioned SIP have
+    different label sets.
+    """
+    tar_file = os.path.join(str(tmpdir), "test_sip.tar")
+    metrics_file = os.path.join(str(tmpdir), "sip_compiler.prom")
+    compile_sip(
+        source_path="tests/data/generic/files",
+        tar_file=tar_file,
+        conf_file="tests/data/generic/generic.conf",
+        validation=False,
+        max_sip_objects=1,
+        metrics_file=metrics_file,
+    )
+    label_sets = []
+    for index in [1, 2]:
+        path = os.path.join(str(tmpdir), f"sip_compiler_{index:03d}.prom")
+        with open(path, encoding="utf-8") as infile:
+            label_sets.append({
+                line.rsplit(" ", 1)[0] for line in infile
+                if not line.startswith("#")})
+    assert label_sets[0]
+    assert not label_sets[0] & label_sets[1]
+
+
 @pytest.mark.parametrize(
     "package_source",
     ["accepted_html_files",
@@ -277,3 +310,67 @@ def test_postalmuseum_compile(
         mets_filepath=str(tmp_tar_dir / "mets.xml"),
         content_id=content_id,
         sip_id=sip_id)
+
+
+def test_shared_agent_metadata() -> None:
+    """Test that agent metadata is created once per agent and shared by
+    the events of the agent.
+    """
+    sip_meta = SipMetadata()
+    for agent_id in ["agent-1", "agent-2"]:
+        sip_meta.add_agent(PremisAgent({
+            "agent_identifier_type": "local",
+            "agent_identifier_value": agent_id,
+            "agent_name": agent_id,
+            "agent_type": "software"
+        }))
+    for event_id in ["1", "2", "3"]:
+        sip_meta.add_event(PremisEvent({
+            "event_identifier_type": "local",
+            "event_identifier_value": event_id,
+            "event_type": "message digest calculation",
+            "event_outcome": "success",
+            "event_datetime": "2024-01-01T12:00:00"
+        }))
+        linking = PremisLinking()
+        linking.identifier = event_id
+        sip_meta.add_linking(linking, None, None, "agent-1", "executing")
+        sip_meta.add_linking(linking, None, None, "agent-2", "implementer")
+
+    compiler = SipCompiler(
+        source_path="tests/data/generic/files",
+        descriptive_metadata_paths=None,
+        config=Config(conf_file="tests/data/generic/generic.conf"),
+        tar_file="sip.tar",
+        sip_meta=sip_meta,
+        validation=False)
+    # pylint: disable=protected-access
+    compiler._create_provenance_metadata()
+
+    assert len(compiler.event_metadata) == 3
+    assert set(compiler.agent_metadata) == {"agent-1", "agent-2"}
+    assert compiler._get_agent_metadata("agent-2") is \
+        compiler.agent_metadata["agent-2"]
+
+
+def test_technical_metadata_index() -> None:
+    """Test that technical metadata of each digital object is indexed by
+    the object identifier when the digital objects are created.
+    """
+    config = Config(conf_file="tests/data/generic/generic.conf")
+    sip_meta = GenericFolderStructure()
+    sip_meta.populate("tests/data/generic/files", config)
+    compiler = SipCompiler(
+        source_path="tests/data/generic/files",
+        descriptive_metadata_paths=None,
+        config=config,
+        tar_file="sip.tar",
+        sip_meta=sip_meta,
+        validation=False)
+    # pylint: disable=protected-access
+    compiler._create_technical_metadata()
+
+    assert set(compiler.technical_metadata) == set(sip_meta.premis_objects)
+    for obj_id, object_metadata in compiler.technical_metadata.items():
+        assert isinstance(object_metadata, TechnicalFileObjectMetadata)
+        assert object_metadata in compiler.digital_objects[obj_id].metadata
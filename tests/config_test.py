@@ -1,6 +1,11 @@
 """Test configuration
 """
-from dpres_sip_compiler.config import Config
+import os
+import pickle
+import shutil
+
+import pytest
+from dpres_sip_compiler.config import Config, load_config
 
 
 def test_configure():
@@ -15,3 +20,115 @@ def test_configure():
     assert config.csv_ending == "___metadata.csv"
     assert config.used_checksum == "MD5"
     assert config.desc_metadata_source_format == "file"
+
+
+def test_immutable():
+    """Test that configuration can not be modified.
+    """
+    config = Config(conf_file="tests/data/musicarchive/config.conf")
+    with pytest.raises(AttributeError):
+        config.adaptor = "generic"
+    assert config.adaptor == "musicarchive"
+
+
+def test_missing_keys(tmp_path):
+    """Test that missing required keys are reported together.
+    """
+    conf_file = tmp_path / "config.conf"
+    conf_file.write_text("[organization]\nname=Archive X\n")
+    with pytest.raises(ValueError) as error:
+        Config(conf_file=str(conf_file))
+    assert "organization/contract, organization/sign_key, script/adaptor" \
+        in str(error.value)
+
+
+@pytest.mark.parametrize(("value", "expected"), [
+    (None, "full"),
+    ("trimmed", "trimmed"),
+    ("none", ValueError)
+])
+def test_scraper_info_retention(tmp_path, value, expected):
+    """Test the retention policy of the scraper info.
+    """
+    conf_file = tmp_path / "config.conf"
+    shutil.copy("tests/data/generic/generic.conf", conf_file)
+    if value is not None:
+        with open(conf_file, "a", encoding="utf-8") as conf:
+            conf.write(f"scraper_info={value}\n")
+    if expected is ValueError:
+        with pytest.raises(ValueError) as error:
+            Config(conf_file=str(conf_file))
+        assert "script/scraper_info" in str(error.value)
+        return
+    config = Config(conf_file=str(conf_file))
+    assert config.scraper_info_retention == expected
+
+
+def test_identifier_namespace(tmp_path):
+    """Test that invalid identifier namespaces are reported.
+    """
+    conf_file = tmp_path / "config.conf"
+    shutil.copy("tests/data/generic/generic.conf", conf_file)
+    with open(conf_file, "a", encoding="utf-8") as conf:
+        conf.write("identifier_namespace=invalid\n")
+    with pytest.raises(ValueError) as error:
+        Config(conf_file=str(conf_file))
+    assert "script/identifier_namespace" in str(error.value)
+
+
+def test_scrape_limits(tmp_path):
+    """Test the time and memory limits of scraping by MIME type.
+    """
+    conf_file = tmp_path / "config.conf"
+    shutil.copy("tests/data/generic/generic.conf", conf_file)
+    config = Config(conf_file=str(conf_file))
+    assert not config.scrape_limits_enabled
+    assert config.scrape_limits("video/mp4") == (None, None)
+
+    with open(conf_file, "a", encoding="utf-8") as conf:
+        conf.write("[timeouts]\nvideo/*=3600\ndefault=600\n"
+                   "[memory_limits]\nvideo/*=4096\n")
+    config = Config(conf_file=str(conf_file))
+    assert config.scrape_limits_enabled
+    assert config.scrape_limits("video/mp4") == (3600, 4096 * 1024 ** 2)
+    assert config.scrape_limits("image/tiff") == (600, None)
+    assert config.scrape_limits(None) == (600, None)
+
+
+@pytest.mark.parametrize("value", ["0", "-1", "hour"])
+def test_invalid_scrape_limits(tmp_path, value):
+    """Test that invalid limits are reported.
+    """
+    conf_file = tmp_path / "config.conf"
+    shutil.copy("tests/data/generic/generic.conf", conf_file)
+    with open(conf_file, "a", encoding="utf-8") as conf:
+        conf.write(f"[timeouts]\ndefault={value}\n")
+    with pytest.raises(ValueError) as error:
+        Config(conf_file=str(conf_file))
+    assert "timeouts/default" in str(error.value)
+
+
+def test_pickle():
+    """Test that configuration can be passed to worker processes.
+    """
+    config = Config(conf_file="tests/data/generic/generic.conf")
+    copied = pickle.loads(pickle.dumps(config))
+    assert vars(copied) == vars(config)
+    with pytest.raises(AttributeError):
+        copied.name = "Organization Y"
+
+
+def test_load_config(tmp_path):
+    """Test that parsed configuration is reused until the file changes.
+    """
+    conf_file = tmp_path / "config.conf"
+    shutil.copy("tests/data/generic/generic.conf", conf_file)
+    config = load_config(str(conf_file))
+    assert load_config(str(conf_file)) is config
+
+    with open(conf_file, "a", encoding="utf-8") as outfile:
+        outfile.write("used_checksum=MD5\n")
+    os.utime(conf_file, ns=(0, 0))
+    reloaded = load_config(str(conf_file))
+    assert reloaded is not config
+    assert reloaded.used_checksum == "MD5"
@@ -0,0 +1,104 @@
+"""Tests the dedup module."""
+import pytest
+from dpres_sip_compiler.base_adaptor import PremisObject, SipMetadata
+from dpres_sip_compiler.dedup import find_duplicates
+
+
+class CountingSipMetadata(SipMetadata):
+    """SIP metadata recording the scraped files."""
+
+    scraped = []
+    validations = {}
+
+    @staticmethod
+    def scrape_file(filepath, mimetype, version, validation):
+        """Record the file instead of scraping it."""
+        CountingSipMetadata.scraped.append(filepath)
+        CountingSipMetadata.validations[filepath] = validation
+        return {"info": {}, "grade": "grade", "mimetype": None}
+
+
+@pytest.fixture(scope="function")
+def sip_meta(tmp_path):
+    """SIP metadata with duplicate files.
+
+    Files 1, 3 and 5 have the same content, file 4 has the same size
+    but different content, and file 2 has a different size.
+    """
+    sip_meta = CountingSipMetadata()
+    CountingSipMetadata.scraped = []
+    for (index, content) in enumerate(
+            [b"aaaa", b"bb", b"aaaa", b"cccc", b"aaaa"], start=1):
+        (tmp_path / f"file{index}").write_bytes(content)
+        p_object = PremisObject({"object_identifier_value": f"obj-{index}"})
+        p_object.filepath = f"file{index}"
+        sip_meta.add_object(p_object)
+    return sip_meta
+
+
+# pylint: disable=redefined-outer-name
+def test_find_duplicates(sip_meta, tmp_path):
+    """Test that duplicates are mapped to the first identical file."""
+    assert find_duplicates(sip_meta, str(tmp_path)) == {
+        "obj-3": "obj-1", "obj-5": "obj-1"}
+
+
+def _declare_digest(sip_meta, obj_id, algorithm, digest):
+    """Set the declared message digest of an object."""
+    p_object = sip_meta.premis_objects[obj_id]
+    # pylint: disable=protected-access
+    p_object._metadata["message_digest_algorithm"] = algorithm
+    p_object._metadata["message_digest"] = digest
+
+
+def test_find_duplicates_digest(sip_meta, tmp_path):
+    """Test that files with the same declared message digest but
+    different content are not duplicates.
+    """
+    for obj_id in ["obj-1", "obj-4"]:
+        _declare_digest(sip_meta, obj_id, "MD5", "same")
+    assert find_duplicates(sip_meta, str(tmp_path)) == {
+        "obj-3": "obj-1", "obj-5": "obj-1"}
+
+
+def test_find_duplicates_digest_conflict(sip_meta, tmp_path):
+    """Test that an identical file declaring a conflicting message digest
+    is not a duplicate of the representative.
+    """
+    _declare_digest(sip_meta, "obj-1", "MD5", "digest-1")
+    _declare_digest(sip_meta, "obj-3", "md5", "DIGEST-1")
+    _declare_digest(sip_meta, "obj-5", "MD5", "digest-5")
+    assert find_duplicates(sip_meta, str(tmp_path)) == {"obj-3": "obj-1"}
+
+
+@pytest.mark.parametrize("prefetch_bytes", [0, 1024])
+def test_scrape_duplicates(sip_meta, tmp_path, prefetch_bytes):
+    """Test that only representatives are scraped and duplicates get a
+    copy of the result.
+    """
+    duplicates = find_duplicates(sip_meta, str(tmp_path))
+    identifiers = list(sip_meta.iter_scrape_objects(
+        str(tmp_path), validation=False, duplicates=duplicates,
+        prefetch_bytes=prefetch_bytes))
+    assert identifiers == ["obj-1", "obj-3", "obj-5", "obj-2", "obj-4"]
+    assert [path.rsplit("/", 1)[1] for path in CountingSipMetadata.scraped] \
+        == ["file1", "file2", "file4"]
+    results = sip_meta.scraper_results
+    assert results["obj-3"] == results["obj-1"]
+    assert results["obj-3"] is not results["obj-1"]
+
+
+def test_scrape_duplicates_validation(sip_meta, tmp_path):
+    """Test that a representative is checked for well-formedness if any
+    of its duplicates needs the check.
+    """
+    CountingSipMetadata.validations = {}
+    for obj_id in ["obj-1", "obj-2", "obj-4"]:
+        sip_meta.add_object_attribute(obj_id, "use",
+                                      "fi-dpres-no-file-format-validation")
+    duplicates = find_duplicates(sip_meta, str(tmp_path))
+    sip_meta.scrape_objects(str(tmp_path), validation=True,
+                            duplicates=duplicates)
+    assert {path.rsplit("/", 1)[1]: validation for (path, validation)
+            in CountingSipMetadata.validations.items()} == {
+        "file1": True, "file2": False, "file4": False}
@@ -0,0 +1,49 @@
+"""Tests the file_collector module."""
+import os
+
+from dpres_sip_compiler.file_collector import collect_files
+
+
+def _walk(source_path):
+    """Relative file paths in os.walk order."""
+    return [os.path.relpath(os.path.join(root, filename), source_path)
+            for (root, _, filenames) in os.walk(source_path)
+            for filename in filenames]
+
+
+def test_collect_files(tmp_path):
+    """Test that files are collected in os.walk order with their stat
+    results.
+    """
+    for (index, path) in enumerate(["b.txt", "a/1.txt", "a/x/2.txt",
+                                    "a/y/3.txt", "c/4.txt", ".hidden"]):
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_bytes(b"x" * index)
+    os.symlink(tmp_path / "a", tmp_path / "link")
+
+    collected = list(collect_files(str(tmp_path)))
+    assert [path for (path, _) in collected] == _walk(str(tmp_path))
+    assert "link/1.txt" not in dict(collected)
+    for (path, stat_result) in collected:
+        assert stat_result.st_size == os.path.getsize(tmp_path / path)
+
+
+def test_broken_symlink(tmp_path):
+    """Test that a broken symbolic link is skipped."""
+    (tmp_path / "file.txt").write_text("x")
+    os.symlink(tmp_path / "missing.txt", tmp_path / "broken.txt")
+
+    collected = [path for (path, _) in collect_files(str(tmp_path))]
+    assert collected == ["file.txt"]
+
+
+def test_exclude_patterns(tmp_path):
+    """Test that files matching the exclude patterns are skipped."""
+    for path in ["file.txt", "file.csv", ".hidden", "dir/.hidden",
+                 ".dir/file.txt", "dir/file.txt"]:
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text("x")
+
+    collected = [path for (path, _) in collect_files(
+        str(tmp_path), ["*.csv", "*/.[!/]*"])]
+    assert sorted(collected) == ["dir/file.txt", "file.txt"]
@@ -0,0 +1,93 @@
+"""Tests the metrics module."""
+import os
+import time
+
+from dpres_sip_compiler.metrics import MetricsWriter
+
+
+def _samples(path):
+    """Read the samples of a metrics file by name and labels."""
+    samples = {}
+    with open(path, encoding="utf-8") as metrics_file:
+        for line in metrics_file:
+            if line.startswith("#"):
+                continue
+            (name, value) = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_metrics(tmp_path):
+    """Test that the metrics are written during and after the run."""
+    path = str(tmp_path / "sip_compiler.prom")
+    with MetricsWriter(path, "validate", workers=2,
+                       interval=0.05) as metrics:
+        samples = _samples(path)
+        assert samples['sip_compiler_running{command="validate"}'] == 1
+        with metrics.phase("scraping"):
+            metrics.add("a.txt", "text/plain", 1000, 0.1)
+            metrics.count_file("fi-dpres-recommended-file-format",
+                               "text/plain", True)
+            metrics.add("b.wav", "audio/x-wav", 3000, 0.2)
+            metrics.count_file("fi-dpres-unacceptable", "audio/x-wav",
+                               False)
+            time.sleep(0.2)
+            samples = _samples(path)
+            assert samples['sip_compiler_current_phase{command="validate",'
+                           'phase="scraping"}'] == 1
+            assert samples[
+                'sip_compiler_scraped_bytes_total{command="validate"}'] \
+                == 4000
+
+    samples = _samples(path)
+    assert samples['sip_compiler_running{command="validate"}'] == 0
+    assert samples['sip_compiler_scraped_files_total{command="validate"}'] \
+        == 2
+    assert samples['sip_compiler_scrape_seconds_total{command="validate"}'] \
+        == 0.3
+    assert samples['sip_compiler_files_total{command="validate",'
+                   'grade="fi-dpres-unacceptable",mimetype="audio/x-wav",'
+                   'valid="false"}'] == 1
+    assert samples['sip_compiler_phase_seconds{command="validate",'
+                   'phase="scraping"}'] >= 0.2
+    assert not any("current_phase{" in name for name in samples)
+    assert os.listdir(tmp_path) == ["sip_compiler.prom"]
+
+
+def test_throughput(tmp_path):
+    """Test the throughput and worker utilization since the previous
+    update.
+    """
+    path = str(tmp_path / "sip_compiler.prom")
+    metrics = MetricsWriter(path, "compile", workers=2)
+    metrics.write()
+    time.sleep(0.5)
+    metrics.add("a.tif", "image/tiff", 10000, 0.5)
+    metrics.write()
+    samples = _samples(path)
+    throughput = samples[
+        'sip_compiler_throughput_bytes_per_second{command="compile"}']
+    assert 10000 < throughput <= 20000
+    utilization = samples[
+        'sip_compiler_worker_utilization_ratio{command="compile"}']
+    assert 0.25 < utilization <= 0.5
+
+    metrics.write()
+    samples = _samples(path)
+    assert samples[
+        'sip_compiler_throughput_bytes_per_second{command="compile"}'] == 0
+
+
+def test_labels(tmp_path):
+    """Test that additional labels are added to all samples, so that the
+    files of the parts of a SIP have different series.
+    """
+    label_sets = []
+    for sip_id in ["sip_001", "sip_002"]:
+        path = str(tmp_path / f"sip_compiler_{sip_id}.prom")
+        metrics = MetricsWriter(path, "compile", labels={"sip_id": sip_id})
+        metrics.write()
+        samples = _samples(path)
+        assert all(f'sip_id="{sip_id}"' in name for name in samples)
+        label_sets.append(set(samples))
+    assert not label_sets[0] & label_sets[1]
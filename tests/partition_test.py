@@ -0,0 +1,115 @@
+"""Tests the partition module."""
+import pickle
+
+import pytest
+from dpres_sip_compiler.base_adaptor import (
+    PremisAgent, PremisEvent, PremisLinking, PremisObject, SipMetadata)
+from dpres_sip_compiler.constants import (
+    EVENT_DIGEST, EVENT_CREATION, EVENT_MIGRATION)
+from dpres_sip_compiler.partition import (
+    object_groups, partition_sip_metadata)
+
+
+def _add_event(sip_meta, event_id, event_type, object_ids):
+    """Add event linked to the given objects and one agent."""
+    sip_meta.add_event(PremisEvent({
+        "event_identifier_value": event_id,
+        "event_type": event_type
+    }))
+    linking = PremisLinking()
+    linking.identifier = event_id
+    if not object_ids:
+        sip_meta.add_linking(linking, None, None, "agent-1", "executing")
+    for obj_id in object_ids:
+        sip_meta.add_linking(linking, obj_id, "source", "agent-1",
+                             "executing")
+
+
+@pytest.fixture(scope="function")
+def sip_meta(tmp_path):
+    """SIP metadata with five 100 byte files.
+
+    Files 2 and 3 are linked by a migration event, all files by a
+    digest event and none by a creation event.
+    """
+    sip_meta = SipMetadata()
+    sip_meta.objid = "sip"
+    for index in range(1, 6):
+        obj_id = f"obj-{index}"
+        (tmp_path / f"file{index}").write_bytes(b"x" * 100)
+        p_object = PremisObject({"object_identifier_value": obj_id})
+        p_object.filepath = f"file{index}"
+        sip_meta.add_object(p_object)
+        sip_meta.add_object_alt_id(obj_id, "local", f"alt-{index}")
+        sip_meta.scraper_results[obj_id] = {"grade": "grade"}
+    sip_meta.add_agent(PremisAgent({"agent_identifier_value": "agent-1"}))
+    _add_event(sip_meta, "digest", EVENT_DIGEST,
+               [f"obj-{index}" for index in range(1, 6)])
+    _add_event(sip_meta, "migration", EVENT_MIGRATION,
+               ["obj-2", "obj-3", "representation-1"])
+    _add_event(sip_meta, "creation", EVENT_CREATION, [])
+    sip_meta.add_object_alt_id("representation-1", "local", "alt-r")
+    return sip_meta
+
+
+def test_object_groups(sip_meta):
+    """Test that objects linked by migration are grouped."""
+    assert object_groups(sip_meta) == [
+        ["obj-1"], ["obj-2", "obj-3"], ["obj-4"], ["obj-5"]]
+
+
+@pytest.mark.parametrize(("max_bytes", "max_objects", "expected"), [
+    (None, None, [5]),
+    (1000, None, [5]),
+    (None, 5, [5]),
+    (250, None, [1, 2, 2]),
+    (None, 2, [1, 2, 2]),
+    (150, None, [1, 2, 1, 1]),
+    (200, 1, [1, 2, 1, 1])
+])
+def test_partition(sip_meta, tmp_path, max_bytes, max_objects, expected):
+    """Test that objects are split by size and count limits."""
+    parts = partition_sip_metadata(sip_meta, str(tmp_path),
+                                   max_bytes=max_bytes,
+                                   max_objects=max_objects)
+    assert [len(part.premis_objects) for part in parts] == expected
+    if len(parts) == 1:
+        assert parts[0] is sip_meta
+        return
+
+    assert [part.objid for part in parts] == [
+        f"sip_{index:03d}" for index in range(1, len(parts) + 1)]
+    assert sum((list(part.premis_objects) for part in parts), []) == list(
+        sip_meta.premis_objects)
+    for part in parts:
+        assert part.__class__ is sip_meta.__class__
+        assert set(part.scraper_results) == set(part.premis_objects)
+        assert "creation" in part.premis_events
+        digest_links = [
+            link["linking_object"]
+            for link in part.premis_linkings["digest"].object_links]
+        assert digest_links == list(part.premis_objects)
+
+
+def test_partition_migration(sip_meta, tmp_path):
+    """Test that migration events and representation objects follow the
+    migrated objects.
+    """
+    parts = partition_sip_metadata(sip_meta, str(tmp_path), max_objects=2)
+    assert [("migration" in part.premis_events) for part in parts] == [
+        False, True, False]
+    assert "representation-1" in parts[1].premis_object_alt_ids
+    assert "representation-1" not in parts[0].premis_object_alt_ids
+    assert [link["linking_object"] for link in
+            parts[1].premis_linkings["migration"].object_links] == [
+                "obj-2", "obj-3", "representation-1"]
+    # The original linkings are untouched
+    assert len(sip_meta.premis_linkings["digest"].object_links) == 5
+
+
+def test_pickle_part(sip_meta, tmp_path):
+    """Test that parts can be sent to worker processes."""
+    parts = partition_sip_metadata(sip_meta, str(tmp_path), max_objects=2)
+    part = pickle.loads(pickle.dumps(parts[1]))
+    assert part.premis_objects["obj-2"].filepath == "file2"
+    assert part.premis_events["migration"].event_type == EVENT_MIGRATION
@@ -0,0 +1,100 @@
+"""Tests the prefetch module."""
+import threading
+import time
+
+from dpres_sip_compiler.prefetch import Prefetcher, warm_file
+
+# Simulated latency of reading a file cold, and time of scraping a file.
+# The tests check the logic of prefetching, not the performance with real
+# I/O.
+LATENCY = 0.05
+SCRAPE_TIME = 0.05
+
+
+class _SlowStorage:
+    """Storage where reading a file is slow unless it has been warmed."""
+
+    def __init__(self):
+        self.cache = set()
+        self.lock = threading.Lock()
+
+    def warm(self, path):
+        """Read file into the cache."""
+        time.sleep(LATENCY)
+        with self.lock:
+            self.cache.add(path)
+
+    def read(self, path):
+        """Read file, from the cache if it has been warmed."""
+        with self.lock:
+            cached = path in self.cache
+        if not cached:
+            time.sleep(LATENCY)
+
+
+def _scrape_all(storage, paths, prefetcher=None):
+    """Read and scrape the files, and return the elapsed time."""
+    start = time.monotonic()
+    for path in paths:
+        storage.read(path)
+        time.sleep(SCRAPE_TIME)
+        if prefetcher is not None:
+            prefetcher.release(path)
+    return time.monotonic() - start
+
+
+def test_overlap():
+    """Test that prefetching overlaps the simulated I/O with scraping.
+
+    A logic test with a stub warm function, not a benchmark.
+    """
+    paths = [f"file-{index}" for index in range(10)]
+    sequential = _scrape_all(_SlowStorage(), paths)
+
+    storage = _SlowStorage()
+    with Prefetcher(((path, 100) for path in paths), budget=300,
+                    warm=storage.warm) as prefetcher:
+        prefetched = _scrape_all(storage, paths, prefetcher)
+
+    assert sequential >= len(paths) * (LATENCY + SCRAPE_TIME)
+    assert prefetched < 0.75 * sequential
+
+
+def test_budget():
+    """Test that the files warmed and not released are within the budget,
+    and files larger than the budget are skipped.
+    """
+    warmed = []
+    files = [("a", 1), ("b", 2), ("large", 10), ("c", 2), ("d", 1)]
+    prefetcher = Prefetcher(files, budget=3, warm=warmed.append)
+    prefetcher.start()
+    try:
+        time.sleep(0.1)
+        assert warmed == ["a", "b"]
+        prefetcher.release("a")
+        time.sleep(0.1)
+        assert warmed == ["a", "b"]
+        prefetcher.release("b")
+        # Released before it is warmed
+        prefetcher.release("c")
+        time.sleep(0.1)
+        assert warmed == ["a", "b", "d"]
+    finally:
+        prefetcher.close()
+
+
+def test_close():
+    """Test that a waiting prefetcher can be closed."""
+    prefetcher = Prefetcher([("a", 2), ("b", 2)], budget=3,
+                            warm=lambda path: None)
+    prefetcher.start()
+    time.sleep(0.05)
+    prefetcher.close()
+    assert not prefetcher._thread.is_alive()  # pylint: disable=W0212
+
+
+def test_warm_file(tmp_path):
+    """Test that a file can be warmed."""
+    path = tmp_path / "file"
+    path.write_bytes(b"x" * 3 * 1024 * 1024)
+    warm_file(str(path))
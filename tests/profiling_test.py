@@ -0,0 +1,64 @@
+"""Tests the profiling module."""
+import os
+import pstats
+import time
+
+from dpres_sip_compiler.profiling import (
+    PROFILE_ENV,
+    profile,
+    profile_command,
+    profile_worker,
+)
+from dpres_sip_compiler.scraping import run_jobs
+
+
+def _busy(duration):
+    """Keep the CPU busy for the given time."""
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        pass
+    return duration
+
+
+def test_profile(tmp_path):
+    """Test that the profile and the sampled stacks are written."""
+    prefix = str(tmp_path / "profile")
+    with profile(prefix):
+        _busy(0.2)
+
+    stats = pstats.Stats(f"{prefix}.pstats")
+    assert any(function == "_busy" for (_, _, function) in stats.stats)
+
+    with open(f"{prefix}.collapsed", encoding="utf-8") as collapsed:
+        lines = collapsed.read().splitlines()
+    assert lines
+    busy_samples = 0
+    for line in lines:
+        (stack, count) = line.rsplit(" ", 1)
+        if stack.split(";")[-1].startswith("_busy "):
+            busy_samples += int(count)
+    assert busy_samples > 5
+
+
+def test_profile_workers(tmp_path):
+    """Test that the worker processes started by a profiled command are
+    profiled, and the main process only once.
+    """
+    prefix = str(tmp_path / "profile")
+    with profile_command(prefix):
+        assert os.environ[PROFILE_ENV] == prefix
+        with profile_worker():
+            results = dict(run_jobs(_busy, [("a", (0.1,)), ("b", (0.1,))],
+                                    workers=2))
+    assert PROFILE_ENV not in os.environ
+    assert results == {"a": 0.1, "b": 0.1}
+
+    names = set(os.listdir(tmp_path))
+    assert {"profile.collapsed", "profile.pstats"} <= names
+    worker_profiles = [name for name in names - {"profile.pstats"}
+                       if name.endswith(".pstats")]
+    assert len(worker_profiles) == 2
+    assert len(names) == 6
+    for name in worker_profiles:
+        stats = pstats.Stats(str(tmp_path / name))
+        assert any(function == "_busy" for (_, _, function) in stats.stats)
@@ -0,0 +1,77 @@
+"""Tests the result_store module."""
+import tracemalloc
+
+import pytest
+from dpres_sip_compiler.result_store import ScraperResultStore
+
+
+def _scraper_result(index):
+    """Scraper result with some verbose tool output."""
+    return {
+        "streams": {0: {"index": 0, "mimetype": "text/plain",
+                        "version": "(:unap)"}},
+        "info": {tool: {"class": f"Scraper{tool}", "messages": ["x" * 500],
+                        "errors": [], "tools": []}
+                 for tool in range(10)},
+        "mimetype": "text/plain",
+        "version": "(:unap)",
+        "checksum": f"{index:064x}",
+        "grade": "fi-dpres-recommended-file-format"
+    }
+
+
+def test_mapping():
+    """Test that the store works like a dict of scraper results."""
+    with ScraperResultStore() as store:
+        store["obj-1"] = _scraper_result(1)
+        store["obj-2"] = _scraper_result(2)
+        assert len(store) == 2
+        assert list(store) == ["obj-1", "obj-2"]
+        assert "obj-1" in store
+        assert "obj-3" not in store
+        assert store["obj-2"] == _scraper_result(2)
+
+        store["obj-1"] = {"grade": "unacceptable"}
+        assert store["obj-1"]["grade"] == "unacceptable"
+
+        del store["obj-1"]
+        assert list(store) == ["obj-2"]
+        with pytest.raises(KeyError):
+            store["obj-1"]  # pylint: disable=pointless-statement
+        with pytest.raises(KeyError):
+            del store["obj-1"]
+
+
+def test_file(tmp_path):
+    """Test that the results are kept in the given database file."""
+    path = str(tmp_path / "results.sqlite")
+    with ScraperResultStore(path) as store:
+        store["obj-1"] = _scraper_result(1)
+    with ScraperResultStore(path) as store:
+        assert store["obj-1"] == _scraper_result(1)
+
+
+def test_peak_memory():
+    """Test that the memory usage does not grow with the number of stored
+    results, unlike with a dict.
+    """
+    count = 2000
+
+    tracemalloc.start()
+    try:
+        results = {f"obj-{index}": _scraper_result(index)
+                   for index in range(count)}
+        dict_peak = tracemalloc.get_traced_memory()[1]
+        del results
+
+        tracemalloc.reset_peak()
+        with ScraperResultStore() as store:
+            for index in range(count):
+                store[f"obj-{index}"] = _scraper_result(index)
+            assert len(store) == count
+            store_peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    assert dict_peak > 10 * 1024 * 1024
+    assert store_peak < dict_peak / 5
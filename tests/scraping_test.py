@@ -0,0 +1,283 @@
+"""Tests the scraping module."""
+import gzip
+import json
+import os
+import subprocess
+import time
+
+import pytest
+from dpres_sip_compiler import scraping
+from dpres_sip_compiler.scraping import (
+    Job,
+    JobFailure,
+    dispatch_order,
+    is_heavy,
+    run_jobs,
+    scrape_job,
+)
+
+
+def _job(number):
+    """Job run in a worker process."""
+    return (number * 2, os.getpid())
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_jobs(workers):
+    """Test that all jobs are run, in job order with one worker."""
+    jobs = ((f"key-{number}", (number,)) for number in range(10))
+    results = list(run_jobs(_job, jobs, workers=workers))
+    if workers > 1:
+        results.sort(key=lambda result: int(result[0].split("-")[1]))
+    assert [key for (key, _) in results] == [
+        f"key-{number}" for number in range(10)]
+    assert [result[0] for (_, result) in results] == [
+        number * 2 for number in range(10)]
+    in_main_process = {result[1] == os.getpid() for (_, result) in results}
+    assert in_main_process == {workers == 1}
+
+
+def _timed_job(duration):
+    """Job recording its start and end time."""
+    start = time.monotonic()
+    time.sleep(duration)
+    return (start, time.monotonic())
+
+
+def test_largest_first():
+    """Test that the largest jobs are started first."""
+    jobs = [Job(f"key-{size}", (0.2,), size=size)
+            for size in [1, 5, 2, 4, 3]]
+    results = dict(run_jobs(_timed_job, jobs, workers=2))
+    first_started = sorted(results, key=lambda key: results[key][0])[:2]
+    assert sorted(first_started) == ["key-4", "key-5"]
+
+
+def test_heavy_workers():
+    """Test that heavy jobs are limited separately."""
+    jobs = [Job(f"heavy-{index}", (0.2,), heavy=True) for index in range(3)]
+    jobs += [Job(f"light-{index}", (0.1,)) for index in range(3)]
+    results = dict(run_jobs(_timed_job, jobs, workers=3, heavy_workers=1))
+    heavy = sorted(result for (key, result) in results.items()
+                   if key.startswith("heavy"))
+    for (previous, following) in zip(heavy, heavy[1:]):
+        assert previous[1] <= following[0]
+
+
+def test_dispatch_order():
+    """Test that the estimated order of starting the jobs follows the
+    limit of heavy jobs.
+    """
+    jobs = [Job("small", (), size=10), Job("heavy-1", (), size=100,
+                                           heavy=True),
+            Job("medium", (), size=50), Job("heavy-2", (), size=90,
+                                            heavy=True)]
+    assert [job.key for job in dispatch_order(jobs)] == [
+        "small", "heavy-1", "medium", "heavy-2"]
+    assert [job.key for job in dispatch_order(jobs, supervised=True)] == [
+        "heavy-1", "heavy-2", "medium", "small"]
+    assert [job.key for job in dispatch_order(
+        jobs, workers=2, heavy_workers=1)] == [
+            "heavy-1", "medium", "small", "heavy-2"]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_timeout(workers):
+    """Test that a job exceeding its time limit is stopped and the other
+    jobs are continued.
+    """
+    jobs = [Job("hung", (30,), timeout=0.5)]
+    jobs += [Job(f"key-{index}", (0.1,), timeout=10) for index in range(3)]
+    start = time.monotonic()
+    results = dict(run_jobs(_timed_job, jobs, workers=workers,
+                            supervised=True))
+    assert time.monotonic() - start < 10
+    assert results["hung"] == JobFailure("timeout",
+                                         "Time limit of 0.5 s exceeded")
+    assert all(isinstance(results[f"key-{index}"], tuple)
+               and not isinstance(results[f"key-{index}"], JobFailure)
+               for index in range(3))
+
+
+def _start_tool(pid_file):
+    """Job starting a tool process that outlives the job."""
+    with subprocess.Popen(["sleep", "60"]) as process:
+        with open(pid_file, "w", encoding="utf-8") as outfile:
+            outfile.write(str(process.pid))
+        process.wait()
+
+
+def _is_running(pid):
+    """Check that a process is running, and not a zombie."""
+    try:
+        with open(f"/proc/{pid}/stat", encoding="ascii") as stat:
+            return stat.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/stat"),
+                    reason="Requires /proc")
+def test_timeout_kills_tool(tmp_path):
+    """Test that the tools started by a job are killed on timeout."""
+    pid_file = str(tmp_path / "tool.pid")
+    results = dict(run_jobs(_start_tool, [Job("hung", (pid_file,),
+                                              timeout=1)],
+                            supervised=True))
+    assert results["hung"].reason == "timeout"
+    with open(pid_file, encoding="utf-8") as infile:
+        pid = int(infile.read())
+    deadline = time.monotonic() + 5
+    while _is_running(pid) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not _is_running(pid)
+
+
+@pytest.mark.parametrize("error", [ProcessLookupError, PermissionError])
+def test_timeout_without_process_group(monkeypatch, error):
+    """Test that a worker is killed on timeout also if it has not started
+    its own process group yet.
+    """
+    def _killpg(pgid, sig):
+        """Fail as if the process group did not exist yet."""
+        raise error(pgid, sig)
+
+    monkeypatch.setattr(scraping.os, "killpg", _killpg)
+    start = time.monotonic()
+    results = dict(run_jobs(_timed_job, [Job("hung", (30,), timeout=0.5),
+                                         Job("ok", (0.1,))],
+                            supervised=True))
+    assert time.monotonic() - start < 10
+    assert results["hung"].reason == "timeout"
+    assert not isinstance(results["ok"], JobFailure)
+
+
+def _allocate(size):
+    """Job allocating memory."""
+    return len(bytearray(size))
+
+
+def test_memory_limit():
+    """Test that a job exceeding its memory limit fails and the worker
+    can run the next jobs without the limit.
+    """
+    jobs = [Job("large", (1024 ** 3,), size=2, memory_limit=512 * 1024 ** 2),
+            Job("small", (1024 ** 2,), size=1)]
+    results = dict(run_jobs(_allocate, jobs, supervised=True))
+    assert results["large"].reason == "memory"
+    assert results["small"] == 1024 ** 2
+
+
+def _crash(code):
+    """Job exiting its worker process."""
+    if code:
+        os._exit(code)  # pylint: disable=protected-access
+    return code
+
+
+def test_crash():
+    """Test that a crashed worker is replaced, and the job fails if it
+    crashes again when retried.
+    """
+    jobs = [("crash", (3,)), ("ok", (0,))]
+    results = dict(run_jobs(_crash, jobs, supervised=True))
+    assert results["crash"] == JobFailure(
+        "crash", "Worker process exited with code 3")
+    assert results["ok"] == 0
+
+
+def _crash_once(marker):
+    """Job exiting its worker process on the first run only."""
+    if not os.path.exists(marker):
+        with open(marker, "w", encoding="utf-8"):
+            pass
+        os._exit(1)  # pylint: disable=protected-access
+    return "ok"
+
+
+@pytest.mark.parametrize(("crash_retries", "expected"), [
+    (1, "ok"),
+    (0, JobFailure("crash", "Worker process exited with code 1"))
+])
+def test_crash_retry(tmp_path, crash_retries, expected):
+    """Test that only the crashed job is retried."""
+    (tmp_path / "other").touch()
+    jobs = [("crash", (str(tmp_path / "crash"),)),
+            ("other", (str(tmp_path / "other"),))]
+    results = dict(run_jobs(_crash_once, jobs, supervised=True,
+                            crash_retries=crash_retries))
+    assert results == {"crash": expected, "other": "ok"}
+
+
+@pytest.mark.parametrize("limits", [
+    {"max_jobs_per_worker": 2},
+    {"max_worker_rss": 1}
+])
+def test_recycle_workers(limits):
+    """Test that workers are replaced after a number of jobs or when they
+    have grown too large.
+    """
+    jobs = ((f"key-{number}", (number,)) for number in range(6))
+    results = dict(run_jobs(_job, jobs, supervised=True, **limits))
+    pids = [results[f"key-{number}"][1] for number in range(6)]
+    if "max_jobs_per_worker" in limits:
+        assert len(set(pids)) == 3
+        assert pids[0] == pids[1] and pids[2] == pids[3]
+    else:
+        assert len(set(pids)) == 6
+
+
+def _fail(message):
+    """Job raising an exception."""
+    raise ValueError(message)
+
+
+def test_error():
+    """Test that exceptions of the jobs are raised."""
+    with pytest.raises(ValueError, match="Failed"):
+        list(run_jobs(_fail, [("key", ("Failed",))], supervised=True))
+
+
+@pytest.mark.parametrize(("filepath", "mimetype", "expected"), [
+    ("video.dv", None, True),
+    ("audio.wav", None, True),
+    ("image.tif", None, False),
+    ("file.bin", "video/mp4", True),
+    ("file.bin", None, False)
+])
+def test_is_heavy(filepath, mimetype, expected):
+    """Test that audio and video files are heavy."""
+    assert is_heavy(filepath, mimetype) is expected
+
+
+def _scrape(filepath):
+    """Scraping function with verbose tool output."""
+    return {
+        "info": {0: {"class": "Scraper", "messages": ["Success"] * 100,
+                     "errors": ["Error\nTraceback..."], "tools": ["tool"]}},
+        "filepath": filepath
+    }
+
+
+@pytest.mark.parametrize("trim_info", [False, True])
+def test_scrape_job(trim_info):
+    """Test that the scraper info is trimmed and written as diagnostics."""
+    (result, diagnostics, duration) = scrape_job(
+        _scrape, ("file.txt",), "obj-1", trim_info=trim_info,
+        diagnostics=True)
+    assert result["filepath"] == "file.txt"
+    assert duration >= 0
+    if trim_info:
+        assert result["info"] == {0: {"class": "Scraper", "messages": [],
+                                      "errors": ["Error"],
+                                      "tools": ["tool"]}}
+    else:
+        assert result["info"] == _scrape("file.txt")["info"]
+
+    lines = gzip.decompress(diagnostics + diagnostics).splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[0]) == {
+        "object_identifier": "obj-1",
+        "info": {"0": _scrape("file.txt")["info"][0]}}
+
+    assert scrape_job(_scrape, ("file.txt",), "obj-1")[1] is None
@@ -0,0 +1,226 @@
+"""Tests the service module."""
+import json
+import os
+import queue
+import threading
+import time
+
+import pytest
+from dpres_sip_compiler import service as service_module
+from dpres_sip_compiler.service import (
+    JobService, UnixHTTPConnection, UnixHTTPServer)
+
+
+def _validate_job(tmp_path):
+    """Validate job for the generic test files."""
+    return {
+        "type": "validate",
+        "source_path": "tests/data/generic/files",
+        "config": "tests/data/generic/generic.conf",
+        "options": {
+            "valid_output": str(tmp_path / "valid.jsonl"),
+            "invalid_output": str(tmp_path / "invalid.jsonl")
+        }
+    }
+
+
+def _request(socket_path, method, path, body=None):
+    """Send request to the service.
+
+    :returns: Tuple of response status and decoded JSON body
+    """
+    connection = UnixHTTPConnection(socket_path)
+    try:
+        if body is not None:
+            body = json.dumps(body)
+        connection.request(method, path, body=body)
+        response = connection.getresponse()
+        return (response.status, json.loads(response.read()))
+    finally:
+        connection.close()
+
+
+@pytest.fixture(scope="function")
+def run_server(tmp_path):
+    """Run HTTP server for the given service in a thread."""
+    servers = []
+
+    def _run(service):
+        """Start server and return its socket path."""
+        socket_path = str(tmp_path / "service.sock")
+        server = UnixHTTPServer(socket_path, service)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return socket_path
+
+    yield _run
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.parametrize("request_update", [
+    {"type": "unknown"},
+    {"source_path": None},
+    {"config": 1},
+    {"options": []},
+    {"options": {"tar_file": "sip.tar"}},
+    {"type": "compile", "options": {}}
+])
+def test_submit_invalid(tmp_path, request_update):
+    """Test that invalid jobs are rejected."""
+    job = _validate_job(tmp_path)
+    job.update(request_update)
+    with pytest.raises(ValueError):
+        JobService().submit(job)
+
+
+def test_queue_full(tmp_path):
+    """Test that jobs are rejected when the queue is full."""
+    service = JobService(queue_size=1)
+    job = service.submit(_validate_job(tmp_path))
+    assert job["status"] == "queued"
+    with pytest.raises(queue.Full):
+        service.submit(_validate_job(tmp_path))
+    assert [job["id"] for job in service.jobs()] == [job["id"]]
+
+
+# pylint: disable=redefined-outer-name
+def test_http_interface(tmp_path, run_server):
+    """Test submitting jobs and querying status over HTTP."""
+    socket_path = run_server(JobService(queue_size=1))
+
+    (status, job) = _request(socket_path, "POST", "/jobs",
+                             _validate_job(tmp_path))
+    assert status == 202
+    assert job["status"] == "queued"
+
+    (status, body) = _request(socket_path, "GET", f"/jobs/{job['id']}")
+    assert status == 200
+    assert body == job
+
+    (status, body) = _request(socket_path, "GET", "/jobs")
+    assert status == 200
+    assert body == [job]
+
+    (status, body) = _request(socket_path, "POST", "/jobs",
+                              _validate_job(tmp_path))
+    assert status == 503
+
+    (status, body) = _request(socket_path, "POST", "/jobs",
+                              {"type": "unknown"})
+    assert status == 400
+    assert "error" in body
+
+    (status, body) = _request(socket_path, "GET", "/jobs/unknown")
+    assert status == 404
+
+
+def _run_job(run_server, request, workers=1):
+    """Run a job in a service and wait for it to finish.
+
+    :returns: Status of the finished job
+    """
+    service = JobService(workers=workers)
+    service.start()
+    try:
+        socket_path = run_server(service)
+        (_, job) = _request(socket_path, "POST", "/jobs", request)
+
+        deadline = time.monotonic() + 60
+        while job["status"] in ("queued", "running"):
+            assert time.monotonic() < deadline
+            time.sleep(0.2)
+            (_, job) = _request(socket_path, "GET", f"/jobs/{job['id']}")
+    finally:
+        service.close()
+    return job
+
+
+def test_validate_job(tmp_path, run_server):
+    """Test that a validate job is run by a worker."""
+    job = _run_job(run_server, _validate_job(tmp_path))
+
+    assert job["status"] == "finished", job["error"]
+    assert job["result"] == {"valid": 2, "invalid": 0, "timeout": 0}
+    assert job["started"] and job["finished"]
+    assert os.path.isfile(tmp_path / "valid.jsonl")
+
+
+@pytest.mark.parametrize("options", [
+    {"workers": 2},
+    {"max_sip_objects": 1, "parallel_parts": 2}
+])
+def test_compile_job_workers(tmp_path, run_server, options):
+    """Test that a compile job can start worker processes of its own."""
+    tar_file = str(tmp_path / "sip.tar")
+    job = _run_job(run_server, {
+        "type": "compile",
+        "source_path": "tests/data/generic/files",
+        "config": "tests/data/generic/generic.conf",
+        "options": {"tar_file": tar_file, **options}
+    })
+
+    assert job["status"] == "finished", job["error"]
+    assert any(name.startswith("sip") and name.endswith(".tar")
+               for name in os.listdir(tmp_path))
+
+
+def test_validate_job_limits(tmp_path, run_server):
+    """Test that a validate job can scrape in supervised worker processes,
+    as with time limits configured.
+    """
+    conf_file = tmp_path / "limits.conf"
+    with open("tests/data/generic/generic.conf", encoding="utf-8") as infile:
+        conf_file.write_text(infile.read() + "\n[timeouts]\ndefault=600\n")
+    request = _validate_job(tmp_path)
+    request["config"] = str(conf_file)
+    job = _run_job(run_server, request)
+
+    assert job["status"] == "finished", job["error"]
+    assert job["result"] == {"valid": 2, "invalid": 0, "timeout": 0}
+
+
+def _failing_warm_up():
+    """Warm-up failing to import a module."""
+    raise ImportError("No module named 'missing'")
+
+
+def _exiting_job(job_type, source_path, conf_file, options):
+    """Job exiting its worker process for the source path "exit"."""
+    if source_path == "exit":
+        os._exit(3)  # pylint: disable=protected-access
+    return {"source_path": source_path}
+
+
+def _wait_job(service, job_id):
+    """Wait for a job to finish and return its status."""
+    deadline = time.monotonic() + 60
+    while service.status(job_id)["status"] in ("queued", "running"):
+        assert time.monotonic() < deadline
+        time.sleep(0.1)
+    return service.status(job_id)
+
+
+def test_worker_failures(tmp_path, monkeypatch):
+    """Test that warm-up errors are ignored, and a job exiting its worker
+    fails and the worker is replaced.
+    """
+    monkeypatch.setattr(service_module, "_warm_up", _failing_warm_up)
+    monkeypatch.setattr(service_module, "_execute_job", _exiting_job)
+    service = JobService(workers=1)
+    service.start()
+    try:
+        exiting = service.submit({**_validate_job(tmp_path),
+                                  "source_path": "exit"})
+        other = service.submit(_validate_job(tmp_path))
+
+        job = _wait_job(service, exiting["id"])
+        assert job["status"] == "failed"
+        assert job["error"] == "Worker process exited with code 3"
+
+        job = _wait_job(service, other["id"])
+        assert job["status"] == "finished"
+        assert job["result"] == {"source_path": "tests/data/generic/files"}
+    finally:
+        service.close()
@@ -0,0 +1,147 @@
+"""Tests the tar_stream module."""
+import io
+import os
+import tarfile
+import threading
+
+import pytest
+from dpres_sip_compiler.tar_stream import (
+    TarStreamWriter, ThroughputReporter, format_bytes)
+
+
+def _write_files(tmp_path):
+    """Create test files of different sizes.
+
+    :returns: List of (path, arcname, content) tuples
+    """
+    files = []
+    for (name, size) in [("empty.txt", 0), ("small.txt", 100),
+                         ("data/block.bin", tarfile.BLOCKSIZE),
+                         ("data/large.bin", 3 * 1024 * 1024 + 7)]:
+        path = tmp_path / name
+        path.parent.mkdir(exist_ok=True)
+        content = os.urandom(size)
+        path.write_bytes(content)
+        files.append((str(path), name, content))
+    return files
+
+
+def _assert_tar(fileobj, files, extra=None):
+    """Assert that the tar contains the given files and extra members."""
+    with tarfile.open(fileobj=fileobj) as tar:
+        for (_, arcname, content) in files:
+            assert tar.extractfile(arcname).read() == content
+        for (arcname, content) in (extra or {}).items():
+            assert tar.extractfile(arcname).read() == content
+
+
+@pytest.mark.parametrize("buffer_size", [1024, 8 * 1024 * 1024])
+def test_write_file(tmp_path, buffer_size):
+    """Test writing a tar archive to a regular file."""
+    files = _write_files(tmp_path)
+    tar_file = tmp_path / "sip.tar"
+    with open(tar_file, "wb") as outfile:
+        writer = TarStreamWriter(outfile, buffer_size=buffer_size)
+        writer.add_bytes("signature.sig", b"signature")
+        for (path, arcname, _) in files:
+            writer.add_file(path, arcname)
+        writer.close()
+
+    assert os.path.getsize(tar_file) % tarfile.RECORDSIZE == 0
+    with open(tar_file, "rb") as infile:
+        _assert_tar(infile, files, {"signature.sig": b"signature"})
+
+
+def test_write_memory(tmp_path):
+    """Test writing a tar archive to a file object without descriptor."""
+    files = _write_files(tmp_path)
+    output = io.BytesIO()
+    writer = TarStreamWriter(output)
+    for (path, arcname, _) in files:
+        writer.add_file(path, arcname)
+    writer.close()
+
+    output.seek(0)
+    _assert_tar(output, files)
+
+
+def test_write_pipe(tmp_path):
+    """Test writing a tar archive to a pipe."""
+    files = _write_files(tmp_path)
+    (read_fd, write_fd) = os.pipe()
+    received = io.BytesIO()
+
+    def _read():
+        """Read everything from the pipe."""
+        with os.fdopen(read_fd, "rb") as infile:
+            received.write(infile.read())
+
+    reader = threading.Thread(target=_read)
+    reader.start()
+    with os.fdopen(write_fd, "wb") as outfile:
+        writer = TarStreamWriter(outfile)
+        for (path, arcname, _) in files:
+            writer.add_file(path, arcname)
+        writer.close()
+    reader.join()
+
+    received.seek(0)
+    _assert_tar(received, files)
+
+
+def test_hardlink(tmp_path):
+    """Test that hard links refer to the content of an earlier member."""
+    files = _write_files(tmp_path)
+    (path, arcname, content) = files[1]
+    output = io.BytesIO()
+    writer = TarStreamWriter(output)
+    writer.add_file(path, arcname)
+    writer.add_hardlink("copy.txt", arcname, os.stat(path))
+    writer.close()
+
+    output.seek(0)
+    with tarfile.open(fileobj=output) as tar:
+        member = tar.getmember("copy.txt")
+        assert member.islnk()
+        assert member.linkname == arcname
+        assert tar.extractfile(member).read() == content
+
+
+def test_changed_size(tmp_path):
+    """Test that a file shorter than its stat size is detected."""
+    path = tmp_path / "file.txt"
+    path.write_bytes(b"content")
+    stat_result = os.stat(path)
+    path.write_bytes(b"short")
+
+    writer = TarStreamWriter(io.BytesIO())
+    with pytest.raises(OSError):
+        writer.add_file(str(path), "file.txt", stat_result=stat_result)
+
+
+def test_progress(tmp_path):
+    """Test that copied bytes are reported."""
+    files = _write_files(tmp_path)
+    total = sum(len(content) for (_, _, content) in files)
+    output = io.StringIO()
+    reporter = ThroughputReporter(total_bytes=total, interval=0,
+                                  output=output)
+    writer = TarStreamWriter(io.BytesIO(), progress=reporter)
+    for (path, arcname, _) in files:
+        writer.add_file(path, arcname)
+    writer.close()
+    reporter.finish()
+
+    assert reporter.bytes_done == total
+    assert "(100%)" in output.getvalue().splitlines()[-1]
+
+
+@pytest.mark.parametrize(("size", "expected"), [
+    (0, "0.0 B"),
+    (1536, "1.5 KiB"),
+    (3 * 1024 ** 4, "3.0 TiB"),
+    (5 * 1024 ** 5, "5120.0 TiB")
+])
+def test_format_bytes(size, expected):
+    """Test formatting of byte counts."""
+    assert format_bytes(size) == expected
@@ -0,0 +1,50 @@
+"""Tests the timing module."""
+import json
+import time
+
+from dpres_sip_compiler.timing import TimingReport, timed_call
+
+
+def _info(*classes):
+    """Scraper info of the given scraper classes."""
+    return {index: {"class": scraper_class, "messages": [], "errors": [],
+                    "tools": []}
+            for (index, scraper_class) in enumerate(classes)}
+
+
+def test_timed_call():
+    """Test that the result and the duration are returned."""
+    (result, duration) = timed_call(time.sleep, 0.05)
+    assert result is None
+    assert 0.05 <= duration < 1
+
+
+def test_report(tmp_path):
+    """Test the slowest files and the aggregates by MIME type and tool."""
+    report = TimingReport(top=2)
+    report.add("a.wav", "audio/x-wav", 4000, 2.0,
+               _info("WavScraper", "FfmpegScraper"))
+    report.add("b.txt", "text/plain", 100, 0.5, _info("TextfileScraper"))
+    report.add("c.wav", "audio/x-wav", 2000, 4.0,
+               _info("WavScraper", "FfmpegScraper"))
+    report.add("d.bin", None, 10, 0.5)
+
+    path = tmp_path / "timing.json"
+    report.write(str(path))
+    result = json.loads(path.read_text())
+
+    assert result["total"] == {"files": 4, "bytes": 6110, "seconds": 7.0,
+                               "bytes_per_second": 873}
+    assert result["slowest_files"] == [
+        {"path": "c.wav", "mimetype": "audio/x-wav", "bytes": 2000,
+         "seconds": 4.0, "bytes_per_second": 500},
+        {"path": "a.wav", "mimetype": "audio/x-wav", "bytes": 4000,
+         "seconds": 2.0, "bytes_per_second": 2000}]
+    assert list(result["by_mimetype"]) == ["audio/x-wav", "text/plain",
+                                           "(:unav)"]
+    assert result["by_mimetype"]["audio/x-wav"] == {
+        "files": 2, "bytes": 6000, "seconds": 6.0, "bytes_per_second": 1000}
+    assert result["by_tool"]["WavScraper"]["seconds"] == 6.0
+    assert result["by_tool"]["FfmpegScraper"]["files"] == 2
+    assert result["by_tool"]["TextfileScraper"]["files"] == 1
+    assert "(:unav)" not in result["by_tool"]
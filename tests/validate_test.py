@@ -1,5 +1,6 @@
 """Tests the validate module."""
 import os
+from dpres_sip_compiler import validate
 from dpres_sip_compiler.validate import (count_files, scrape_files,
                                          iterate_files)
 from dpres_sip_compiler.config import Config
@@ -68,6 +69,39 @@ def test_scrape_files_dv_concealing_errors(
     assert invalid_files == expected_invalid_files
 
 
+def _scrape_pid(filepath, ignore_concealing=False):
+    """Record the worker process instead of scraping the file."""
+    # pylint: disable=unused-argument
+    return {"path": filepath, "pid": os.getpid()}
+
+
+@pytest.mark.parametrize(("limits", "expected_workers"), [
+    ({"max_files_per_worker": 2}, 2),
+    ({"max_worker_rss": 1}, 4),
+])
+def test_scrape_files_recycle_workers(
+        tmpdir, monkeypatch, limits, expected_workers):
+    """Test that the worker process is replaced after the given number of
+    files, or when it has grown too large.
+    """
+    for index in range(4):
+        tmpdir.join(f"file_{index}.txt").write("x" * (4 - index))
+    monkeypatch.setattr(validate, "scrape_file_info", _scrape_pid)
+    config = Config(conf_file="tests/data/generic/generic.conf")
+
+    pids = {file_dict["path"]: file_dict["pid"] for file_dict
+            in scrape_files(str(tmpdir), config, **limits)}
+    assert len(pids) == 4
+    assert os.getpid() not in pids.values()
+    assert len(set(pids.values())) == expected_workers
+    if "max_files_per_worker" in limits:
+        # The largest files are scraped first, by the same worker
+        order = [str(tmpdir.join(f"file_{index}.txt"))
+                 for index in range(4)]
+        assert pids[order[0]] == pids[order[1]]
+        assert pids[order[2]] == pids[order[3]]
+
+
 def test_count_files():
     """Tests the count_files function."""
     config = Config(conf_file="tests/data/musicarchive/config.conf")